@@ -11,11 +11,22 @@ from datetime import timedelta, timezone
 # Third party imports
 import humanize
 import psutil
+import redis
 import zipfly
 from celery import Celery
 
 # Reader imports
-from src.app import CustomExport, PolygonStats, RawData, S3FileTransfer
+from src.app import (
+    CustomExport,
+    ExportCache,
+    ParallelZipWriter,
+    PolygonStats,
+    RawData,
+    S3FileTransfer,
+    get_compress_level,
+    log_archive_metrics,
+    write_to_zip,
+)
 from src.config import ALLOW_BIND_ZIP_FILTER
 from src.config import CELERY_BROKER_URL as celery_broker_uri
 from src.config import CELERY_RESULT_BACKEND as celery_backend
@@ -23,13 +34,16 @@ from src.config import (
     DEFAULT_HARD_TASK_LIMIT,
     DEFAULT_README_TEXT,
     DEFAULT_SOFT_TASK_LIMIT,
+    ENABLE_DELTA_EXPORTS,
+    ENABLE_EXPORT_CACHE,
     ENABLE_SOZIP,
+    ENABLE_STREAMING_UPLOAD,
     ENABLE_TILES,
     HDX_HARD_TASK_LIMIT,
     HDX_SOFT_TASK_LIMIT,
 )
 from src.config import USE_S3_TO_UPLOAD as use_s3_to_upload
-from src.config import WORKER_PREFETCH_MULTIPLIER
+from src.config import WORKER_PREFETCH_MULTIPLIER, ZIP_COMPRESSION_LEVEL, ZIP_WORKERS
 from src.config import logger as logging
 from src.query_builder.builder import format_file_name_str
 from src.validation.models import (
@@ -60,6 +74,8 @@ celery.conf.update(result_extended=True)
 if WORKER_PREFETCH_MULTIPLIER:
     celery.conf.update(worker_prefetch_multiplier=WORKER_PREFETCH_MULTIPLIER)
 
+redis_client = redis.StrictRedis.from_url(celery_broker_uri)
+
 
 def create_readme_content(default_readme, polygon_stats):
     utc_now = dt.now(timezone.utc)
@@ -100,7 +116,15 @@ def zip_binding(
     logging.debug("Total %s to be zipped", humanize.naturalsize(inside_file_size))
 
     system_ram = psutil.virtual_memory().total  # system RAM in bytes
-    if (
+    if ZIP_WORKERS > 1 and not ENABLE_SOZIP:
+        logging.debug("Using parallel zip writer with %s workers", ZIP_WORKERS)
+        with ParallelZipWriter(upload_file_path) as zf:
+            for file_path in pathlib.Path(working_dir).iterdir():
+                if file_path.is_file():
+                    write_to_zip(zf, file_path, arcname=file_path.name)
+            log_archive_metrics(upload_file_path, zf.infolist())
+
+    elif (
         inside_file_size > 0.8 * system_ram or inside_file_size > 3 * 1024**3
     ):  # if file size is greater than 80% of ram or greater than 3 gb
         logging.debug(
@@ -125,17 +149,192 @@ def zip_binding(
             upload_file_path,
             "w",
             compression=zipfile.ZIP_DEFLATED,
-            compresslevel=9,
+            compresslevel=ZIP_COMPRESSION_LEVEL,
             allowZip64=True,
         ) as zf:
             for file_path in pathlib.Path(working_dir).iterdir():
                 if file_path.is_file():
-                    zf.write(file_path, arcname=file_path.name)
+                    write_to_zip(zf, file_path, arcname=file_path.name)
+            log_archive_metrics(upload_file_path, zf.infolist())
 
     logging.debug("Zip Binding Done!")
     return upload_file_path, inside_file_size
 
 
+def get_upload_name(params, exportname):
+    """Gives s3 key of export without suffix , recurring TM and HDX exports are kept under their own folders"""
+    file_parts = os.path.join(*exportname.split("/"))
+    upload_name = f"default/{file_parts}" if params.uuid else f"recurring/{file_parts}"
+    logging.info(upload_name)
+
+    if exportname.startswith("hotosm_project"):  # TM
+        if not params.uuid:
+            pattern = r"(hotosm_project_)(\d+)"
+            match = re.match(pattern, exportname)
+            if match:
+                prefix = match.group(1)
+                project_number = match.group(2)
+                if project_number:
+                    upload_name = f"TM/{project_number}/{exportname}"
+    elif exportname.startswith("hotosm_"):  # HDX
+        if not params.uuid:
+            pattern = r"hotosm_([A-Za-z]{3})_(\w+)"
+            match = re.match(pattern, exportname)
+
+            if match:
+                iso3countrycode = match.group(1)
+                if iso3countrycode:
+                    upload_name = f"HDX/{iso3countrycode.upper()}/{exportname}"
+    return upload_name
+
+
+def stream_and_upload(params, exportname, polygon_stats):
+    """Streams geojson export from server side cursor through zip writer to s3 multipart upload , Nothing is written to EXPORT_PATH
+
+    Args:
+        params (RawDataCurrentParams): export parameters
+        exportname (str): name of export , parts separated by / are used as path on s3
+        polygon_stats (dict): stats of polygon to be included in readme
+
+    Returns:
+        tuple: query area , download url , inside file size and uploaded file size
+    """
+    upload_name = f"{get_upload_name(params, exportname)}.zip"
+    geom_area, geom_dump, features = RawData(params).stream_current_data()
+    file_transfer_obj = S3FileTransfer()
+    writer = None
+    try:
+        writer = file_transfer_obj.open_multipart_upload(upload_name)
+        with ParallelZipWriter(writer) as zf:
+            zf.write_iter(
+                f"{params.file_name}.geojson",
+                features,
+                compresslevel=get_compress_level(f"{params.file_name}.geojson"),
+            )
+            zf.writestr("clipping_boundary.geojson", geom_dump)
+            zf.writestr(
+                "Readme.txt",
+                create_readme_content(
+                    default_readme=DEFAULT_README_TEXT, polygon_stats=polygon_stats
+                ),
+            )
+            inside_file_size = sum(info.file_size for info in zf.infolist())
+            log_archive_metrics(upload_name, zf.infolist())
+    except Exception as ex:
+        if writer is not None:
+            writer.abort()
+        raise ex
+    finally:
+        features.close()  # releases cursor and connection if stream was not exhausted
+    writer.close()
+    return (
+        geom_area,
+        file_transfer_obj.get_object_url(upload_name),
+        inside_file_size,
+        writer.size,
+    )
+
+
+def bind_and_upload(
+    params, exportname, working_dir, geom_dump, polygon_stats, bind_zip
+):
+    """Zips the export files of working dir if requested and uploads the result to s3 , Gives download url with size of exported files and uploaded file
+
+    Args:
+        params (RawDataCurrentParams): export parameters
+        exportname (str): name of export , parts separated by / are used as path on s3
+        working_dir (str): directory of exported files
+        geom_dump (str): clipping boundary geojson
+        polygon_stats (dict): stats of polygon to be included in readme
+        bind_zip (bool): zips the export files
+
+    Returns:
+        tuple: download url , inside file size and uploaded file size
+    """
+    exportname_parts = exportname.split("/")
+    inside_file_size = 0
+    if bind_zip:
+        upload_file_path, inside_file_size = zip_binding(
+            working_dir=working_dir,
+            exportname_parts=exportname_parts,
+            geom_dump=geom_dump,
+            polygon_stats=polygon_stats,
+            default_readme=DEFAULT_README_TEXT,
+        )
+
+        logging.debug("Zip Binding Done !")
+    else:
+        for file_path in pathlib.Path(working_dir).iterdir():
+            if file_path.is_file() and file_path.name.endswith(
+                params.output_type.lower()
+            ):
+                upload_file_path = file_path
+                inside_file_size += os.path.getsize(file_path)
+                break  # only take one file inside dir , if contains many it should be inside zip
+    # check if download url will be generated from s3 or not from config
+    if use_s3_to_upload:
+        file_transfer_obj = S3FileTransfer()
+        download_url = file_transfer_obj.upload(
+            upload_file_path,
+            get_upload_name(params, exportname),
+            file_suffix="zip" if bind_zip else params.output_type.lower(),
+        )
+    else:
+        # give the static file download url back to user served from fastapi static export path
+        download_url = str(upload_file_path)
+
+    # getting file size of zip , units are in bytes converted to mb in response
+    zip_file_size = os.path.getsize(upload_file_path)
+    if use_s3_to_upload or bind_zip:
+        # remove working dir from the machine , if its inside zip / uploaded we no longer need it
+        remove_file(working_dir)
+    return download_url, inside_file_size, zip_file_size
+
+
+def export_delta(params, exportname, bind_zip, last_updated):
+    """Exports features created or modified since the previous run of recurring export as separate _delta file
+
+    Import date of database at each run is stored in redis against the export name by caller once full export is done and used as changed_since of next run.
+    Deleted features are not part of delta since rows are removed from the tables on replication without keeping their ids.
+
+    Args:
+        params (RawDataCurrentParams): export parameters of full export
+        exportname (str): name of full export
+        bind_zip (bool): zips the export files
+        last_updated (str): current import date of database
+
+    Returns:
+        tuple: download url and size of delta , None on first run , and import date to be stored once full export succeeds
+    """
+    previous_updated = redis_client.get(get_delta_state_key(exportname))
+    delta_response = None
+    if previous_updated:
+        previous_updated = previous_updated.decode("utf-8")
+        delta_params = params.model_copy(deep=True)
+        delta_params.changed_since = dt.fromisoformat(previous_updated)
+        delta_exportname = f"{exportname}_delta"
+        logging.info(
+            "Exporting delta %s of changes since %s", delta_exportname, previous_updated
+        )
+        _, geom_dump, working_dir = RawData(delta_params).extract_current_data(
+            os.path.join(*delta_exportname.split("/"))
+        )
+        download_url, _, zip_file_size = bind_and_upload(
+            delta_params, delta_exportname, working_dir, geom_dump, None, bind_zip
+        )
+        delta_response = {
+            "delta_download_url": download_url,
+            "delta_since": previous_updated,
+            "delta_zip_file_size_bytes": zip_file_size,
+        }
+    return delta_response, last_updated
+
+
+def get_delta_state_key(exportname):
+    """Redis key holding import date of last successful run of recurring export"""
+    return f"delta_export:{exportname}"
+
+
 @celery.task(
     bind=True,
     name="process_raw_data",
@@ -178,11 +377,29 @@ def process_raw_data(self, params, user=None):
             params.file_name,
             file_parts,
         )
+        export_cache, cache_key = None, None
+        if ENABLE_EXPORT_CACHE and params.uuid:
+            # exports without uuid are written to same path for same file name , so their artifact can't be reused
+            export_cache = ExportCache()
+            cache_key = ExportCache.get_cache_key(params, RawData().check_status())
+            cached_response = export_cache.get(cache_key)
+            if cached_response:
+                logging.info("Serving %s from export cache : %s", exportname, cache_key)
+                cached_response["process_time"] = humanize.naturaldelta(
+                    timedelta(seconds=(time.time() - start_time))
+                )
+                cached_response["cache_hit"] = True
+                return cached_response
+
+        delta_response, last_updated = None, None
+        if ENABLE_DELTA_EXPORTS and not params.uuid and not params.changed_since:
+            # import date is taken before extraction so that changes imported during export are part of next delta
+            # delta is exported first since extraction modifies filters of params
+            last_updated = RawData().check_status()
+            delta_response, last_updated = export_delta(
+                params, exportname, bind_zip, last_updated
+            )
 
-        geom_area, geom_dump, working_dir = RawData(params).extract_current_data(
-            file_parts
-        )
-        inside_file_size = 0
         polygon_stats = None
         if "include_stats" in params.dict():
             if params.include_stats:
@@ -192,65 +409,22 @@ def process_raw_data(self, params, user=None):
                     "properties": {},
                 }
                 polygon_stats = PolygonStats(feature).get_summary_stats()
-        if bind_zip:
-            upload_file_path, inside_file_size = zip_binding(
-                working_dir=working_dir,
-                exportname_parts=exportname_parts,
-                geom_dump=geom_dump,
-                polygon_stats=polygon_stats,
-                default_readme=DEFAULT_README_TEXT,
+        if (
+            ENABLE_STREAMING_UPLOAD
+            and use_s3_to_upload
+            and bind_zip
+            and params.output_type == RawDataOutputType.GEOJSON.value
+        ):
+            geom_area, download_url, inside_file_size, zip_file_size = (
+                stream_and_upload(params, exportname, polygon_stats)
             )
-
-            logging.debug("Zip Binding Done !")
         else:
-            for file_path in pathlib.Path(working_dir).iterdir():
-                if file_path.is_file() and file_path.name.endswith(
-                    params.output_type.lower()
-                ):
-                    upload_file_path = file_path
-                    inside_file_size += os.path.getsize(file_path)
-                    break  # only take one file inside dir , if contains many it should be inside zip
-        # check if download url will be generated from s3 or not from config
-        if use_s3_to_upload:
-            file_transfer_obj = S3FileTransfer()
-            upload_name = (
-                f"default/{file_parts}" if params.uuid else f"recurring/{file_parts}"
+            geom_area, geom_dump, working_dir = RawData(params).extract_current_data(
+                file_parts
             )
-            logging.info(upload_name)
-
-            if exportname.startswith("hotosm_project"):  # TM
-                if not params.uuid:
-                    pattern = r"(hotosm_project_)(\d+)"
-                    match = re.match(pattern, exportname)
-                    if match:
-                        prefix = match.group(1)
-                        project_number = match.group(2)
-                        if project_number:
-                            upload_name = f"TM/{project_number}/{exportname}"
-            elif exportname.startswith("hotosm_"):  # HDX
-                if not params.uuid:
-                    pattern = r"hotosm_([A-Za-z]{3})_(\w+)"
-                    match = re.match(pattern, exportname)
-
-                    if match:
-                        iso3countrycode = match.group(1)
-                        if iso3countrycode:
-                            upload_name = f"HDX/{iso3countrycode.upper()}/{exportname}"
-
-            download_url = file_transfer_obj.upload(
-                upload_file_path,
-                upload_name,
-                file_suffix="zip" if bind_zip else params.output_type.lower(),
+            download_url, inside_file_size, zip_file_size = bind_and_upload(
+                params, exportname, working_dir, geom_dump, polygon_stats, bind_zip
             )
-        else:
-            # give the static file download url back to user served from fastapi static export path
-            download_url = str(upload_file_path)
-
-        # getting file size of zip , units are in bytes converted to mb in response
-        zip_file_size = os.path.getsize(upload_file_path)
-        if use_s3_to_upload or bind_zip:
-            # remove working dir from the machine , if its inside zip / uploaded we no longer need it
-            remove_file(working_dir)
         response_time_str = humanize.naturaldelta(
             timedelta(seconds=(time.time() - start_time))
         )
@@ -267,6 +441,13 @@ def process_raw_data(self, params, user=None):
         }
         if polygon_stats:
             final_response["stats"] = polygon_stats
+        if delta_response:
+            final_response.update(delta_response)
+        if last_updated:
+            # stored only after full export succeeded so failed run doesn't skip its changes in next delta
+            redis_client.set(get_delta_state_key(exportname), last_updated)
+        if export_cache:
+            export_cache.set(cache_key, final_response, zip_file_size)
         return final_response
 
     except Exception as ex:
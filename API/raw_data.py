@@ -23,31 +23,43 @@
 import json
 
 # Third party imports
+import humanize
 import redis
 from area import area
 from fastapi import APIRouter, Body, Depends, HTTPException, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi_versioning import version
 
 # Reader imports
-from src.app import RawData
+from src.app import (
+    RawData,
+    countries_cache,
+    get_snapshot_queue_name,
+    prepared_statements,
+)
 from src.config import (
     ALLOW_BIND_ZIP_FILTER,
     CELERY_BROKER_URL,
     DEFAULT_QUEUE_NAME,
+    ENABLE_QUEUE_ROUTING,
     EXPORT_MAX_AREA_SQKM,
+    EXPORT_MAX_ESTIMATED_BYTES,
 )
 from src.config import LIMITER as limiter
+from src.config import PLAIN_GEOJSON_MAX_AREA_SQKM
 from src.config import RATE_LIMIT_PER_MIN as export_rate_limit
 from src.validation.models import (
+    CountriesSimplification,
+    OsmFeaturesParams,
     RawDataCurrentParams,
     RawDataCurrentParamsBase,
+    SnapshotEstimateResponse,
     SnapshotResponse,
     StatusResponse,
 )
 
 from .api_worker import process_raw_data
-from .auth import AuthUser, UserRole, get_optional_user
+from .auth import AuthUser, UserRole, admin_required, get_optional_user
 
 router = APIRouter(prefix="", tags=["Extract"])
 
@@ -62,6 +74,13 @@ def check_database_last_updated():
     return {"last_updated": result}
 
 
+@router.get("/status/prepared_statements/")
+@version(1)
+def get_prepared_statements_stats(user: AuthUser = Depends(admin_required)):
+    """Gives plan cache hits and misses of prepared statements used by read endpoints on pooled connections of this API process , Only admin can access it"""
+    return prepared_statements.get_stats()
+
+
 @router.post("/snapshot/", response_model=SnapshotResponse)
 @limiter.limit(f"{export_rate_limit}/minute")
 @version(1)
@@ -447,8 +466,21 @@ def get_osm_current_snapshot_as_file(
                             }
                         ],
                     )
+        if EXPORT_MAX_ESTIMATED_BYTES:
+            estimate = RawData(params.model_copy(deep=True)).estimate_export()
+            if estimate["bytes"] > EXPORT_MAX_ESTIMATED_BYTES:
+                raise HTTPException(
+                    status_code=400,
+                    detail=[
+                        {
+                            "msg": f"""Estimated export size {humanize.naturalsize(estimate["bytes"])} is higher than Threshold : {humanize.naturalsize(EXPORT_MAX_ESTIMATED_BYTES)} , Reduce the area or add filters"""
+                        }
+                    ],
+                )
 
     queue_name = DEFAULT_QUEUE_NAME  # Everything directs to default now
+    if ENABLE_QUEUE_ROUTING:
+        queue_name = get_snapshot_queue_name(params)
     task = process_raw_data.apply_async(
         args=(params.model_dump(),),
         queue=queue_name,
@@ -464,46 +496,111 @@ def get_osm_current_snapshot_as_file(
     )
 
 
+@router.post("/snapshot/estimate/", response_model=SnapshotEstimateResponse)
+@version(1)
+def estimate_osm_current_snapshot(
+    request: Request,
+    params: RawDataCurrentParams,
+    user: AuthUser = Depends(get_optional_user),
+):
+    """Estimates rows , output size and runtime of snapshot request without queueing it , Estimate is based on postgres planner statistics of the queries which the export would run
+
+    Args:
+        request (Request): _description_
+        params (RawDataCurrentParams): Same as /snapshot/
+
+    Returns:
+        dict: estimated rows , bytes and runtime in total and per table
+    """
+    return RawData(params).estimate_export()
+
+
 @router.post("/snapshot/plain/")
 @version(1)
 def get_osm_current_snapshot_as_plain_geojson(
     request: Request,
     params: RawDataCurrentParamsBase,
     user: AuthUser = Depends(get_optional_user),
+    geojsonseq: bool = False,
+    compress: bool = False,
 ):
-    """Generates the Plain geojson for the polygon within 30 Sqkm and returns the result right away
+    """Generates the Plain geojson for the polygon within PLAIN_GEOJSON_MAX_AREA_SQKM Sqkm and streams the result right away
 
     Args:
         request (Request): _description_
         params (RawDataCurrentParamsBase): Same as /snapshot excpet multiple output format options and configurations
+        geojsonseq (bool): Streams newline delimited features instead of FeatureCollection
+        compress (bool): Streams gzip compressed response
 
     Returns:
         Featurecollection: Geojson
     """
     area_m2 = area(json.loads(params.geometry.model_dump_json()))
     area_km2 = area_m2 * 1e-6
-    if area_km2 > 10:
+    if area_km2 > PLAIN_GEOJSON_MAX_AREA_SQKM:
         raise HTTPException(
             status_code=400,
             detail=[
                 {
-                    "msg": f"""Polygon Area {int(area_km2)} Sq.KM is higher than Threshold : 10 Sq.KM"""
+                    "msg": f"""Polygon Area {int(area_km2)} Sq.KM is higher than Threshold : {PLAIN_GEOJSON_MAX_AREA_SQKM} Sq.KM"""
                 }
             ],
         )
     params.output_type = "geojson"  # always geojson
-    result = RawData(params).extract_plain_geojson()
-    return result
+    return StreamingResponse(
+        RawData(params).stream_plain_geojson(geojsonseq=geojsonseq, compress=compress),
+        media_type=(
+            "application/geo+json-seq" if geojsonseq else "application/geo+json"
+        ),
+        headers={"Content-Encoding": "gzip"} if compress else None,
+    )
 
 
 @router.get("/countries/")
 @version(1)
-def get_countries(q: str = ""):
-    result = RawData().get_countries_list(q)
-    return result
+def get_countries(
+    request: Request,
+    q: str = "",
+    simplify: CountriesSimplification = CountriesSimplification.NONE,
+):
+    """Gives countries as geojson featurecollection , Responses are cached in memory and versioned with ETag so unchanged responses are answered with 304
+
+    Args:
+        q (str): filter countries by name
+        simplify (CountriesSimplification): simplification level of country geometries , none keeps full resolution
+
+    Returns:
+        featurecollection: geojson of countries
+    """
+    body, etag = countries_cache.get(q, simplify.value)
+    headers = {"ETag": etag}
+    if etag in [
+        tag.strip() for tag in request.headers.get("if-none-match", "").split(",")
+    ]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 
 @router.get("/osm_id/")
 @version(1)
 def get_osm_feature(osm_id: int):
     return RawData().get_osm_feature(osm_id)
+
+
+@router.post("/osm_id/batch/")
+@version(1)
+def get_osm_features(params: OsmFeaturesParams, compress: bool = False):
+    """Streams features of many typed osm ids as newline delimited GeoJSONSeq , Ids which are not found are skipped
+
+    Args:
+        params (OsmFeaturesParams): typed osm ids e.g. n123 , w456 , r789
+        compress (bool): Streams gzip compressed response
+
+    Returns:
+        GeoJSONSeq: one feature per line
+    """
+    return StreamingResponse(
+        RawData().stream_osm_features(params.ids, compress=compress),
+        media_type="application/geo+json-seq",
+        headers={"Content-Encoding": "gzip"} if compress else None,
+    )
@@ -1,9 +1,12 @@
 import json
+from functools import partial
 from urllib.parse import quote
 
+import anyio
 import boto3
 import humanize
 from boto3.session import Session
+from botocore.config import Config
 from botocore.exceptions import NoCredentialsError
 from fastapi import APIRouter, Header, HTTPException, Path, Query, Request
 from fastapi.encoders import jsonable_encoder
@@ -17,7 +20,7 @@ from fastapi_versioning import version
 
 from src.config import AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY, BUCKET_NAME
 from src.config import LIMITER as limiter
-from src.config import RATE_LIMIT_PER_MIN
+from src.config import RATE_LIMIT_PER_MIN, S3_API_MAX_THREADS
 
 router = APIRouter(prefix="/s3", tags=["S3"])
 
@@ -28,8 +31,20 @@ s3 = session.client(
     aws_access_key_id=AWS_ACCESS_KEY_ID,
     aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
     region_name=AWS_REGION,
+    config=Config(max_pool_connections=S3_API_MAX_THREADS),
 )
 paginator = s3.get_paginator("list_objects_v2")
+s3_limiter = None
+
+
+async def run_s3(func, *args, **kwargs):
+    """Runs blocking boto3 call on worker thread so that event loop keeps serving other requests , at most S3_API_MAX_THREADS calls run at once"""
+    global s3_limiter
+    if s3_limiter is None:  # limiter can only be created inside event loop
+        s3_limiter = anyio.CapacityLimiter(S3_API_MAX_THREADS)
+    return await anyio.to_thread.run_sync(
+        partial(func, *args, **kwargs), limiter=s3_limiter
+    )
 
 
 @router.get("/files/")
@@ -48,13 +63,14 @@ async def list_s3_files(
 
     try:
         # Use list_objects_v2 directly for pagination
-        page_iterator = paginator.paginate(Bucket=bucket_name, Prefix=prefix)
+        page_iterator = iter(paginator.paginate(Bucket=bucket_name, Prefix=prefix))
 
         async def generate():
             first_item = True
             yield "["
 
-            for response in page_iterator:
+            # each page is fetched on worker thread
+            while (response := await run_s3(next, page_iterator, None)) is not None:
                 contents = response.get("Contents", [])
 
                 for item in contents:
@@ -86,7 +102,7 @@ async def list_s3_files(
 async def check_object_existence(bucket_name, file_path):
     """Async function to check object existence"""
     try:
-        s3.head_object(Bucket=bucket_name, Key=file_path)
+        await run_s3(s3.head_object, Bucket=bucket_name, Key=file_path)
     except NoCredentialsError:
         raise HTTPException(status_code=500, detail="AWS credentials not available")
     except Exception as e:
@@ -97,9 +113,13 @@ async def check_object_existence(bucket_name, file_path):
 
 async def read_meta_json(bucket_name, file_path):
     """Async function to read from meta json"""
-    try:
+
+    def get_meta_json():
         response = s3.get_object(Bucket=bucket_name, Key=file_path)
-        content = json.loads(response["Body"].read())
+        return json.loads(response["Body"].read())
+
+    try:
+        content = await run_s3(get_meta_json)
         return content
     except Exception as e:
         raise HTTPException(
@@ -117,7 +137,9 @@ async def head_s3_file(
     bucket_name = BUCKET_NAME
     encoded_file_path = quote(file_path.strip("/"))
     try:
-        response = s3.head_object(Bucket=bucket_name, Key=encoded_file_path)
+        response = await run_s3(
+            s3.head_object, Bucket=bucket_name, Key=encoded_file_path
+        )
         return Response(
             status_code=200,
             headers={
@@ -162,7 +184,7 @@ async def get_s3_file(
         content = await read_meta_json(bucket_name, file_path)
         return JSONResponse(content=jsonable_encoder(content))
 
-    # If not reading meta.json, generate a presigned URL
+    # If not reading meta.json, generate a presigned URL , it is only signed locally without any call to s3
     presigned_url = s3.generate_presigned_url(
         "get_object",
         Params={"Bucket": bucket_name, "Key": encoded_file_path},
@@ -10,7 +10,13 @@ from fastapi.responses import JSONResponse
 from fastapi_versioning import version
 
 # Reader imports
-from src.config import CELERY_BROKER_URL, DEFAULT_QUEUE_NAME, ONDEMAND_QUEUE_NAME
+from src.config import (
+    CELERY_BROKER_URL,
+    DEFAULT_QUEUE_NAME,
+    ENABLE_QUEUE_ROUTING,
+    EXPRESS_QUEUE_NAME,
+    ONDEMAND_QUEUE_NAME,
+)
 from src.validation.models import SnapshotTaskResponse
 
 from .api_worker import celery
@@ -160,6 +166,8 @@ def discard_all_waiting_tasks(user: AuthUser = Depends(admin_required)):
 
 
 queues = [DEFAULT_QUEUE_NAME, ONDEMAND_QUEUE_NAME]
+if ENABLE_QUEUE_ROUTING:
+    queues.append(EXPRESS_QUEUE_NAME)
 
 
 @router.get("/queue/")
@@ -274,3 +274,5 @@ INSERT INTO public.countries (cid,"name",iso3,geometry) VALUES
 	 (135,'Yemen','YEM','SRID=4326;MULTIPOLYGON (((52.17181 11.36768, 51.62645 12.54865, 51.41288 12.5236, 50.78018 14.04288, 45.53879 11.8347, 44.74279 11.74135, 43.52929 12.42791, 42.89039 13.13353, 41.68217 14.81248, 41.06894 16.40953, 42.90788 16.43205, 42.93286 16.52594, 43.08744 16.56633, 43.11795 16.69759, 43.17949 16.70109, 43.21343 16.77812, 43.10904 16.89027, 43.16476 17.05839, 43.12541 17.11789, 43.1771 17.28086, 43.25973 17.32558, 43.20029 17.36933, 43.21281 17.49787, 43.34644 17.58861, 43.49251 17.57838, 43.69442 17.40523, 43.84977 17.37359, 43.94664 17.37114, 44.00735 17.43545, 44.10863 17.41538, 44.38414 17.46884, 45.21274 17.46731, 45.4164 17.36559, 46.10206 17.28399, 46.36879 17.26784, 46.7573 17.31598, 47.01754 16.98862, 47.16492 16.98425, 47.43812 17.14151, 47.57523 17.47342, 48.15458 18.18528, 49.0992 18.646, 50.77742 18.81689, 52.00886 19.03189, 52.80359 17.32035, 55.51167 12.03969, 52.17181 11.36768)))'),
 	 (184,'Zambia','ZMB','SRID=4326;MULTIPOLYGON (((27.03782 -17.97885, 26.69128 -18.08777, 26.22677 -17.91798, 26.09734 -17.98428, 25.97116 -18.01204, 25.91194 -18.00077, 25.85578 -17.9772, 25.84388 -17.94318, 25.84555 -17.92856, 25.85169 -17.92758, 25.84418 -17.90463, 25.81959 -17.9023, 25.78731 -17.86979, 25.76517 -17.85427, 25.70766 -17.84561, 25.69376 -17.83515, 25.68415 -17.81374, 25.64827 -17.8376, 25.52193 -17.86963, 25.38305 -17.85852, 25.33276 -17.84365, 25.25911 -17.79233, 25.19234 -17.77484, 25.08762 -17.70846, 25.01896 -17.61556, 24.83734 -17.53144, 24.79649 -17.5429, 24.73263 -17.51671, 24.56338 -17.54553, 24.3996 -17.47971, 24.32459 -17.49575, 24.29882 -17.48764, 24.27981 -17.48787, 24.27034 -17.49493, 24.25439 -17.48858, 24.2435 -17.47931, 23.42663 -17.64337, 23.22578 -17.55305, 22.78908 -17.17294, 22.11204 -16.49469, 22.08097 -16.32492, 21.98982 -16.2094, 21.99188 -12.99251, 22.71629 -12.99251, 24.0374 -12.99318, 23.87947 -12.84728, 23.91449 -12.53445, 24.03946 -12.3789, 23.95843 -12.18567, 23.9241 -11.65493, 24.03394 -11.38937, 23.97903 -11.12316, 23.96667 -10.88051, 24.09164 -10.85354, 24.41849 -11.08677, 24.42123 -11.40061, 24.83871 -11.24576, 25.37292 -11.16628, 25.34546 -11.56614, 25.88791 -11.79342, 26.46057 -11.90296, 26.88217 -11.96141, 27.01675 -11.59238, 27.21245 -11.5574, 27.24095 -11.68387, 27.22776 -11.75281, 27.23397 -11.77616, 27.34359 -11.82947, 27.39945 -11.8691, 27.46307 -11.92547, 27.47449 -11.9379, 27.51251 -12.08834, 27.61911 -12.22125, 27.63903 -12.26973, 27.72786 -12.27887, 27.7797 -12.26537, 27.79979 -12.26159, 27.81283 -12.25027, 27.80871 -12.22242, 27.81232 -12.21907, 27.93188 -12.23936, 27.96467 -12.31518, 28.19092 -12.37488, 28.3243 -12.41822, 28.34104 -12.43021, 28.3461 -12.43985, 28.3588 -12.44504, 28.4539 -12.51032, 28.55141 -12.62761, 28.50265 -12.71671, 28.56583 -12.8667, 28.64754 -12.79372, 28.83362 -12.9798, 28.9373 -13.22524, 29.18243 -13.39029, 29.57382 -13.19048, 29.68369 -13.21856, 29.80316 -13.4317, 29.79904 -12.16353, 29.52404 -12.44093, 29.48044 -12.46775, 29.3129 -12.42417, 29.11892 -12.40104, 29.03412 -12.39433, 28.94588 -12.21521, 28.8604 -12.1491, 28.77251 -12.0504, 28.73817 -11.98484, 28.70899 -11.99802, 28.48789 -11.88482, 28.43193 -11.82468, 28.37631 -11.58935, 28.38936 -11.47397, 28.41923 -11.38984, 28.46832 -11.10126, 28.54179 -10.84005, 28.60393 -10.72201, 28.62453 -10.51988, 28.62514 -10.40804, 28.62131 -10.39578, 28.61604 -10.36271, 28.62659 -10.31323, 28.56837 -10.2263, 28.63843 -9.796416, 28.3482 -9.258865, 28.85151 -8.705905, 28.93215 -8.532812, 29.00013 -8.452336, 29.0839 -8.444865, 29.5709 -8.37643, 29.63562 -8.412262, 29.65794 -8.373203, 29.69948 -8.361654, 30.43419 -8.265854, 30.788 -8.239483, 31.09388 -8.580854, 31.21465 -8.579903, 31.37764 -8.584076, 31.54758 -8.680475, 31.59222 -8.724593, 31.58707 -8.796868, 31.69247 -8.906101, 31.80542 -8.869468, 31.94893 -8.931539, 32.16866 -9.060736, 32.2562 -9.126165, 32.43164 -9.115826, 32.47541 -9.137351, 32.49615 -9.150913, 32.54219 -9.249531, 32.58322 -9.241737, 32.61927 -9.254953, 32.64836 -9.272904, 32.71703 -9.275199, 32.75729 -9.284274, 32.76647 -9.3217, 32.79101 -9.320938, 32.80651 -9.331472, 32.89822 -9.362014, 32.9607 -9.400629, 32.95212 -9.453125, 33.02593 -9.505275, 33.00327 -9.619029, 33.05855 -9.608874, 33.1097 -9.5801, 33.20549 -9.59601, 33.23193 -9.627491, 33.24436 -9.670712, 33.24785 -9.701684, 33.3058 -9.788391, 33.37283 -9.818664, 33.39672 -9.914744, 33.36376 -9.959044, 33.32909 -10.05202, 33.41972 -10.09326, 33.56113 -10.21087, 33.56667 -10.24128, 33.56907 -10.38415, 33.64082 -10.4581, 33.67893 -10.52224, 33.71773 -10.57321, 33.68751 -10.60932, 33.51723 -10.77867, 33.46641 -10.80801, 33.28346 -10.87985, 33.31192 -10.93849, 33.37612 -11.11272, 33.4108 -11.15381, 33.38436 -11.23767, 33.29269 -11.44133, 33.25115 -11.587, 33.29887 -11.58565, 33.33733 -11.60079, 33.35552 -11.92614, 33.33801 -11.98761, 33.26488 -12.13936, 33.31398 -12.18534, 33.3823 -12.33765, 33.47328 -12.31652, 33.53817 -12.33765, 33.56038 -12.3549, 33.53302 -12.3893, 33.37784 -12.56059, 33.0732 -12.71798, 33.0146 -13.20853, 32.92534 -13.40365, 32.89684 -13.46175, 32.85015 -13.53086, 32.75986 -13.57792, 32.67609 -13.60228, 32.80386 -13.64646, 32.85015 -13.7132, 32.84603 -13.72421, 32.78063 -13.7704, 32.87882 -13.80341, 32.9058 -13.81738, 33.00156 -13.9394, 33.00293 -14.00953, 33.0328 -14.03834, 33.05512 -14.02285, 33.06078 -13.99354, 33.07503 -13.97305, 33.1485 -13.93207, 33.18867 -13.95439, 33.24943 -14.00062, 33.19965 -14.01511, 32.96637 -14.09479, 32.66819 -14.19783, 32.45173 -14.28751, 32.25294 -14.32477, 32.05956 -14.39145, 31.48235 -14.62179, 30.39059 -14.96435, 30.23197 -15.0078, 30.40089 -15.37756, 30.40827 -15.48114, 30.37308 -15.54863, 30.40707 -15.58385, 30.41634 -15.61031, 30.42835 -15.62304, 30.39745 -15.6475, 30.35385 -15.66106, 30.20039 -15.67461, 30.16434 -15.62667, 29.96624 -15.64982, 29.82513 -15.61675, 29.63459 -15.67428, 29.5752 -15.65577, 29.4849 -15.69841, 29.44473 -15.6875, 29.36062 -15.7222, 29.2983 -15.75822, 29.14621 -15.83635, 29.04133 -15.93162, 29.01249 -15.95357, 28.95086 -15.94928, 28.89267 -15.99532, 28.88649 -16.02222, 28.85284 -16.04499, 28.8743 -16.09827, 28.87087 -16.12977, 28.86538 -16.245, 28.83362 -16.29872, 28.84684 -16.32936, 28.8549 -16.37301, 28.84289 -16.40892, 28.82924 -16.4751, 28.80538 -16.49889, 28.76349 -16.52358, 28.74736 -16.55295, 28.1765 -16.8006, 28.14628 -16.83083, 27.84832 -16.97211, 27.63542 -17.33753, 27.56332 -17.42861, 27.31724 -17.60873, 27.17201 -17.79365, 27.16084 -17.84682, 27.03782 -17.97885)))'),
 	 (190,'Zimbabwe','ZWE','SRID=4326;MULTIPOLYGON (((29.03719 -21.82129, 28.85463 -21.77769, 28.57862 -21.65943, 28.49514 -21.69104, 28.36167 -21.62958, 28.19093 -21.6257, 28.01474 -21.57802, 27.9667 -21.51898, 27.91726 -21.37245, 27.91431 -21.32942, 27.90101 -21.30241, 27.88216 -21.2907, 27.7965 -21.1829, 27.7567 -21.16662, 27.68044 -21.08062, 27.70316 -20.52995, 27.47566 -20.47715, 27.27819 -20.51999, 27.27903 -20.31987, 27.23321 -20.12539, 27.19252 -20.08404, 27.13973 -20.08248, 27.03867 -20.03505, 26.71687 -19.96122, 26.15258 -19.56169, 26.04894 -19.28467, 25.94274 -19.11677, 25.80542 -18.84827, 25.76277 -18.64264, 25.68902 -18.58859, 25.51512 -18.38373, 25.40098 -18.15321, 25.30923 -18.09015, 25.2229 -17.90997, 25.24514 -17.77642, 25.51271 -17.83747, 25.69392 -17.7873, 25.87795 -17.89492, 25.88624 -17.95337, 25.96575 -17.97424, 26.06805 -17.95601, 26.07816 -17.91334, 26.22582 -17.86142, 26.25641 -17.89266, 26.57632 -17.96864, 26.82823 -17.96909, 27.0308 -17.93201, 27.29587 -17.58133, 27.54193 -17.39289, 27.59731 -17.3208, 27.61207 -17.23044, 27.81509 -16.9453, 28.1191 -16.80571, 28.26201 -16.69497, 28.72163 -16.53154, 28.79235 -16.47409, 28.82247 -16.37762, 28.79743 -16.30974, 28.82587 -16.25289, 28.81593 -16.16443, 28.84371 -16.10903, 28.82366 -16.04098, 28.90509 -15.92151, 29.00903 -15.91796, 29.20445 -15.75084, 29.40669 -15.66508, 29.81272 -15.58707, 29.97648 -15.61931, 30.15951 -15.5948, 30.21679 -15.63608, 30.25664 -15.60467, 30.35136 -15.6293, 30.42702 -15.60064, 30.44915 -15.62983, 30.44859 -15.97401, 31.2863 -15.98346, 31.4558 -16.13293, 31.67216 -16.16728, 31.91479 -16.32457, 31.93717 -16.39367, 32.34715 -16.42531, 32.7168 -16.57703, 32.73271 -16.66828, 32.9943 -16.68927, 33.00189 -16.7403, 32.93487 -16.90231, 32.8756 -16.93852, 33.00796 -17.16842, 33.02244 -17.2927, 33.07576 -17.33957, 33.07754 -17.60471, 32.97165 -18.02001, 33.02095 -18.16856, 33.02452 -18.28951, 33.07848 -18.36503, 33.03368 -18.48748, 32.97802 -18.69359, 32.94646 -18.78115, 32.90248 -18.81704, 32.8277 -18.80275, 32.73358 -18.84804, 32.75848 -18.9304, 32.73011 -18.95893, 32.74215 -19.00037, 32.86101 -19.00827, 32.89981 -19.09233, 32.87405 -19.29381, 32.863 -19.46173, 32.88139 -19.54149, 32.97846 -19.63337, 32.99361 -19.71708, 33.08541 -19.78481, 33.03243 -20.02848, 32.94258 -20.06815, 32.93225 -20.13449, 32.8862 -20.13847, 32.88471 -20.29757, 32.68772 -20.56878, 32.57017 -20.58726, 32.51317 -20.63346, 32.54031 -20.91607, 32.3988 -21.13069, 32.49672 -21.34429, 32.42022 -21.33963, 31.59244 -22.19782, 31.30962 -22.44725, 31.1625 -22.35427, 31.07989 -22.37145, 30.90752 -22.32244, 30.28201 -22.37808, 30.21998 -22.32108, 30.11341 -22.33067, 29.99663 -22.25194, 29.76271 -22.16566, 29.65223 -22.15382, 29.53028 -22.20106, 29.3615 -22.21595, 29.24549 -22.0904, 29.13328 -22.09518, 29.03372 -22.03539, 28.99666 -21.91572, 29.03719 -21.82129)))');
+
+DO $$ BEGIN EXECUTE format('COMMENT ON TABLE public.countries IS %L', 'loaded at ' || clock_timestamp()); END $$;
@@ -0,0 +1,32 @@
+-- # Copyright (C) 2021 Humanitarian OpenStreetmap Team
+
+-- # This program is free software: you can redistribute it and/or modify
+-- # it under the terms of the GNU Affero General Public License as
+-- # published by the Free Software Foundation, either version 3 of the
+-- # License, or (at your option) any later version.
+
+-- # This program is distributed in the hope that it will be useful,
+-- # but WITHOUT ANY WARRANTY; without even the implied warranty of
+-- # MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+-- # GNU Affero General Public License for more details.
+
+-- # You should have received a copy of the GNU Affero General Public License
+-- # along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+-- # Humanitarian OpenStreetmap Team
+-- # 1100 13th Street NW Suite 800 Washington, D.C. 20005
+-- # <info@hotosm.org>
+
+-- Optional gin indexes on tags , Tag filters are compiled to containment (tags @> '{"key":"value"}') and existence (tags ? 'key' , tags ?| array['key']) predicates which can be served by these indexes
+-- Default jsonb_ops operator class is used since it supports both containment and existence , jsonb_path_ops is smaller but supports containment only
+-- Indexes are built concurrently so that they can be added on running database with replication , Takes long time and considerable disk on planet size tables
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS nodes_tags_idx ON public.nodes USING gin (tags);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ways_line_tags_idx ON public.ways_line USING gin (tags);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ways_poly_tags_idx ON public.ways_poly USING gin (tags);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS relations_tags_idx ON public.relations USING gin (tags);
+
+ANALYZE nodes;
+ANALYZE ways_line;
+ANALYZE ways_poly;
+ANALYZE relations;
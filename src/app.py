@@ -19,17 +19,24 @@
 """Page contains Main core logic of app"""
 # Standard library imports
 import concurrent.futures
+import fcntl
+import hashlib
 import json
 import os
 import pathlib
 import re
 import shutil
+import signal
+import struct
 import subprocess
 import sys
+import threading
 import time
 import uuid
-from collections import namedtuple
+import zlib
+from collections import OrderedDict, namedtuple
 from datetime import datetime, timedelta, timezone
+from functools import partial
 from json import dumps
 from json import loads as json_loads
 
@@ -38,8 +45,11 @@ import boto3
 import humanize
 import orjson
 import psycopg2.extras
+import redis
 import requests
 from area import area
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config as BotoConfig
 from fastapi import HTTPException
 from geojson import FeatureCollection
 from psycopg2 import OperationalError, connect, sql
@@ -52,26 +62,56 @@ from src.config import (
     AWS_ACCESS_KEY_ID,
     AWS_SECRET_ACCESS_KEY,
     BUCKET_NAME,
+    CELERY_BROKER_URL,
+    CHUNKED_EXTRACTION_GRID_SIZE,
+    CHUNKED_EXTRACTION_MAX_VERTICES,
+    CHUNKED_EXTRACTION_MIN_AREA_SQKM,
+    COUNTRIES_CACHE_MAX_ENTRIES,
+    COUNTRIES_CACHE_VERSION_CHECK_INTERVAL,
+    CUSTOM_EXPORT_CPU_SLOTS,
+    CUSTOM_EXPORT_PG_CONNECTIONS,
+    CUSTOM_EXPORT_SUBPROCESSES,
+    DEFAULT_QUEUE_NAME,
     DEFAULT_README_TEXT,
+    ENABLE_CHUNKED_EXTRACTION,
+    ENABLE_CUSTOM_EXPORT_SCHEDULER,
     ENABLE_CUSTOM_EXPORTS,
     ENABLE_HDX_EXPORTS,
     ENABLE_POLYGON_STATISTICS_ENDPOINTS,
     ENABLE_SOZIP,
     ENABLE_TILES,
+    EXPORT_CACHE_MAX_DISK_SIZE,
+    EXPORT_CACHE_TTL,
     EXPORT_MAX_AREA_SQKM,
 )
 from src.config import EXPORT_PATH as export_path
+from src.config import (
+    EXPRESS_QUEUE_MAX_COST,
+    EXPRESS_QUEUE_NAME,
+    GEOPARQUET_COMPRESSION,
+    GEOPARQUET_ROW_GROUP_SIZE,
+)
 from src.config import INDEX_THRESHOLD as index_threshold
 from src.config import (
     MAX_WORKERS,
     PARALLEL_PROCESSING_CATEGORIES,
+    PARALLEL_TABLE_EXTRACTION,
     POLYGON_STATISTICS_API_URL,
     PROCESS_SINGLE_CATEGORY_IN_POSTGRES,
+    S3_BATCH_UPLOAD_WORKERS,
+    S3_MAX_CONCURRENCY,
+    S3_MULTIPART_PART_SIZE,
+    S3_MULTIPART_THRESHOLD,
+    S3_UPLOAD_PART_RETRIES,
+    S3_UPLOAD_WORKERS,
 )
 from src.config import USE_CONNECTION_POOLING as use_connection_pooling
 from src.config import (
     USE_DUCK_DB_FOR_CUSTOM_EXPORTS,
+    USE_NATIVE_WRITERS,
     USE_S3_TO_UPLOAD,
+    ZIP_COMPRESSION_LEVEL,
+    ZIP_WORKERS,
     get_db_connection_params,
     level,
 )
@@ -79,19 +119,33 @@ from src.config import logger as logging
 from src.query_builder.builder import (
     HDX_FILTER_CRITERIA,
     HDX_MARKDOWN,
+    OSM_ID_TYPE_TABLES,
     check_exisiting_country,
     check_last_updated_rawdata,
+    estimate_export_cost,
     extract_features_custom_exports,
     extract_geometry_type_query,
     generate_polygon_stats_graphql_query,
+    get_chunked_geometry_query,
     get_countries_query,
+    get_countries_version_query,
     get_country_from_iso,
     get_country_geom_from_iso,
+    get_country_selectivity_query,
+    get_explain_query,
     get_osm_feature_query,
+    get_osm_features_query,
+    get_osm_id_bounds_query,
+    get_table_name_from_query,
+    get_user_query,
     postgres2duckdb_query,
     raw_currentdata_extraction_query,
 )
-from src.validation.models import EXPORT_TYPE_MAPPING, RawDataOutputType
+from src.validation.models import (
+    ARCHIVE_COMPRESS_LEVELS,
+    EXPORT_TYPE_MAPPING,
+    RawDataOutputType,
+)
 
 if ENABLE_SOZIP:
     # Third party imports
@@ -115,7 +169,21 @@ if ENABLE_CUSTOM_EXPORTS:
         import duckdb
 
         # Reader imports
-        from src.config import DUCK_DB_MEMORY_LIMIT, DUCK_DB_THREAD_LIMIT
+        from src.config import (
+            DUCK_DB_MEMORY_LIMIT,
+            DUCK_DB_SNAPSHOT_CACHE_DIR,
+            DUCK_DB_SNAPSHOT_CACHE_MAX_DISK_SIZE,
+            DUCK_DB_THREAD_LIMIT,
+            DUCK_DB_TRANSFER_PARTITIONS,
+            DUCK_DB_TRANSFER_WORKERS,
+            ENABLE_DUCK_DB_SNAPSHOT_CACHE,
+        )
+
+if USE_NATIVE_WRITERS:
+    # Third party imports
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    from osgeo import ogr, osr
 
 if ENABLE_HDX_EXPORTS:
     # Third party imports
@@ -210,23 +278,252 @@ def generate_ogr2ogr_cmd_from_psql(
     return ogr2ogr_cmd
 
 
-def run_ogr2ogr_cmd(cmd):
+def generate_ogr2ogr_cmd_from_file(
+    export_file_path,
+    export_file_format_driver,
+    source_file_path,
+    layer_creation_options,
+):
+    """
+    Generates ogr2ogr command converting already exported file to other format
+    """
+    return """ogr2ogr -overwrite -f "{export_format}" {export_path} {source_path} {layer_creation_options_str} -progress""".format(
+        export_format=export_file_format_driver,
+        export_path=export_file_path,
+        source_path=source_file_path,
+        layer_creation_options_str=(
+            f"-lco {layer_creation_options}" if layer_creation_options else ""
+        ),
+    )
+
+
+def run_ogr2ogr_cmd(cmd, cancel_event=None):
     """Runs command and monitors the file size until the process runs
 
     Args:
         cmd (_type_): Command to run for subprocess
-        binding_file_dir (_type_): _description_
+        cancel_event (threading.Event, optional): Kills the process group when it is set , Used when commands run concurrently
 
     Raises:
         Exception: If process gets failed
     """
-    try:
-        subprocess.check_output(
-            cmd, env=os.environ, shell=True, preexec_fn=os.setsid, timeout=60 * 60 * 6
+    timeout = 60 * 60 * 6
+    if cancel_event is None:
+        try:
+            subprocess.check_output(
+                cmd, env=os.environ, shell=True, preexec_fn=os.setsid, timeout=timeout
+            )
+        except subprocess.CalledProcessError as ex:
+            logging.error(ex.output)
+            raise ex
+        return
+
+    process = subprocess.Popen(
+        cmd,
+        env=os.environ,
+        shell=True,
+        preexec_fn=os.setsid,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+    )
+    started_at = time.time()
+    while True:
+        try:
+            output, _ = process.communicate(timeout=1)
+            break
+        except subprocess.TimeoutExpired:
+            if cancel_event.is_set() or time.time() - started_at > timeout:
+                os.killpg(process.pid, signal.SIGKILL)
+                process.communicate()
+                if cancel_event.is_set():
+                    raise subprocess.SubprocessError("ogr2ogr cancelled")
+                raise subprocess.TimeoutExpired(cmd, timeout)
+    if process.returncode != 0:
+        logging.error(output)
+        raise subprocess.CalledProcessError(process.returncode, cmd, output)
+
+
+# postgres type oids which are not written as string by native writers
+PG_INTEGER_OIDS = (21, 23)
+PG_BIGINT_OIDS = (20,)
+PG_FLOAT_OIDS = (700, 701, 1700)
+PG_BOOLEAN_OIDS = (16,)
+PG_TIMESTAMP_OIDS = (1114, 1184)
+PG_JSON_OIDS = (114, 3802)
+
+
+def ewkb_to_wkb(geom):
+    """Converts postgis hex ewkb to wkb by dropping embedded srid
+
+    Args:
+        geom (str): hex encoded ewkb as returned by psycopg2 for geometry column
+
+    Returns:
+        bytes: wkb
+    """
+    ewkb = bytes.fromhex(geom)
+    byteorder = "little" if ewkb[0] == 1 else "big"
+    geom_type = int.from_bytes(ewkb[1:5], byteorder)
+    if geom_type & 0x20000000:
+        return (
+            ewkb[:1]
+            + (geom_type & ~0x20000000).to_bytes(4, byteorder)
+            + ewkb[9:]  # skip 4 byte srid
         )
-    except subprocess.CalledProcessError as ex:
-        logging.error(ex.output)
-        raise ex
+    return ewkb
+
+
+def native_field_value(value, type_code):
+    """Converts value fetched from postgres to value supported by native writers"""
+    if value is None:
+        return None
+    if type_code in PG_JSON_OIDS:
+        return dumps(value)
+    if type_code in PG_FLOAT_OIDS:
+        return float(value)
+    if (
+        type_code
+        in PG_INTEGER_OIDS + PG_BIGINT_OIDS + PG_BOOLEAN_OIDS + PG_TIMESTAMP_OIDS
+    ):
+        return value
+    return str(value)
+
+
+def write_geoparquet(cursor, dump_temp_path, row_group_size, compression):
+    """Streams rows of executed server side cursor to geoparquet , Each fetch of row_group_size rows is written as single row group so memory stays bounded
+
+    Args:
+        cursor : server side cursor with geom column
+        dump_temp_path (str): path of parquet file
+        row_group_size (int): rows per row group
+        compression (str): parquet compression codec
+
+    Returns:
+        int: number of rows written
+    """
+    rows = cursor.fetchmany(row_group_size)
+    columns = [(col.name, col.type_code) for col in cursor.description]
+    fields = []
+    for name, type_code in columns:
+        if name == "geom":
+            fields.append(pa.field("geometry", pa.binary()))
+        elif type_code in PG_INTEGER_OIDS:
+            fields.append(pa.field(name, pa.int32()))
+        elif type_code in PG_BIGINT_OIDS:
+            fields.append(pa.field(name, pa.int64()))
+        elif type_code in PG_FLOAT_OIDS:
+            fields.append(pa.field(name, pa.float64()))
+        elif type_code in PG_BOOLEAN_OIDS:
+            fields.append(pa.field(name, pa.bool_()))
+        elif type_code in PG_TIMESTAMP_OIDS:
+            fields.append(
+                pa.field(
+                    name,
+                    pa.timestamp("us", tz="UTC" if type_code == 1184 else None),
+                )
+            )
+        else:
+            fields.append(pa.field(name, pa.string()))
+    geo_metadata = {
+        "version": "1.0.0",
+        "primary_column": "geometry",
+        "columns": {"geometry": {"encoding": "WKB", "geometry_types": []}},
+    }
+    schema = pa.schema(fields, metadata={"geo": dumps(geo_metadata)})
+    row_count = 0
+    with pq.ParquetWriter(
+        dump_temp_path, schema, compression=compression
+    ) as parquet_writer:
+        while rows:
+            arrays = []
+            for index, (name, type_code) in enumerate(columns):
+                if name == "geom":
+                    values = [
+                        ewkb_to_wkb(row[index]) if row[index] else None for row in rows
+                    ]
+                else:
+                    values = [native_field_value(row[index], type_code) for row in rows]
+                arrays.append(pa.array(values, type=schema.field(index).type))
+            parquet_writer.write_batch(
+                pa.RecordBatch.from_arrays(arrays, schema=schema),
+                row_group_size=row_group_size,
+            )
+            row_count += len(rows)
+            rows = cursor.fetchmany(row_group_size)
+    return row_count
+
+
+def write_flatgeobuf(cursor, dump_temp_path, layer_name, wrap_geoms=False):
+    """Streams rows of executed server side cursor to flatgeobuf with packed hilbert r-tree spatial index
+
+    Args:
+        cursor : server side cursor with geom column
+        dump_temp_path (str): path of fgb file
+        layer_name (str): name of layer
+        wrap_geoms (bool, optional): Wraps geometries to geometrycollection. Defaults to False.
+
+    Returns:
+        int: number of rows written
+    """
+    rows = cursor.fetchmany(cursor.itersize)
+    columns = [(col.name, col.type_code) for col in cursor.description]
+    spatial_ref = osr.SpatialReference()
+    spatial_ref.ImportFromEPSG(4326)
+    spatial_ref.SetAxisMappingStrategy(osr.OAMS_TRADITIONAL_GIS_ORDER)
+    data_source = ogr.GetDriverByName("FlatGeobuf").CreateDataSource(dump_temp_path)
+    layer = data_source.CreateLayer(
+        layer_name,
+        spatial_ref,
+        ogr.wkbGeometryCollection if wrap_geoms else ogr.wkbUnknown,
+        ["SPATIAL_INDEX=YES", "VERIFY_BUFFERS=NO"],
+    )
+    for name, type_code in columns:
+        if name == "geom":
+            continue
+        if type_code in PG_INTEGER_OIDS:
+            field = ogr.FieldDefn(name, ogr.OFTInteger)
+        elif type_code in PG_BIGINT_OIDS:
+            field = ogr.FieldDefn(name, ogr.OFTInteger64)
+        elif type_code in PG_FLOAT_OIDS:
+            field = ogr.FieldDefn(name, ogr.OFTReal)
+        elif type_code in PG_BOOLEAN_OIDS:
+            field = ogr.FieldDefn(name, ogr.OFTInteger)
+            field.SetSubType(ogr.OFSTBoolean)
+        elif type_code in PG_TIMESTAMP_OIDS:
+            field = ogr.FieldDefn(name, ogr.OFTDateTime)
+        else:
+            field = ogr.FieldDefn(name, ogr.OFTString)
+            if type_code in PG_JSON_OIDS:
+                field.SetSubType(ogr.OFSTJSON)
+        layer.CreateField(field)
+    layer_defn = layer.GetLayerDefn()
+    row_count = 0
+    while rows:
+        for row in rows:
+            feature = ogr.Feature(layer_defn)
+            for index, (name, type_code) in enumerate(columns):
+                value = row[index]
+                if name == "geom":
+                    if value:
+                        geometry = ogr.CreateGeometryFromWkb(ewkb_to_wkb(value))
+                        if wrap_geoms:
+                            geometry = ogr.ForceTo(geometry, ogr.wkbGeometryCollection)
+                        feature.SetGeometryDirectly(geometry)
+                    continue
+                value = native_field_value(value, type_code)
+                if value is None:
+                    feature.SetFieldNull(name)
+                elif type_code in PG_TIMESTAMP_OIDS:
+                    feature.SetField(name, value.isoformat())
+                else:
+                    feature.SetField(name, value)
+            layer.CreateFeature(feature)
+            feature = None
+        row_count += len(rows)
+        rows = cursor.fetchmany(cursor.itersize)
+    layer = None
+    data_source = None  # flushes features and writes spatial index
+    return row_count
 
 
 class Database:
@@ -300,6 +597,456 @@ class Database:
             raise err
 
 
+def deflate_chunk(data, level, zdict=None, last=False):
+    """Raw deflates chunk of entry , Non last chunks are ended with sync flush so that compressed chunks can be concatenated to single deflate stream
+
+    Args:
+        data (bytes): chunk of entry
+        level (int): deflate level
+        zdict (bytes, optional): tail of previous chunk used as dictionary to keep compression ratio across chunks. Defaults to None.
+        last (bool, optional): whether chunk is last chunk of entry. Defaults to False.
+
+    Returns:
+        bytes: deflated chunk
+    """
+    if zdict:
+        compressor = zlib.compressobj(
+            level, zlib.DEFLATED, -zlib.MAX_WBITS, zdict=zdict
+        )
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush(
+        zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH
+    )
+
+
+def split_osm_id_range(min_id, max_id, partitions):
+    """Splits osm_id from min_id to max_id to given number of equal (start, end) ranges , end is exclusive. Gives no range for empty table"""
+    if min_id is None or max_id is None:
+        return []
+    end = max_id + 1
+    step = max(-(-(end - min_id) // max(partitions, 1)), 1)
+    return [(start, min(start + step, end)) for start in range(min_id, end, step)]
+
+
+def get_compress_level(file_name):
+    """Gives zip deflate level of export file from its suffix , 0 means file is stored without compression"""
+    level = ARCHIVE_COMPRESS_LEVELS.get(
+        pathlib.Path(file_name).suffix.lstrip(".").lower()
+    )
+    return ZIP_COMPRESSION_LEVEL if level is None else level
+
+
+def write_to_zip(zf, file_path, arcname=None):
+    """Adds file to zipfile.ZipFile or ParallelZipWriter with compression level of its format"""
+    level = get_compress_level(file_path)
+    zf.write(
+        file_path,
+        arcname=arcname,
+        compress_type=zipfile.ZIP_DEFLATED if level else zipfile.ZIP_STORED,
+        compresslevel=level or None,
+    )
+
+
+def log_archive_metrics(zip_path, infolist):
+    """Logs size and compression ratio achieved for each entry of archive so that ARCHIVE_COMPRESS_LEVELS can be tuned
+
+    Args:
+        zip_path (str): path of archive
+        infolist (list): zip infos of entries
+
+    Returns:
+        list: metrics of entries
+    """
+    metrics = []
+    for info in infolist:
+        ratio = round(info.compress_size / info.file_size, 4) if info.file_size else 1
+        metrics.append(
+            {
+                "name": info.filename,
+                "stored": info.compress_type == zipfile.ZIP_STORED,
+                "size": info.file_size,
+                "compressed_size": info.compress_size,
+                "ratio": ratio,
+            }
+        )
+        logging.info(
+            "Archive %s entry %s : %s -> %s ratio %s%s",
+            os.path.basename(str(zip_path)),
+            info.filename,
+            info.file_size,
+            info.compress_size,
+            ratio,
+            " (stored)" if info.compress_type == zipfile.ZIP_STORED else "",
+        )
+    return metrics
+
+
+def rechunk(chunks, size):
+    """Regroups iterable of bytes to chunks of given size , last chunk can be smaller"""
+    buffer = bytearray()
+    for chunk in chunks:
+        buffer += chunk
+        while len(buffer) >= size:
+            yield bytes(buffer[:size])
+            del buffer[:size]
+    if buffer:
+        yield bytes(buffer)
+
+
+class ParallelZipWriter:
+    """Writes deflated zip64 archive where chunks of every entry are compressed concurrently on thread pool
+
+    Chunks are deflated independently with the tail of previous chunk as dictionary and joined with sync flush like pigz does , So output is standard deflate which any unzip can read.
+    Only CHUNK_SIZE * workers * 2 bytes of input are held in memory at a time , Interface follows zipfile.ZipFile write , writestr , infolist and close
+    Archive can also be written to non seekable file object such as S3MultipartWriter , crc and sizes are then written as data descriptor after each entry instead of patching the local header
+    """
+
+    CHUNK_SIZE = 8 * 1024 * 1024
+    DICT_SIZE = 32 * 1024
+    ZIP64_LIMIT = (1 << 31) - 1
+
+    def __init__(
+        self,
+        zip_path,
+        level=ZIP_COMPRESSION_LEVEL,
+        workers=ZIP_WORKERS,
+        force_zip64=False,
+    ):
+        self.owns_fp = not hasattr(zip_path, "write")
+        self.fp = open(zip_path, "wb") if self.owns_fp else zip_path
+        self.streaming = not (self.owns_fp or self.fp.seekable())
+        self.offset = 0
+        self.level = level
+        self.workers = max(int(workers), 1)
+        self.force_zip64 = force_zip64
+        self.entries = []
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.workers)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+    def infolist(self):
+        """Gives zip infos of written entries"""
+        return list(self.entries)
+
+    def write_bytes(self, data):
+        self.fp.write(data)
+        self.offset += len(data)
+        return len(data)
+
+    def write(
+        self,
+        file_path,
+        arcname=None,
+        compress_type=zipfile.ZIP_DEFLATED,
+        compresslevel=None,
+    ):
+        """Adds file to archive , ZIP_STORED compress_type stores the file without compression"""
+        if compress_type == zipfile.ZIP_STORED:
+            compresslevel = 0
+        file_path = str(file_path)
+        with open(file_path, "rb") as f:
+            self.write_entry(
+                arcname or os.path.basename(file_path),
+                iter(lambda: f.read(self.CHUNK_SIZE), b""),
+                os.path.getmtime(file_path),
+                compresslevel,
+                file_size=os.path.getsize(file_path),
+            )
+
+    def writestr(self, arcname, data, compresslevel=None):
+        """Adds str or bytes content to archive"""
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        self.write_entry(arcname, [data], time.time(), compresslevel, len(data))
+
+    def write_iter(self, arcname, chunks, compresslevel=None):
+        """Adds entry from iterable of bytes whose total size is not known upfront such as streamed query result"""
+        self.write_entry(arcname, chunks, time.time(), compresslevel)
+
+    def write_entry(self, arcname, chunks, mtime, compresslevel=None, file_size=None):
+        """Writes local header , concurrently deflated chunks in order and crc with sizes afterwards"""
+        level = self.level if compresslevel is None else compresslevel
+        zinfo = zipfile.ZipInfo(arcname, time.localtime(max(mtime, 315532800))[:6])
+        zinfo.compress_type = zipfile.ZIP_DEFLATED if level else zipfile.ZIP_STORED
+        zinfo.flag_bits = 0x800 | (0x08 if self.streaming else 0)
+        zinfo.header_offset = self.offset
+        name = arcname.encode("utf-8")
+        zip64 = (
+            self.force_zip64 or file_size is None or file_size * 1.05 > self.ZIP64_LIMIT
+        )
+        extra = struct.pack("<HHQQ", 1, 16, 0, 0) if zip64 else b""
+        self.write_bytes(
+            struct.pack(
+                "<4s2B4HL2L2H",
+                b"PK\x03\x04",
+                45 if zip64 else 20,
+                0,
+                zinfo.flag_bits,
+                zinfo.compress_type,
+                *self.dos_datetime(zinfo.date_time),
+                0,
+                0xFFFFFFFF if zip64 else 0,
+                0xFFFFFFFF if zip64 else 0,
+                len(name),
+                len(extra),
+            )
+        )
+        self.write_bytes(name + extra)
+
+        crc, compress_size, size = 0, 0, 0
+        pending, zdict = [], None
+        chunks = rechunk(chunks, self.CHUNK_SIZE)
+        chunk = next(chunks, None)
+        while chunk is not None:
+            next_chunk = next(chunks, None)  # look ahead to know the last chunk
+            size += len(chunk)
+            crc = zlib.crc32(chunk, crc)
+            if not level:
+                compress_size += self.write_bytes(chunk)
+            else:
+                pending.append(
+                    self.executor.submit(
+                        deflate_chunk, chunk, level, zdict, next_chunk is None
+                    )
+                )
+                zdict = chunk[-self.DICT_SIZE :]
+                while len(pending) >= self.workers * 2:
+                    compress_size += self.write_bytes(pending.pop(0).result())
+            chunk = next_chunk
+        if level and size == 0:
+            pending.append(self.executor.submit(deflate_chunk, b"", level, None, True))
+        for future in pending:
+            compress_size += self.write_bytes(future.result())
+
+        if self.streaming:
+            self.write_bytes(
+                struct.pack("<4sLQQ", b"PK\x07\x08", crc, compress_size, size)
+                if zip64
+                else struct.pack("<4s3L", b"PK\x07\x08", crc, compress_size, size)
+            )
+        else:
+            self.fp.seek(zinfo.header_offset + 14)
+            if zip64:
+                self.fp.write(struct.pack("<L", crc))
+                self.fp.seek(zinfo.header_offset + 30 + len(name) + 4)
+                self.fp.write(struct.pack("<QQ", size, compress_size))
+            else:
+                self.fp.write(struct.pack("<LLL", crc, compress_size, size))
+            self.fp.seek(self.offset)
+        zinfo.CRC, zinfo.compress_size, zinfo.file_size = crc, compress_size, size
+        self.entries.append(zinfo)
+
+    @staticmethod
+    def dos_datetime(date_time):
+        """Converts date time tuple to dos time and date of zip headers"""
+        year, month, day, hour, minute, second = date_time
+        return (
+            (hour << 11) | (minute << 5) | (second // 2),
+            ((year - 1980) << 9) | (month << 5) | day,
+        )
+
+    def close(self):
+        """Writes central directory and end records , zip64 records are added only when limits are exceeded"""
+        if self.fp is None:
+            return
+        self.executor.shutdown()
+        cd_offset = self.offset
+        for zinfo in self.entries:
+            name = zinfo.filename.encode("utf-8")
+            zip64 = (
+                self.force_zip64
+                or max(zinfo.compress_size, zinfo.file_size, zinfo.header_offset)
+                > self.ZIP64_LIMIT
+            )
+            extra = (
+                struct.pack(
+                    "<HHQQQ",
+                    1,
+                    24,
+                    zinfo.file_size,
+                    zinfo.compress_size,
+                    zinfo.header_offset,
+                )
+                if zip64
+                else b""
+            )
+            self.write_bytes(
+                struct.pack(
+                    "<4s4B4HL2L5H2L",
+                    b"PK\x01\x02",
+                    45 if zip64 else 20,
+                    3,
+                    45 if zip64 else 20,
+                    0,
+                    zinfo.flag_bits,
+                    zinfo.compress_type,
+                    *self.dos_datetime(zinfo.date_time),
+                    zinfo.CRC,
+                    0xFFFFFFFF if zip64 else zinfo.compress_size,
+                    0xFFFFFFFF if zip64 else zinfo.file_size,
+                    len(name),
+                    len(extra),
+                    0,
+                    0,
+                    0,
+                    0o100644 << 16,
+                    0xFFFFFFFF if zip64 else zinfo.header_offset,
+                )
+            )
+            self.write_bytes(name + extra)
+        cd_end = self.offset
+        cd_size = cd_end - cd_offset
+        count = len(self.entries)
+        if (
+            self.force_zip64
+            or count > 0xFFFF
+            or max(cd_offset, cd_size) > self.ZIP64_LIMIT
+        ):
+            self.write_bytes(
+                struct.pack(
+                    "<4sQ2H2L4Q",
+                    b"PK\x06\x06",
+                    44,
+                    45,
+                    45,
+                    0,
+                    0,
+                    count,
+                    count,
+                    cd_size,
+                    cd_offset,
+                )
+            )
+            self.write_bytes(struct.pack("<4sLQL", b"PK\x06\x07", 0, cd_end, 1))
+            count, cd_size, cd_offset = 0xFFFF, 0xFFFFFFFF, 0xFFFFFFFF
+        self.write_bytes(
+            struct.pack(
+                "<4s4H2LH",
+                b"PK\x05\x06",
+                0,
+                0,
+                count,
+                count,
+                cd_size,
+                cd_offset,
+                0,
+            )
+        )
+        if self.owns_fp:
+            self.fp.close()
+        self.fp = None
+
+    def discard(self):
+        """Stops workers without writing central directory so that incomplete archive is never finalized"""
+        if self.fp is None:
+            return
+        self.executor.shutdown(cancel_futures=True)
+        if self.owns_fp:
+            self.fp.close()
+        self.fp = None
+
+
+class PreparedStatements:
+    """Registry of server side prepared statements for hot read queries , Statements are prepared once per pooled connection and executed with bound parameters so that their plans are cached by postgres"""
+
+    statements = {
+        "osm_feature": ("bigint", get_osm_feature_query("$1")),
+        "countries": (None, get_countries_query(None)),
+        "countries_by_name": ("text", get_countries_query("$1")),
+        "countries_simplified": ("float8", get_countries_query(None, "$1")),
+        "countries_by_name_simplified": (
+            "text, float8",
+            get_countries_query("$1", "$2"),
+        ),
+        "last_updated": (None, check_last_updated_rawdata()),
+        "read_user": ("bigint", get_user_query("$1")),
+    }
+
+    def __init__(self):
+        # connections are tracked by object id and backend pid since psycopg2 connections can't be weak referenced
+        self.connections = {}
+        self.lock = threading.Lock()
+
+    def prepare(self, cur, name):
+        arg_types, query = self.statements[name]
+        cur.execute(
+            f"PREPARE {name} ({arg_types}) AS {query}"
+            if arg_types
+            else f"PREPARE {name} AS {query}"
+        )
+
+    def execute(self, cur, name, params=None):
+        """Executes registered statement on cursor , Prepares it first if it is not prepared on connection of cursor yet
+
+        Args:
+            cur : cursor of pooled connection
+            name (str): name of registered statement
+            params (tuple, optional): bound parameters. Defaults to None.
+        """
+        con = cur.connection
+        key = (id(con), con.get_backend_pid())
+        with self.lock:
+            stats = self.connections.setdefault(
+                key, {"statements": set(), "hits": 0, "misses": 0}
+            )
+            prepared = name in stats["statements"]
+            stats["hits" if prepared else "misses"] += 1
+        execute_query = (
+            f"EXECUTE {name} ({', '.join(['%s'] * len(params))})"
+            if params
+            else f"EXECUTE {name}"
+        )
+        try:
+            if not prepared:
+                self.prepare(cur, name)
+            cur.execute(execute_query, params)
+        except (
+            psycopg2.errors.InvalidSqlStatementName,
+            psycopg2.errors.DuplicatePreparedStatement,
+        ):
+            # tracked state is stale , connection got reused under same key
+            con.rollback()
+            cur.execute("DEALLOCATE ALL")
+            self.prepare(cur, name)
+            cur.execute(execute_query, params)
+            with self.lock:
+                stats["statements"] = set()
+        with self.lock:
+            stats["statements"].add(name)
+
+    def get_stats(self):
+        """Gives plan cache hits and misses of prepared statements in total and per connection"""
+        with self.lock:
+            connections = [
+                {
+                    "backend_pid": pid,
+                    "hits": stats["hits"],
+                    "misses": stats["misses"],
+                    "statements": sorted(stats["statements"]),
+                }
+                for (_, pid), stats in self.connections.items()
+            ]
+        hits = sum(con["hits"] for con in connections)
+        misses = sum(con["misses"] for con in connections)
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else 0,
+            "connections": connections,
+        }
+
+
+prepared_statements = PreparedStatements()
+
+
 class Users:
     """
     Users class provides CRUD operations for interacting with the 'users' table in the database.
@@ -319,9 +1066,22 @@ class Users:
         """
         Initializes an instance of the Auth class, connecting to the database.
         """
-        dbdict = get_db_connection_params()
-        self.d_b = Database(dbdict)
-        self.con, self.cur = self.d_b.connect()
+        if use_connection_pooling:
+            self.d_b = None
+            self.con = LOCAL_CON_POOL.get_conn_from_pool()
+            self.cur = self.con.cursor(cursor_factory=DictCursor)
+        else:
+            dbdict = get_db_connection_params()
+            self.d_b = Database(dbdict)
+            self.con, self.cur = self.d_b.connect()
+
+    def close_con(self):
+        """Releases connection to pool or closes it"""
+        if self.d_b:
+            self.d_b.close_conn()
+        else:
+            self.cur.close()
+            LOCAL_CON_POOL.release_conn_from_pool(self.con)
 
     def create_user(self, osm_id, role):
         """
@@ -342,7 +1102,7 @@ class Users:
         self.cur.execute(self.cur.mogrify(query, params).decode("utf-8"))
         new_osm_id = self.cur.fetchall()[0][0]
         self.con.commit()
-        self.d_b.close_conn()
+        self.close_con()
         return {"osm_id": new_osm_id}
 
     def read_user(self, osm_id):
@@ -359,11 +1119,12 @@ class Users:
         Raises:
         - HTTPException: If there's an issue with the database query.
         """
-        query = "SELECT * FROM users WHERE osm_id = %s;"
-        params = (osm_id,)
-        self.cur.execute(self.cur.mogrify(query, params).decode("utf-8"))
+        if use_connection_pooling:
+            prepared_statements.execute(self.cur, "read_user", (osm_id,))
+        else:
+            self.cur.execute(get_user_query("%s"), (osm_id,))
         result = self.cur.fetchall()
-        self.d_b.close_conn()
+        self.close_con()
         if result:
             return dict(result[0])
         else:
@@ -389,7 +1150,7 @@ class Users:
         self.cur.execute(self.cur.mogrify(query, params).decode("utf-8"))
         updated_user = self.cur.fetchall()
         self.con.commit()
-        self.d_b.close_conn()
+        self.close_con()
         if updated_user:
             return dict(updated_user[0])
         raise HTTPException(status_code=404, detail="User not found")
@@ -412,7 +1173,7 @@ class Users:
         self.cur.execute(self.cur.mogrify(query, params).decode("utf-8"))
         deleted_user = self.cur.fetchall()
         self.con.commit()
-        self.d_b.close_conn()
+        self.close_con()
         if deleted_user:
             return dict(deleted_user[0])
         raise HTTPException(status_code=404, detail="User not found")
@@ -432,10 +1193,81 @@ class Users:
         params = (skip, limit)
         self.cur.execute(self.cur.mogrify(query, params).decode("utf-8"))
         users_list = self.cur.fetchall()
-        self.d_b.close_conn()
+        self.close_con()
         return [dict(user) for user in users_list]
 
 
+# relative cost of writing output types , native geojson writer is the cheapest
+OUTPUT_TYPE_COST_FACTORS = {
+    "geojson": 1,
+    "fgb": 1.5,
+    "parquet": 1.5,
+    "pmtiles": 2,
+    "csv": 2,
+    "sql": 2,
+    "gpkg": 2,
+    "kml": 3,
+    "shp": 3,
+    "mbtiles": 4,
+}
+
+
+def get_export_cost_score(params, area_km2, country_export=False):
+    """Scores how heavy snapshot request is from its area , output type , selectivity of filters and country export mode
+
+    Args:
+        params (RawDataCurrentParams): snapshot request
+        area_km2 (float): area of request geometry in sqkm
+        country_export (bool, optional): Whether request geometry is a country boundary. Defaults to False.
+
+    Returns:
+        float: cost score
+    """
+    score = area_km2 * OUTPUT_TYPE_COST_FACTORS.get(params.output_type, 2)
+    if params.geometry_type:
+        score *= len(params.geometry_type) / 3
+    if params.filters:
+        filters = params.filters
+        if not isinstance(filters, dict):
+            filters = filters.model_dump()
+        if filters.get("tags") and any(filters["tags"].values()):
+            score *= 0.25
+        if filters.get("attributes") and any(filters["attributes"].values()):
+            score *= 0.8
+    if country_export:
+        score *= 10
+    return score
+
+
+def get_snapshot_queue_name(params):
+    """Chooses queue of snapshot request , Requests with cost score within EXPRESS_QUEUE_MAX_COST go to express queue and rest to default queue
+
+    Args:
+        params (RawDataCurrentParams): snapshot request
+
+    Returns:
+        str: queue name
+    """
+    area_km2 = area(json_loads(params.geometry.model_dump_json())) * 1e-6
+    score = get_export_cost_score(params, area_km2)
+    if score > EXPRESS_QUEUE_MAX_COST:
+        return DEFAULT_QUEUE_NAME
+    con = RawData.get_con()
+    try:
+        with con.cursor() as cur:
+            cur.execute(
+                check_exisiting_country(
+                    dumps(json_loads(params.geometry.model_dump_json()))
+                )
+            )
+            country_export = bool(cur.fetchall())
+    finally:
+        RawData.close_con(con)
+    if get_export_cost_score(params, area_km2, country_export) > EXPRESS_QUEUE_MAX_COST:
+        return DEFAULT_QUEUE_NAME
+    return EXPRESS_QUEUE_NAME
+
+
 class RawData:
     """Class responsible for the Rawdata Extraction from available sources ,
         Currently Works for Underpass source Current Snapshot
@@ -469,6 +1301,13 @@ class RawData:
             self.d_b = Database(dict(dbdict))
             self.con, self.cur = self.d_b.connect()
 
+    @staticmethod
+    def get_con():
+        """Gets new connection , from the pool if connection pooling is enabled"""
+        if use_connection_pooling:
+            return LOCAL_CON_POOL.get_conn_from_pool()
+        return connect(**get_db_connection_params())
+
     @staticmethod
     def close_con(con):
         """Closes connection if exists"""
@@ -481,19 +1320,28 @@ class RawData:
 
     @staticmethod
     def ogr_export_shp(point_query, line_query, poly_query, working_dir, file_name):
-        """Function written to support ogr type extractions as well , In this way we will be able to support all file formats supported by Ogr , Currently it is slow when dataset gets bigger as compared to our own conversion method but rich in feature and data types even though it is slow"""
+        """Function written to support ogr type extractions as well , In this way we will be able to support all file formats supported by Ogr , Currently it is slow when dataset gets bigger as compared to our own conversion method but rich in feature and data types even though it is slow
+
+        point, line and poly layers are generated concurrently
+        """
         db_items = get_db_connection_params()
-        if point_query:
-            query_path = os.path.join(working_dir, "point.sql")
+        layer_cmds = {}
+        for layer, layer_query in (
+            ("point", point_query),
+            ("line", line_query),
+            ("poly", poly_query),
+        ):
+            if not layer_query:
+                continue
+            query_path = os.path.join(working_dir, f"{layer}.sql")
             # writing to .sql to pass in ogr2ogr because we don't want to pass too much argument on command with sql
             with open(query_path, "w", encoding="UTF-8") as file:
-                file.write(point_query)
+                file.write(layer_query)
             # standard file path for the generation
-            point_file_path = os.path.join(working_dir, f"{file_name}_point.shp")
+            layer_file_path = os.path.join(working_dir, f"{file_name}_{layer}.shp")
             # command for ogr2ogr to generate file
-
-            cmd = """ogr2ogr -overwrite -f "ESRI Shapefile" {export_path} PG:"host={host} port={port} user={username} dbname={db} password={password}" -sql @"{pg_sql_select}" -lco ENCODING=UTF-8 -progress""".format(
-                export_path=point_file_path,
+            layer_cmds[layer] = """ogr2ogr -overwrite -f "ESRI Shapefile" {export_path} PG:"host={host} port={port} user={username} dbname={db} password={password}" -sql @"{pg_sql_select}" -lco ENCODING=UTF-8 -progress""".format(
+                export_path=layer_file_path,
                 host=db_items.get("host"),
                 port=db_items.get("port"),
                 username=db_items.get("user"),
@@ -501,53 +1349,59 @@ class RawData:
                 password=db_items.get("password"),
                 pg_sql_select=query_path,
             )
-            logging.debug("Calling ogr2ogr-Point Shapefile")
-            run_ogr2ogr_cmd(cmd)
-            # clear query file we don't need it anymore
-            os.remove(query_path)
+        try:
+            RawData.run_ogr2ogr_cmds_concurrently(layer_cmds)
+        finally:
+            # clear query files we don't need them anymore
+            for layer in layer_cmds:
+                os.remove(os.path.join(working_dir, f"{layer}.sql"))
 
-        if line_query:
-            query_path = os.path.join(working_dir, "line.sql")
-            # writing to .sql to pass in ogr2ogr because we don't want to pass too much argument on command with sql
-            with open(query_path, "w", encoding="UTF-8") as file:
-                file.write(line_query)
-            line_file_path = os.path.join(working_dir, f"{file_name}_line.shp")
-            cmd = """ogr2ogr -overwrite -f "ESRI Shapefile" {export_path} PG:"host={host} port={port} user={username} dbname={db} password={password}" -sql @"{pg_sql_select}" -lco ENCODING=UTF-8 -progress""".format(
-                export_path=line_file_path,
-                host=db_items.get("host"),
-                port=db_items.get("port"),
-                username=db_items.get("user"),
-                db=db_items.get("dbname"),
-                password=db_items.get("password"),
-                pg_sql_select=query_path,
-            )
-            logging.debug("Calling ogr2ogr-Line Shapefile")
-            run_ogr2ogr_cmd(cmd)
-            # clear query file we don't need it anymore
-            os.remove(query_path)
+    @staticmethod
+    def run_ogr2ogr_cmds_concurrently(layer_cmds):
+        """Runs ogr2ogr commands of multi layer output concurrently , Failure of one layer cancels the others
 
-        if poly_query:
-            query_path = os.path.join(working_dir, "poly.sql")
-            poly_file_path = os.path.join(working_dir, f"{file_name}_poly.shp")
-            # writing to .sql to pass in ogr2ogr because we don't want to pass too much argument on command with sql
-            with open(query_path, "w", encoding="UTF-8") as file:
-                file.write(poly_query)
-            cmd = """ogr2ogr -overwrite -f "ESRI Shapefile" {export_path} PG:"host={host} port={port} user={username} dbname={db} password={password}" -sql @"{pg_sql_select}" -lco ENCODING=UTF-8 -progress""".format(
-                export_path=poly_file_path,
-                host=db_items.get("host"),
-                port=db_items.get("port"),
-                username=db_items.get("user"),
-                db=db_items.get("dbname"),
-                password=db_items.get("password"),
-                pg_sql_select=query_path,
-            )
-            logging.debug("Calling ogr2ogr-Poly Shapefile")
-            run_ogr2ogr_cmd(cmd)
-            # clear query file we don't need it anymore
-            os.remove(query_path)
+        Args:
+            layer_cmds (dict): layer name and ogr2ogr command to generate it
+        """
+        if not layer_cmds:
+            return
+        cancel_event = threading.Event()
+
+        def export_layer(layer, cmd):
+            logging.debug("Calling ogr2ogr-%s", layer)
+            try:
+                run_ogr2ogr_cmd(cmd, cancel_event=cancel_event)
+            except Exception:
+                cancel_event.set()
+                raise
+
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=max(1, min(len(layer_cmds), int(MAX_WORKERS)))
+        ) as executor:
+            futures = {
+                executor.submit(export_layer, layer, cmd): layer
+                for layer, cmd in layer_cmds.items()
+            }
+            failed = None
+            for future in concurrent.futures.as_completed(futures):
+                try:
+                    future.result()
+                except Exception as ex:
+                    if failed is None:
+                        failed = ex
+                        logging.error(
+                            "ogr2ogr-%s failed , cancelling other layers",
+                            futures[future],
+                        )
+                        for pending in futures:
+                            pending.cancel()
+        if failed is not None:
+            raise failed
 
     @staticmethod
-    def ogr_export(query, outputtype, working_dir, dump_temp_path, params):
+    def ogr_export(
+        query, outputtype, working_dir, dump_temp_path, params, source_path=None
+    ):
         """Generates ogr2ogr command based on outputtype and parameters
 
         Args:
@@ -556,11 +1410,13 @@ class RawData:
             working_dir (_type_): _description_
             dump_temp_path (_type_): temp file path for metadata gen
             params (_type_): _description_
+            source_path (str, optional): Already extracted file to convert instead of running the query on postgres
         """
         db_items = get_db_connection_params()
         query_path = os.path.join(working_dir, "export_query.sql")
-        with open(query_path, "w", encoding="UTF-8") as file:
-            file.write(query)
+        if source_path is None:
+            with open(query_path, "w", encoding="UTF-8") as file:
+                file.write(query)
 
         format_options = {
             RawDataOutputType.FLATGEOBUF.value: {
@@ -610,6 +1466,11 @@ class RawData:
 
         format_option = format_options.get(outputtype, {"format": "", "extra": ""})
 
+        if source_path:
+            cmd = f"ogr2ogr -overwrite -f {format_option['format']} {dump_temp_path} {source_path} -lco ENCODING=UTF-8 -progress {format_option['extra']} {file_name_option}"
+            run_ogr2ogr_cmd(cmd)
+            return
+
         cmd = f"ogr2ogr -overwrite -f {format_option['format']} {dump_temp_path} PG:\"host={db_items.get('host')} port={db_items.get('port')} user={db_items.get('user')} dbname={db_items.get('dbname')} password={db_items.get('password')}\" -sql @{query_path} -lco ENCODING=UTF-8 -progress {format_option['extra']} {file_name_option}"
         run_ogr2ogr_cmd(cmd)
 
@@ -646,20 +1507,238 @@ class RawData:
         logging.debug("Server side Query Result  Post Processing Done")
 
     @staticmethod
-    def get_grid_id(geom, cur):
-        """Gets the intersecting related grid id for the geometry that is passed
+    def query2geojson_parallel(extraction_queries, dump_temp_file_path):
+        """Runs each per table extraction query on its own connection and server side cursor concurrently , Results are written to per table part files which are concatenated to single geojson at the end
+
+        Rows of chunked extraction queries carry osm_id, osm_type and whether feature is inside its chunk , features crossing chunk borders are written only once
+        """
+        pre_geojson = """{"type": "FeatureCollection","features": ["""
+        post_geojson = """]}"""
+        part_paths = [
+            f"{dump_temp_file_path}.part{index}"
+            for index in range(len(extraction_queries))
+        ]
+        border_features = set()
+        border_features_lock = threading.Lock()
+
+        def is_duplicate(row):
+            if len(row) == 1 or row[3]:
+                return False
+            with border_features_lock:
+                if (row[2], row[1]) in border_features:
+                    return True
+                border_features.add((row[2], row[1]))
+            return False
+
+        def extract_part(index):
+            logging.debug("Query : %s", extraction_queries[index])
+            con = RawData.get_con()
+            try:
+                with open(part_paths[index], "w", encoding="utf-8") as f:
+                    with con.cursor(name=f"fetch_raw_{index}") as cursor:
+                        cursor.itersize = 1000
+                        cursor.execute(extraction_queries[index])
+                        first = True
+                        for row in cursor:
+                            if is_duplicate(row):
+                                continue
+                            if first:
+                                first = False
+                            else:
+                                f.write(",")
+                            f.write(row[0])
+            finally:
+                RawData.close_con(con)
+            return index
+
+        logging.debug(
+            "Extracting %s tables in parallel with server side cursors",
+            len(extraction_queries),
+        )
+        try:
+            with concurrent.futures.ThreadPoolExecutor(
+                max_workers=max(1, min(len(extraction_queries), int(MAX_WORKERS)))
+            ) as executor:
+                futures = [
+                    executor.submit(extract_part, index)
+                    for index in range(len(extraction_queries))
+                ]
+                for future in concurrent.futures.as_completed(futures):
+                    future.result()
+
+            with open(dump_temp_file_path, "w", encoding="utf-8") as f:
+                f.write(pre_geojson)
+                first = True
+                for part_path in part_paths:
+                    if os.path.getsize(part_path) == 0:
+                        continue
+                    if first:
+                        first = False
+                    else:
+                        f.write(",")
+                    with open(part_path, "r", encoding="utf-8") as part:
+                        shutil.copyfileobj(part, f, 1024 * 1024)
+                f.write(post_geojson)
+        finally:
+            for part_path in part_paths:
+                if os.path.exists(part_path):
+                    os.remove(part_path)
+        logging.debug("Parallel table extraction Post Processing Done")
+
+    def native_export(self, query, outputtype, dump_temp_path):
+        """Writes geoparquet or flatgeobuf in process from server side cursor of extraction query
 
         Args:
-            geom (_type_): _description_
-            cur (_type_): _description_
+            query (str): ogr extraction query
+            outputtype (str): parquet or fgb
+            dump_temp_path (str): path of export file
+        """
+        start_time = time.time()
+        with self.con.cursor(name="native_export") as cursor:
+            cursor.itersize = 1000
+            cursor.execute(query)
+            if outputtype == RawDataOutputType.GEOPARQUET.value:
+                row_count = write_geoparquet(
+                    cursor,
+                    dump_temp_path,
+                    GEOPARQUET_ROW_GROUP_SIZE,
+                    GEOPARQUET_COMPRESSION,
+                )
+            else:
+                row_count = write_flatgeobuf(
+                    cursor,
+                    dump_temp_path,
+                    self.params.file_name if self.params.file_name else "raw_export",
+                    self.params.fgb_wrap_geoms,
+                )
+        logging.debug(
+            "Native %s writer wrote %s rows in %s",
+            outputtype,
+            row_count,
+            humanize.precisedelta(
+                timedelta(seconds=round(time.time() - start_time)),
+                minimum_unit="seconds",
+            ),
+        )
+
+    def estimate_export(self):
+        """Estimates rows , output bytes and runtime of export using planner estimate of per table extraction queries without running them
 
         Returns:
-            _type_: grid id , geometry dump and the area of geometry
+            dict: estimate
         """
-        geometry_dump = dumps(dict(geom))
-        # generating geometry area in sqkm
-        geom_area = area(json_loads(geom.json())) * 1e-6
-        country_export = False
+        try:
+            (
+                grid_id,
+                geometry_dump,
+                geom_area,
+                country,
+                country_export,
+            ) = RawData.get_grid_id(self.params.geometry, self.cur)
+            plans = []
+            for query in raw_currentdata_extraction_query(
+                self.params.model_copy(deep=True),
+                grid_id,
+                country,
+                ogr_export=True,
+                country_export=country_export,
+                as_list=True,
+            ):
+                self.cur.execute(get_explain_query(query))
+                plans.append((get_table_name_from_query(query), self.cur.fetchone()[0]))
+            country_rows = None
+            if country_export and country:
+                country_rows = {}
+                for table in {table for table, _ in plans}:
+                    self.cur.execute(get_country_selectivity_query(table, country))
+                    reltuples, freq = self.cur.fetchone()
+                    if freq is not None:
+                        country_rows[table] = reltuples * freq
+            estimate = estimate_export_cost(
+                plans, self.params.output_type, country_rows
+            )
+            estimate["area_sqkm"] = round(geom_area, 2)
+            estimate["country_export"] = country_export
+            return estimate
+        finally:
+            RawData.close_con(self.con)
+
+    def get_chunk_geometries(self):
+        """Splits request geometry into chunks for concurrent extraction
+
+        Returns:
+            list: geojson of chunks
+        """
+        self.cur.execute(
+            get_chunked_geometry_query(
+                self.params.geometry,
+                CHUNKED_EXTRACTION_GRID_SIZE,
+                CHUNKED_EXTRACTION_MAX_VERTICES,
+            )
+        )
+        return [row[0] for row in self.cur.fetchall()]
+
+    def geojson_export(
+        self, dump_temp_file_path, grid_id, country, country_export, chunks=None
+    ):
+        """Writes current snapshot geojson , Uses per table parallel extraction if it is enabled or when geometry is chunked"""
+        if chunks:
+            extraction_queries = []
+            for chunk in chunks:
+                extraction_queries.extend(
+                    raw_currentdata_extraction_query(
+                        self.params.model_copy(deep=True),
+                        g_id=grid_id,
+                        c_id=country,
+                        country_export=country_export,
+                        as_list=True,
+                        chunk_geometry=chunk,
+                    )
+                )
+            logging.info(
+                "Extracting %s chunks with %s queries",
+                len(chunks),
+                len(extraction_queries),
+            )
+            RawData.query2geojson_parallel(extraction_queries, dump_temp_file_path)
+        elif PARALLEL_TABLE_EXTRACTION:
+            RawData.query2geojson_parallel(
+                raw_currentdata_extraction_query(
+                    self.params,
+                    g_id=grid_id,
+                    c_id=country,
+                    country_export=country_export,
+                    as_list=True,
+                ),
+                dump_temp_file_path,
+            )
+        else:
+            RawData.query2geojson(
+                self.con,
+                raw_currentdata_extraction_query(
+                    self.params,
+                    g_id=grid_id,
+                    c_id=country,
+                    country_export=country_export,
+                ),
+                dump_temp_file_path,
+            )
+
+    @staticmethod
+    def get_grid_id(geom, cur):
+        """Gets the intersecting related grid id for the geometry that is passed
+
+        Args:
+            geom (_type_): _description_
+            cur (_type_): _description_
+
+        Returns:
+            _type_: grid id , geometry dump and the area of geometry
+        """
+        geometry_dump = dumps(dict(geom))
+        # generating geometry area in sqkm
+        geom_area = area(json_loads(geom.json())) * 1e-6
+        country_export = False
         g_id = None
         countries = []
         cur.execute(check_exisiting_country(geometry_dump))
@@ -727,6 +1806,17 @@ class RawData:
             f"{self.params.file_name if self.params.file_name else 'Export'}.{output_type.lower()}",
         )
         try:
+            chunks = None
+            if (
+                ENABLE_CHUNKED_EXTRACTION
+                and not country_export
+                and geom_area >= CHUNKED_EXTRACTION_MIN_AREA_SQKM
+                and output_type
+                in ["geojson", "pmtiles", "fgb", "kml", "gpkg", "sql", "parquet"]
+            ):
+                chunks = self.get_chunk_geometries()
+                if len(chunks) < 2:
+                    chunks = None
             # currently we have only geojson binding function written other than that we have depend on ogr
             if ENABLE_TILES:
                 if output_type == RawDataOutputType.PMTILES.value:
@@ -734,15 +1824,8 @@ class RawData:
                         working_dir,
                         f"{self.params.file_name if self.params.file_name else 'Export'}.geojson",
                     )
-                    RawData.query2geojson(
-                        self.con,
-                        raw_currentdata_extraction_query(
-                            self.params,
-                            g_id=grid_id,
-                            c_id=country,
-                            country_export=country_export,
-                        ),
-                        geojson_path,
+                    self.geojson_export(
+                        geojson_path, grid_id, country, country_export, chunks
                     )
                     RawData.geojson2tiles(
                         geojson_path, dump_temp_file_path, self.params.file_name
@@ -763,15 +1846,8 @@ class RawData:
                     )  # uses ogr export to export
 
             if output_type == RawDataOutputType.GEOJSON.value:
-                RawData.query2geojson(
-                    self.con,
-                    raw_currentdata_extraction_query(
-                        self.params,
-                        g_id=grid_id,
-                        c_id=country,
-                        country_export=country_export,
-                    ),
-                    dump_temp_file_path,
+                self.geojson_export(
+                    dump_temp_file_path, grid_id, country, country_export, chunks
                 )  # uses own conversion class
             if output_type == RawDataOutputType.SHAPEFILE.value:
                 (
@@ -797,7 +1873,37 @@ class RawData:
                         self.params.file_name if self.params.file_name else "Export"
                     ),
                 )  # using ogr2ogr
-            if output_type in ["fgb", "kml", "gpkg", "sql", "parquet", "csv"]:
+            if (
+                output_type in ["fgb", "kml", "gpkg", "sql", "parquet", "csv"]
+                and chunks
+            ):
+                chunks_path = os.path.join(working_dir, "export_chunks.geojson")
+                self.geojson_export(
+                    chunks_path, grid_id, country, country_export, chunks
+                )
+                RawData.ogr_export(
+                    query=None,
+                    outputtype=output_type,
+                    dump_temp_path=dump_temp_file_path,
+                    working_dir=working_dir,
+                    params=self.params,
+                    source_path=chunks_path,
+                )
+                os.remove(chunks_path)
+            elif USE_NATIVE_WRITERS and output_type in ["fgb", "parquet"]:
+                self.native_export(
+                    raw_currentdata_extraction_query(
+                        self.params,
+                        grid_id,
+                        country,
+                        ogr_export=True,
+                        country_export=country_export,
+                    ),
+                    output_type,
+                    dump_temp_file_path,
+                )
+            elif output_type in ["fgb", "kml", "gpkg", "sql", "parquet", "csv"]:
+                ogr_start_time = time.time()
                 RawData.ogr_export(
                     query=raw_currentdata_extraction_query(
                         self.params,
@@ -811,6 +1917,14 @@ class RawData:
                     working_dir=working_dir,
                     params=self.params,
                 )  # uses ogr export to export
+                logging.debug(
+                    "ogr2ogr wrote %s in %s",
+                    output_type,
+                    humanize.precisedelta(
+                        timedelta(seconds=round(time.time() - ogr_start_time)),
+                        minimum_unit="seconds",
+                    ),
+                )
             return geom_area, geometry_dump, working_dir
         except Exception as ex:
             logging.error(ex)
@@ -821,8 +1935,10 @@ class RawData:
 
     def check_status(self):
         """Gives status about DB update, Substracts with current time and last db update time"""
-        status_query = check_last_updated_rawdata()
-        self.cur.execute(status_query)
+        if use_connection_pooling:
+            prepared_statements.execute(self.cur, "last_updated")
+        else:
+            self.cur.execute(check_last_updated_rawdata())
         behind_time = self.cur.fetchall()
         self.cur.close()
         # closing connection before leaving class
@@ -838,14 +1954,45 @@ class RawData:
         Returns:
             featurecollection: geojson of country
         """
-        query = get_countries_query(q)
-        self.cur.execute(query)
+        return FeatureCollection(**orjson.loads(self.get_countries_geojson(q)))
+
+    def get_countries_geojson(self, q, tolerance=0):
+        """Gets serialized featurecollection of countries , Features are concatenated as returned by database without decoding them
+
+        Args:
+            q (str): list filter query string
+            tolerance (float, optional): simplification tolerance in degrees , 0 keeps full resolution. Defaults to 0.
+
+        Returns:
+            bytes: geojson featurecollection of countries
+        """
+        if use_connection_pooling:
+            name = "countries_by_name" if q else "countries"
+            params = (f"%{q}%",) if q else ()
+            if tolerance:
+                name, params = f"{name}_simplified", params + (tolerance,)
+            prepared_statements.execute(self.cur, name, params or None)
+        else:
+            params = ((f"%{q}%",) if q else ()) + ((tolerance,) if tolerance else ())
+            self.cur.execute(
+                get_countries_query("%s" if q else None, "%s" if tolerance else None),
+                params or None,
+            )
         get_fetched = self.cur.fetchall()
-        features = []
-        for row in get_fetched:
-            features.append(orjson.loads(row[0]))
         self.cur.close()
-        return FeatureCollection(features=features)
+        RawData.close_con(self.con)
+        features = ",".join(row[0] for row in get_fetched)
+        return f'{{"type": "FeatureCollection", "features": [{features}]}}'.encode(
+            "utf-8"
+        )
+
+    def get_countries_version(self):
+        """Gets version of countries table , It changes whenever countries.sql is loaded"""
+        self.cur.execute(get_countries_version_query())
+        oid, comment = self.cur.fetchone()
+        self.cur.close()
+        RawData.close_con(self.con)
+        return f"{oid}:{comment}"
 
     def get_osm_feature(self, osm_id):
         """Returns geometry of osm_id in geojson
@@ -856,13 +2003,16 @@ class RawData:
         Returns:
             featurecollection: Geojson
         """
-        query = get_osm_feature_query(osm_id)
-        self.cur.execute(query)
+        if use_connection_pooling:
+            prepared_statements.execute(self.cur, "osm_feature", (osm_id,))
+        else:
+            self.cur.execute(get_osm_feature_query("%s"), (osm_id,) * 4)
         get_fetched = self.cur.fetchall()
         features = []
         for row in get_fetched:
             features.append(orjson.loads(row[0]))
         self.cur.close()
+        RawData.close_con(self.con)
         return FeatureCollection(features=features)
 
     def extract_plain_geojson(self):
@@ -880,26 +2030,180 @@ class RawData:
             cursor.close()
         return FeatureCollection(features=features)
 
+    def stream_plain_geojson(self, geojsonseq=False, compress=False):
+        """Streams geojson for small area straight from server side cursor without decoding features , Query is executed before streaming starts so that errors can be raised as response
 
-class S3FileTransfer:
-    """Responsible for the file transfer to s3 from API maachine"""
+        Args:
+            geojsonseq (bool, optional): Yields newline delimited features instead of FeatureCollection. Defaults to False.
+            compress (bool, optional): Gzip compresses the stream. Defaults to False.
 
-    def __init__(self):
-        # responsible for the connection
-        try:
-            if AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY:
-                self.aws_session = boto3.Session(
-                    aws_access_key_id=AWS_ACCESS_KEY_ID,
-                    aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
+        Returns:
+            generator: bytes of response
+        """
+        return self.stream_geojson(
+            raw_currentdata_extraction_query(self.params),
+            geojsonseq=geojsonseq,
+            compress=compress,
+        )
+
+    def stream_current_data(self):
+        """Streams current snapshot geojson from server side cursor without writing it to disk , Grid and country lookups are used same as extract_current_data
+
+        Returns:
+            geom_area: area of polygon supplied
+            geometry_dump: clipping boundary geojson
+            generator: bytes of geojson featurecollection
+        """
+        (
+            grid_id,
+            geometry_dump,
+            geom_area,
+            country,
+            country_export,
+        ) = RawData.get_grid_id(self.params.geometry, self.cur)
+        return (
+            geom_area,
+            geometry_dump,
+            self.stream_geojson(
+                raw_currentdata_extraction_query(
+                    self.params,
+                    g_id=grid_id,
+                    c_id=country,
+                    country_export=country_export,
                 )
-            else:  # if it is not passed on config then api will assume it is configured within machine using credentials file
-                self.aws_session = boto3.Session()
-            self.s_3 = self.aws_session.client("s3")
-            logging.debug("Connection has been successful to s3")
+            ),
+        )
+
+    def stream_osm_features(self, ids, compress=False):
+        """Streams features of typed osm ids as GeoJSONSeq , Each id is looked up only in the tables its type can live in
+
+        Args:
+            ids (list): typed osm ids e.g. n123 , w456 , r789
+            compress (bool, optional): Gzip compresses the stream. Defaults to False.
+
+        Returns:
+            generator: bytes of response
+        """
+        ids_by_table = {}
+        for osm_id in ids:
+            for table in OSM_ID_TYPE_TABLES[osm_id[0]]:
+                ids_by_table.setdefault(table, []).append(int(osm_id[1:]))
+        tables = list(ids_by_table)
+        return self.stream_geojson(
+            get_osm_features_query(tables),
+            [ids_by_table[table] for table in tables],
+            geojsonseq=True,
+            compress=compress,
+        )
+
+    def stream_geojson(
+        self, query, query_params=None, geojsonseq=False, compress=False
+    ):
+        """Streams ST_AsGeoJSON rows of query from server side cursor , Query is executed before streaming starts so that errors can be raised as response
+
+        Args:
+            query (str): query returning geojson feature per row
+            query_params (list, optional): bound parameters of query. Defaults to None.
+            geojsonseq (bool, optional): Yields newline delimited features instead of FeatureCollection. Defaults to False.
+            compress (bool, optional): Gzip compresses the stream. Defaults to False.
+
+        Returns:
+            generator: bytes of response
+        """
+        cursor = self.con.cursor(name="fetch_raw_quick")  # using server side cursor
+        try:
+            cursor.itersize = 500
+            cursor.execute(query, query_params)
+            rows = cursor.fetchmany(cursor.itersize)
         except Exception as ex:
-            logging.error(ex)
+            cursor.close()
+            RawData.close_con(self.con)
             raise ex
 
+        compressor = zlib.compressobj(wbits=31) if compress else None
+
+        def encode(text):
+            data = text.encode("utf-8")
+            return compressor.compress(data) if compressor else data
+
+        def generate(rows):
+            try:
+                yield  # primed below so that closing unconsumed stream still releases cursor
+                if not geojsonseq:
+                    yield encode('{"type": "FeatureCollection", "features": [')
+                first = True
+                while rows:
+                    if geojsonseq:
+                        chunk = "".join(f"{row[0]}\n" for row in rows)
+                    else:
+                        chunk = ",".join(row[0] for row in rows)
+                        if not first:
+                            chunk = f",{chunk}"
+                    first = False
+                    yield encode(chunk)
+                    rows = cursor.fetchmany(cursor.itersize)
+                if not geojsonseq:
+                    yield encode("]}")
+                if compressor:
+                    yield compressor.flush()
+            finally:
+                cursor.close()
+                RawData.close_con(self.con)
+
+        stream = generate(rows)
+        next(stream)
+        return stream
+
+
+class S3FileTransfer:
+    """Responsible for the file transfer to s3 from API maachine
+
+    boto3 client is created once per process and shared by all instances , client is thread safe so it is also used by parallel uploads.
+    Bucket location is looked up once and cached for the lifetime of process.
+    """
+
+    _client = None
+    _client_pid = None
+    _client_lock = threading.Lock()
+    _bucket_locations = {}
+
+    def __init__(self, transfer_config=None):
+        self.s_3 = self.get_client()
+        self.transfer_config = transfer_config or TransferConfig(
+            multipart_threshold=S3_MULTIPART_THRESHOLD,
+            multipart_chunksize=S3_MULTIPART_PART_SIZE,
+            max_concurrency=S3_MAX_CONCURRENCY,
+        )
+
+    @classmethod
+    def get_client(cls):
+        """Gives s3 client of the process , client is recreated in forked worker processes as connections can't be shared across fork"""
+        with cls._client_lock:
+            if cls._client is None or cls._client_pid != os.getpid():
+                # responsible for the connection
+                try:
+                    if AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY:
+                        aws_session = boto3.Session(
+                            aws_access_key_id=AWS_ACCESS_KEY_ID,
+                            aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
+                        )
+                    else:  # if it is not passed on config then api will assume it is configured within machine using credentials file
+                        aws_session = boto3.Session()
+                    cls._client = aws_session.client(
+                        "s3",
+                        config=BotoConfig(
+                            max_pool_connections=max(
+                                S3_MAX_CONCURRENCY * S3_BATCH_UPLOAD_WORKERS, 10
+                            )
+                        ),
+                    )
+                    cls._client_pid = os.getpid()
+                    logging.debug("Connection has been successful to s3")
+                except Exception as ex:
+                    logging.error(ex)
+                    raise ex
+            return cls._client
+
     def list_buckets(self):
         """used to list all the buckets available on s3"""
         buckets = self.s_3.list_buckets()
@@ -907,14 +2211,16 @@ class S3FileTransfer:
 
     def get_bucket_location(self, bucket_name):
         """Provides the bucket location on aws, takes bucket_name as string -- name of repo on s3"""
-        try:
-            bucket_location = self.s_3.get_bucket_location(Bucket=bucket_name)[
-                "LocationConstraint"
-            ]
-        except Exception as ex:
-            logging.error("Can't access bucket location")
-            raise ex
-        return bucket_location or "us-east-1"
+        if bucket_name not in self._bucket_locations:
+            try:
+                bucket_location = self.s_3.get_bucket_location(Bucket=bucket_name)[
+                    "LocationConstraint"
+                ]
+            except Exception as ex:
+                logging.error("Can't access bucket location")
+                raise ex
+            self._bucket_locations[bucket_name] = bucket_location or "us-east-1"
+        return self._bucket_locations[bucket_name]
 
     def upload(self, file_path, file_name, file_suffix=None):
         """Used for transferring file to s3 after reading path from the user , It will wait for the upload to complete
@@ -929,18 +2235,359 @@ class S3FileTransfer:
         start_time = time.time()
 
         try:
-            self.s_3.upload_file(str(file_path), BUCKET_NAME, str(file_name))
+            self.s_3.upload_file(
+                str(file_path),
+                BUCKET_NAME,
+                str(file_name),
+                Config=self.transfer_config,
+            )
         except Exception as ex:
             logging.error(ex)
             raise ex
         logging.debug("Uploaded %s in %s sec", file_name, time.time() - start_time)
-        # generate the download url
+        return self.get_object_url(file_name)
+
+    def upload_many(self, files, workers=S3_BATCH_UPLOAD_WORKERS):
+        """Uploads many files in parallel using shared client
+        Parameters :files --- list of (file_path, file_name) tuples ,
+            workers -- number of files uploaded at once
+        Returns list of download urls in the same order as files"""
+        if not files:
+            return []
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=max(min(int(workers), len(files)), 1)
+        ) as executor:
+            return list(
+                executor.map(
+                    lambda file: self.upload(file[0], file[1]),
+                    files,
+                )
+            )
+
+    def get_object_url(self, file_name):
+        """Generates download url of uploaded object"""
         bucket_location = self.get_bucket_location(bucket_name=BUCKET_NAME)
         object_url = (
             f"""https://s3.{bucket_location}.amazonaws.com/{BUCKET_NAME}/{file_name}"""
         )
         return object_url
 
+    def open_multipart_upload(self, file_name):
+        """Starts multipart upload of file_name and gives writable file object for it"""
+        return S3MultipartWriter(self.s_3, str(file_name))
+
+
+class S3MultipartWriter:
+    """Non seekable file object which uploads written bytes to s3 as multipart upload
+
+    Bytes are buffered to parts of S3_MULTIPART_PART_SIZE which are uploaded concurrently on thread pool while later bytes are still being written.
+    Each part is retried on its own up to S3_UPLOAD_PART_RETRIES times so that a failed part doesn't restart the whole upload , upload is aborted if a part keeps failing.
+    At most S3_UPLOAD_WORKERS * 2 parts are held in memory
+    """
+
+    def __init__(
+        self,
+        s_3,
+        key,
+        part_size=S3_MULTIPART_PART_SIZE,
+        workers=S3_UPLOAD_WORKERS,
+        retries=S3_UPLOAD_PART_RETRIES,
+    ):
+        self.s_3 = s_3
+        self.key = key
+        self.part_size = max(int(part_size), 5 * 1024 * 1024)
+        self.workers = max(int(workers), 1)
+        self.retries = max(int(retries), 1)
+        self.buffer = bytearray()
+        self.size = 0
+        self.parts = []
+        self.pending = []
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.workers)
+        self.upload_id = self.s_3.create_multipart_upload(Bucket=BUCKET_NAME, Key=key)[
+            "UploadId"
+        ]
+        self.start_time = time.time()
+
+    def writable(self):
+        return True
+
+    def seekable(self):
+        return False
+
+    def tell(self):
+        return self.size
+
+    def write(self, data):
+        self.buffer += data
+        self.size += len(data)
+        while len(self.buffer) >= self.part_size:
+            self.submit_part(bytes(self.buffer[: self.part_size]))
+            del self.buffer[: self.part_size]
+        return len(data)
+
+    def submit_part(self, body):
+        """Queues part for upload , waits for oldest part if too many parts are in flight"""
+        part_number = len(self.parts) + len(self.pending) + 1
+        self.pending.append(self.executor.submit(self.upload_part, part_number, body))
+        while len(self.pending) >= self.workers * 2:
+            self.parts.append(self.pending.pop(0).result())
+
+    def upload_part(self, part_number, body):
+        """Uploads single part , retrying it with backoff"""
+        for attempt in range(1, self.retries + 1):
+            try:
+                response = self.s_3.upload_part(
+                    Bucket=BUCKET_NAME,
+                    Key=self.key,
+                    UploadId=self.upload_id,
+                    PartNumber=part_number,
+                    Body=body,
+                )
+                return {"PartNumber": part_number, "ETag": response["ETag"]}
+            except Exception as ex:
+                if attempt == self.retries:
+                    raise ex
+                logging.warning(
+                    "Retrying part %s of %s after attempt %s failed : %s",
+                    part_number,
+                    self.key,
+                    attempt,
+                    ex,
+                )
+                time.sleep(2**attempt)
+
+    def close(self):
+        """Uploads remaining bytes as last part and completes the upload"""
+        if self.buffer or not (self.parts or self.pending):
+            self.submit_part(bytes(self.buffer))
+            self.buffer = bytearray()
+        try:
+            for future in self.pending:
+                self.parts.append(future.result())
+            self.pending = []
+            self.s_3.complete_multipart_upload(
+                Bucket=BUCKET_NAME,
+                Key=self.key,
+                UploadId=self.upload_id,
+                MultipartUpload={"Parts": self.parts},
+            )
+        except Exception as ex:
+            self.abort()
+            raise ex
+        finally:
+            self.executor.shutdown()
+        logging.debug(
+            "Streamed %s of %s in %s parts in %s sec",
+            humanize.naturalsize(self.size),
+            self.key,
+            len(self.parts),
+            round(time.time() - self.start_time),
+        )
+
+    def abort(self):
+        """Aborts multipart upload so that s3 discards uploaded parts"""
+        for future in self.pending:
+            future.cancel()
+        self.executor.shutdown()
+        self.s_3.abort_multipart_upload(
+            Bucket=BUCKET_NAME, Key=self.key, UploadId=self.upload_id
+        )
+
+
+class ExportCache:
+    """Content addressed cache for snapshot export results
+
+    Results are keyed by the normalized request parameters together with the last replication import date of the database,
+    So identical requests against the same data snapshot reuse the previously generated artifact instead of running the extraction again.
+    Cache entries expire after EXPORT_CACHE_TTL , artifacts stored on local disk are additionally evicted in LRU order once they exceed EXPORT_CACHE_MAX_DISK_SIZE bytes.
+    Artifacts uploaded to s3 are expected to be expired by the bucket lifecycle rules
+    Only exports with uuid are cached , exports without uuid are written to a path derived from file name only so any later request can overwrite their artifact
+    """
+
+    KEY_PREFIX = "export_cache"
+
+    def __init__(self):
+        self.redis = redis.StrictRedis.from_url(CELERY_BROKER_URL)
+        self.lru_key = f"{self.KEY_PREFIX}:lru"
+        self.files_key = f"{self.KEY_PREFIX}:files"
+        self.paths_key = f"{self.KEY_PREFIX}:paths"
+
+    @staticmethod
+    def get_cache_key(params, last_updated):
+        """Generates canonical hash of the request parameters along with the database import date
+
+        Args:
+            params (RawDataCurrentParams): validated request parameters
+            last_updated (str): last import date of the database from planet_osm_replication_status
+
+        Returns:
+            str: sha256 hex digest of the normalized request
+        """
+        request = json.loads(params.model_dump_json(exclude={"uuid"}))
+        if request.get("geometry_type"):
+            request["geometry_type"] = sorted(request["geometry_type"])
+        tags_filter = (request.get("filters") or {}).get("tags") or {}
+        for geometry_filter in tags_filter.values():
+            for join_filter in (geometry_filter or {}).values():
+                for key, values in (join_filter or {}).items():
+                    join_filter[key] = sorted(value.strip() for value in values)
+        canonical_request = dumps(
+            {"request": request, "last_updated": str(last_updated)},
+            sort_keys=True,
+            separators=(",", ":"),
+        )
+        return hashlib.sha256(canonical_request.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Returns cached export result for the key if artifact is still available"""
+        cached = self.redis.get(f"{self.KEY_PREFIX}:{key}")
+        if cached is None:
+            return None
+        result = orjson.loads(cached)
+        if not USE_S3_TO_UPLOAD:
+            owner = self.redis.hget(self.paths_key, str(result["download_url"]))
+            if (
+                owner is None
+                or owner.decode("utf-8") != key
+                or not os.path.exists(result["download_url"])
+            ):
+                # artifact is gone or was overwritten by export of other request
+                self.remove(key)
+                return None
+            self.redis.zadd(self.lru_key, {key: time.time()})
+        return result
+
+    def set(self, key, result, file_size):
+        """Stores export result against the key and evicts old artifacts from disk if required"""
+        self.redis.set(
+            f"{self.KEY_PREFIX}:{key}", orjson.dumps(result), ex=EXPORT_CACHE_TTL
+        )
+        if not USE_S3_TO_UPLOAD:
+            file_path = str(result["download_url"])
+            pipe = self.redis.pipeline()
+            pipe.zadd(self.lru_key, {key: time.time()})
+            pipe.hset(
+                self.files_key,
+                key,
+                orjson.dumps({"path": file_path, "size": file_size}),
+            )
+            pipe.hset(self.paths_key, file_path, key)
+            pipe.execute()
+            self.evict()
+
+    def remove(self, key):
+        """Removes cache entry along with its artifact on disk , artifact is kept if it is owned by newer entry"""
+        entry = self.redis.hget(self.files_key, key)
+        pipe = self.redis.pipeline()
+        pipe.delete(f"{self.KEY_PREFIX}:{key}")
+        pipe.zrem(self.lru_key, key)
+        pipe.hdel(self.files_key, key)
+        pipe.execute()
+        if entry:
+            file_path = orjson.loads(entry)["path"]
+            owner = self.redis.hget(self.paths_key, file_path)
+            if owner is None or owner.decode("utf-8") == key:
+                self.redis.hdel(self.paths_key, file_path)
+                if os.path.exists(file_path):
+                    os.remove(file_path)
+                    logging.debug("Evicted cached export %s", file_path)
+
+    def evict(self):
+        """Evicts expired entries and least recently used artifacts until disk usage is within limit"""
+        entries = {
+            key.decode("utf-8"): orjson.loads(value)
+            for key, value in self.redis.hgetall(self.files_key).items()
+        }
+        for key in list(entries.keys()):
+            if not self.redis.exists(f"{self.KEY_PREFIX}:{key}"):
+                self.remove(key)
+                entries.pop(key)
+        total_size = sum(entry["size"] for entry in entries.values())
+        for key in self.redis.zrange(self.lru_key, 0, -1):
+            if total_size <= EXPORT_CACHE_MAX_DISK_SIZE:
+                break
+            key = key.decode("utf-8")
+            if key in entries:
+                total_size -= entries[key]["size"]
+            self.remove(key)
+
+
+class CountriesCache:
+    """In process cache of pre serialized /countries/ responses
+
+    Entries are keyed by the filter query string and simplification level , and are valid for one version of the countries table.
+    Version is checked at most once every COUNTRIES_CACHE_VERSION_CHECK_INTERVAL seconds so a hit costs no database round trip and no json encoding.
+    """
+
+    # simplification tolerance in degrees of each level
+    TOLERANCES = {"none": 0, "low": 0.001, "medium": 0.01, "high": 0.05}
+
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.version = None
+        self.version_checked_at = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def get_etag(version, body):
+        """Generates strong etag of response body for a countries table version"""
+        digest = hashlib.sha256(version.encode("utf-8"))
+        digest.update(body)
+        return f'"{digest.hexdigest()[:32]}"'
+
+    def check_version(self):
+        """Clears entries if countries table is reloaded since last check , Version is queried outside of lock so other requests keep being served from cache meanwhile"""
+        with self.lock:
+            if (
+                self.version is not None
+                and time.time() - self.version_checked_at
+                < COUNTRIES_CACHE_VERSION_CHECK_INTERVAL
+            ):
+                return
+            checked_at, self.version_checked_at = self.version_checked_at, time.time()
+        try:
+            version = RawData().get_countries_version()
+        except Exception as ex:
+            with self.lock:
+                self.version_checked_at = checked_at
+            raise ex
+        with self.lock:
+            if version != self.version:
+                logging.debug("Countries table version changed to %s", version)
+                self.entries.clear()
+                self.version = version
+
+    def get(self, q, simplify="none"):
+        """Returns serialized countries featurecollection with its etag
+
+        Args:
+            q (str): list filter query string
+            simplify (str, optional): simplification level from TOLERANCES. Defaults to "none".
+
+        Returns:
+            tuple: body bytes and etag
+        """
+        key = (q, simplify)
+        self.check_version()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                return entry
+            version = self.version
+        # missing entry is built outside of lock so that it doesn't block hits of other entries
+        body = RawData().get_countries_geojson(q, self.TOLERANCES[simplify])
+        entry = (body, self.get_etag(version, body))
+        with self.lock:
+            if self.version == version:
+                self.entries[key] = entry
+                while len(self.entries) > COUNTRIES_CACHE_MAX_ENTRIES:
+                    self.entries.popitem(last=False)
+        return entry
+
+
+countries_cache = CountriesCache()
+
 
 class PolygonStats:
     """Generates stats for polygon"""
@@ -1158,10 +2805,117 @@ class PolygonStats:
         return return_stats
 
 
+def parse_size(size):
+    """Parses size such as 5GB or 512MiB to bytes , Units are decimal unless suffixed with iB as in DuckDB"""
+    match = re.fullmatch(r"\s*([\d.]+)\s*([KMGT]?)(i?B)?\s*", str(size), re.IGNORECASE)
+    if not match:
+        raise ValueError(f"Invalid size {size}")
+    number, unit, suffix = match.groups()
+    base = 1024 if suffix and suffix.lower() == "ib" else 1000
+    power = "KMGT".index(unit.upper()) + 1 if unit else 0
+    return int(float(number) * base**power)
+
+
+class WorkScheduler:
+    """Runs DAG of work items on threads within budgets of shared resources
+
+    Every item declares how much of each budgeted resource ( cpu slots , memory bytes , postgres connections , subprocesses ) it holds while running,
+    Item is started once all of its dependencies are done and its demands fit in what is left of the budgets.
+    Ready items are started in order of rank , which is their cost plus highest rank among items depending on them , so longest chains of large work start first.
+    Lower ranked items only fill unused budget if they don't need resource which higher ranked waiting item is waiting for.
+    """
+
+    def __init__(self, budgets):
+        self.budgets = {
+            resource: max(int(amount), 1) for resource, amount in budgets.items()
+        }
+        self.items = {}
+
+    def add(self, name, func, deps=(), cost=1, **demands):
+        """Adds work item , dependencies should be added before , Demands are capped to budget so item larger than budget runs alone"""
+        for dep in deps:
+            if dep not in self.items:
+                raise ValueError(f"Unknown dependency {dep} of {name}")
+        self.items[name] = {
+            "func": func,
+            "deps": list(deps),
+            "cost": cost,
+            "demands": {
+                resource: min(int(amount), self.budgets[resource])
+                for resource, amount in demands.items()
+                if resource in self.budgets and amount
+            },
+        }
+        return name
+
+    def get_ranks(self):
+        """Gives rank of every item , items are visited in reverse order of adding so dependents are ranked before their dependencies"""
+        dependents = {name: [] for name in self.items}
+        for name, item in self.items.items():
+            for dep in item["deps"]:
+                dependents[dep].append(name)
+        ranks = {}
+        for name in reversed(list(self.items)):
+            ranks[name] = self.items[name]["cost"] + max(
+                (ranks[dependent] for dependent in dependents[name]), default=0
+            )
+        return ranks
+
+    def run(self):
+        """Runs all items , Returns results of items by name , Raises first error after running items are finished"""
+        ranks = self.get_ranks()
+        pending = sorted(self.items, key=lambda name: -ranks[name])
+        available = dict(self.budgets)
+        done, results, running = set(), {}, {}
+        error = None
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=max(len(self.items), 1)
+        ) as executor:
+            while running or (pending and error is None):
+                blocked = set()
+                for name in list(pending) if error is None else []:
+                    item = self.items[name]
+                    if not all(dep in done for dep in item["deps"]):
+                        continue
+                    demands = item["demands"]
+                    if blocked.intersection(demands) or any(
+                        available[resource] < amount
+                        for resource, amount in demands.items()
+                    ):
+                        blocked.update(demands)
+                        continue
+                    for resource, amount in demands.items():
+                        available[resource] -= amount
+                    pending.remove(name)
+                    running[executor.submit(item["func"])] = name
+                if not running:
+                    break
+                finished, _ = concurrent.futures.wait(
+                    running, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in finished:
+                    name = running.pop(future)
+                    for resource, amount in self.items[name]["demands"].items():
+                        available[resource] += amount
+                    try:
+                        results[name] = future.result()
+                    except Exception as ex:
+                        logging.error("Scheduled work %s failed : %s", name, ex)
+                        error = error or ex
+                        continue
+                    done.add(name)
+        if error:
+            raise error
+        return results
+
+
 class DuckDB:
     """
     Constructor for the DuckDB class.
 
+    Single connection is kept open for the lifetime of the instance with postgres attached and spatial extension loaded once,
+    Each query runs on its own cursor of that connection so it can be used from many threads.
+
     Parameters:
     - db_path (str): The path to the DuckDB database file.
     """
@@ -1172,7 +2926,9 @@ class DuckDB:
         self.db_path = db_path
         if os.path.exists(self.db_path):
             os.remove(self.db_path)
-        con = duckdb.connect(self.db_path)
+        self.stats = {}
+        self.stats_lock = threading.Lock()
+        self.con = con = duckdb.connect(self.db_path)
         con.sql(f"""ATTACH '{self.db_con_str}' AS postgres_db (TYPE POSTGRES)""")
         con.install_extension("spatial")
         con.load_extension("spatial")
@@ -1189,25 +2945,308 @@ class DuckDB:
 
         con.sql("""SET enable_progress_bar = true""")
 
-    def run_query(self, query, attach_pgsql=False, load_spatial=False):
+    def run_query(self, query):
         """
         Executes a query on the DuckDB database.
 
         Parameters:
         - query (str): The SQL query to execute.
-        - attach_pgsql (bool): Flag to indicate whether to attach a PostgreSQL database.
-        - load_spatial (bool): Flag to indicate whether to load the spatial extension.
+
+        Returns:
+        - Rows of the result, Number of rows written for INSERT and COPY.
+        """
+        start_time = time.time()
+        with self.con.cursor() as cursor:
+            cursor_time = time.time()
+            cursor.execute(query)
+            result = cursor.fetchall()
+        self.record_stat(
+            query.split(None, 1)[0].upper(),
+            cursor_time - start_time,
+            time.time() - cursor_time,
+        )
+        return result
+
+    def record_stat(self, statement, overhead, elapsed):
+        """Adds timing of single query to stats of its statement type"""
+        with self.stats_lock:
+            stat = self.stats.setdefault(
+                statement, {"count": 0, "overhead_sec": 0.0, "elapsed_sec": 0.0}
+            )
+            stat["count"] += 1
+            stat["overhead_sec"] += overhead
+            stat["elapsed_sec"] += elapsed
+
+    def get_stats(self):
+        """Gives count and total time of queries by statement type , overhead is the time taken to get cursor before query is executed"""
+        with self.stats_lock:
+            return {
+                statement: {
+                    "count": stat["count"],
+                    "overhead_sec": round(stat["overhead_sec"], 6),
+                    "avg_overhead_sec": round(stat["overhead_sec"] / stat["count"], 6),
+                    "elapsed_sec": round(stat["elapsed_sec"], 4),
+                }
+                for statement, stat in self.stats.items()
+            }
+
+    def get_osm_id_ranges(self, table):
+        """
+        Splits osm_id of table to ranges which are transferred to DuckDB in parallel.
+
+        Parameters:
+        - table (str): Postgres table name.
+
+        Returns:
+        - List of (start, end) osm_id ranges , end is exclusive.
+        """
+        d_b = Database(get_db_connection_params())
+        con, cur = d_b.connect()
+        cur.execute(get_osm_id_bounds_query(table))
+        min_id, max_id = cur.fetchone()
+        d_b.close_conn()
+        return split_osm_id_range(min_id, max_id, DUCK_DB_TRANSFER_PARTITIONS)
+
+    def transfer_tables(
+        self,
+        base_table_name,
+        table_names,
+        cid=None,
+        geometry=None,
+        single_category_where=None,
+    ):
+        """
+        Copies postgres tables to DuckDB , Every table is split into osm_id ranges and ranges of all tables are loaded concurrently.
+
+        Parameters:
+        - base_table_name (str): Prefix of DuckDB tables.
+        - table_names (List[str]): Postgres tables to transfer.
+        - cid (int, optional): Country ID for filtering rows.
+        - geometry (Polygon, optional): Custom polygon geometry for filtering rows.
+        - single_category_where (str, optional): Where clause of single category to filter rows in postgres.
+        """
+        start = time.time()
+        ranges = []
+        for table in table_names:
+            # empty range only creates the table with columns of postgres query
+            self.run_query(
+                postgres2duckdb_query(
+                    base_table_name=base_table_name,
+                    table=table,
+                    cid=cid,
+                    geometry=geometry,
+                    single_category_where=single_category_where,
+                    osm_id_range=(0, 0),
+                ).strip()
+            )
+            ranges.extend(
+                (table, osm_id_range) for osm_id_range in self.get_osm_id_ranges(table)
+            )
+        logging.info(
+            "Transfer-> Postgres Data to DuckDB Started : %s in %s ranges",
+            table_names,
+            len(ranges),
+        )
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=max(DUCK_DB_TRANSFER_WORKERS, 1)
+        ) as executor:
+            futures = [
+                executor.submit(
+                    self.transfer_range,
+                    base_table_name,
+                    table,
+                    osm_id_range,
+                    cid,
+                    geometry,
+                    single_category_where,
+                )
+                for table, osm_id_range in ranges
+            ]
+            rows = sum(
+                future.result() for future in concurrent.futures.as_completed(futures)
+            )
+        elapsed = max(time.time() - start, 1e-6)
+        logging.info(
+            "Transfer-> Postgres Data to DuckDB : %s Done , %s rows in %s (%d rows/s)",
+            table_names,
+            rows,
+            humanize.naturaldelta(timedelta(seconds=elapsed)),
+            rows / elapsed,
+        )
+
+    def transfer_range(
+        self,
+        base_table_name,
+        table,
+        osm_id_range,
+        cid=None,
+        geometry=None,
+        single_category_where=None,
+    ):
+        """Appends rows of osm_id range of postgres table to its DuckDB table and logs rows per second of the range"""
+        start = time.time()
+        insert_query = postgres2duckdb_query(
+            base_table_name=base_table_name,
+            table=table,
+            cid=cid,
+            geometry=geometry,
+            single_category_where=single_category_where,
+            osm_id_range=osm_id_range,
+            insert=True,
+        )
+        logging.debug(insert_query)
+        rows = self.run_query(insert_query.strip())[0][0]
+        elapsed = max(time.time() - start, 1e-6)
+        logging.info(
+            "Transfer-> %s osm_id %s-%s : %s rows in %.1f sec (%d rows/s)",
+            table,
+            osm_id_range[0],
+            osm_id_range[1],
+            rows,
+            elapsed,
+            rows / elapsed,
+        )
+        return rows
+
+    def close(self):
+        """Closes connection of the database"""
+        self.con.close()
+
+
+class DuckDBSnapshotCache:
+    """Per country read only DuckDB snapshots shared by custom exports of all worker processes on the machine
+
+    Every table of a country is a snapshot of its own keyed by cid , table and the last replication import date , so export builds only the tables it needs and first export after the database is updated builds new snapshot and older snapshots of the table are evicted.
+    Snapshot file is never modified once built , it is written to temporary file and renamed so that any number of exports can attach it read only.
+    Building is serialized with an exclusive flock per snapshot , exports hold a shared flock on snapshot while using it so that eviction never removes snapshot in use.
+    Least recently used snapshots are evicted once their size on disk exceeds max_disk_size.
+    """
+
+    SUFFIX = ".duckdb"
+    TABLE_PREFIX = "osm"
+
+    def __init__(self, cache_dir, max_disk_size):
+        self.cache_dir = cache_dir
+        self.max_disk_size = max_disk_size
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def get_snapshot_path(self, cid, table, last_updated):
+        """Gives path of snapshot of table of country for the import date"""
+        version = re.sub(r"[^0-9]", "", str(last_updated or ""))
+        if not version:
+            raise ValueError("Snapshot can't be keyed without replication import date")
+        return os.path.join(
+            self.cache_dir, f"{int(cid)}_{table}_{version}{self.SUFFIX}"
+        )
+
+    @staticmethod
+    def lock(path, operation):
+        """Opens lock file of path and flocks it , Retries if lock file was removed by eviction while waiting for the lock"""
+        while True:
+            lock_file = open(f"{path}.lock", "a", encoding="utf-8")
+            try:
+                fcntl.flock(lock_file, operation)
+            except OSError:
+                lock_file.close()
+                raise
+            if (
+                os.path.exists(lock_file.name)
+                and os.stat(lock_file.name).st_ino
+                == os.fstat(lock_file.fileno()).st_ino
+            ):
+                return lock_file
+            lock_file.close()
+
+    @staticmethod
+    def release(lock_file):
+        """Releases lock returned by lock() or acquire()"""
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+        lock_file.close()
+
+    def acquire(self, cid, table, last_updated, build):
+        """
+        Gives snapshot of table of country , building it with build(path) if it doesn't exist yet.
+
+        Parameters:
+        - cid (int): Country ID.
+        - table (str): Name of osm table.
+        - last_updated (str): Last replication import date of the database.
+        - build (Callable): Function which writes snapshot DuckDB database to given path.
+
+        Returns:
+        - Tuple of snapshot path and its shared lock , lock should be released with release() once snapshot is no longer used.
         """
-        with duckdb.connect(self.db_path) as con:
-            if attach_pgsql:
-                con.execute(
-                    f"""ATTACH '{self.db_con_str}' AS postgres_db (TYPE POSTGRES)"""
+        path = self.get_snapshot_path(cid, table, last_updated)
+        build_lock = self.lock(f"{path}.build", fcntl.LOCK_EX)
+        try:
+            if not os.path.exists(path):
+                temp_path = f"{path}.tmp"
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                start = time.time()
+                build(temp_path)
+                os.replace(temp_path, path)
+                logging.info(
+                    "Built DuckDB snapshot %s of %s in %s",
+                    os.path.basename(path),
+                    humanize.naturalsize(os.path.getsize(path)),
+                    humanize.naturaldelta(timedelta(seconds=(time.time() - start))),
                 )
-                load_spatial = True
-            if load_spatial:
-                con.load_extension("spatial")
-            # con.load_extension("json")
-            con.execute(query)
+            use_lock = self.lock(path, fcntl.LOCK_SH)
+        finally:
+            self.release(build_lock)
+        os.utime(path)  # modification time is used as last access for lru
+        self.evict(keep=path)
+        return path, use_lock
+
+    def evict(self, keep=None):
+        """Removes snapshots of older import dates and least recently used snapshots until disk usage is within limit , Snapshots in use are skipped"""
+        snapshots = []
+        for name in os.listdir(self.cache_dir):
+            key = re.fullmatch(rf"(\d+_[a-z_]+)_(\d+){re.escape(self.SUFFIX)}", name)
+            if key:
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                snapshots.append((stat.st_mtime, path, stat.st_size, *key.groups()))
+        latest = {}
+        for _, _, _, table, version in snapshots:
+            latest[table] = max(latest.get(table, version), version, key=int)
+        total_size = sum(snapshot[2] for snapshot in snapshots)
+        for _, path, size, table, version in sorted(snapshots):
+            if path == keep or (
+                total_size <= self.max_disk_size and latest[table] == version
+            ):
+                continue
+            if self.remove(path):
+                total_size -= size
+
+    def remove(self, path):
+        """Removes snapshot along with its lock files if no export is building or using it"""
+        try:
+            build_lock = self.lock(f"{path}.build", fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+        try:
+            try:
+                use_lock = self.lock(path, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return False
+            removed = os.path.exists(path)  # could be evicted by other worker meanwhile
+            try:
+                if removed:
+                    os.remove(path)
+                os.remove(use_lock.name)
+            finally:
+                self.release(use_lock)
+            os.remove(build_lock.name)
+        finally:
+            self.release(build_lock)
+        if removed:
+            logging.debug("Evicted DuckDB snapshot %s", path)
+        return removed
 
 
 class CustomExport:
@@ -1270,6 +3309,8 @@ class CustomExport:
                 f"{self.default_export_base_name}.db",
             )
             self.duck_db_instance = DuckDB(self.duck_db_db_path)
+        self.snapshot_locks = []
+        self.fanout_stats = {}
 
     def types_to_tables(self, type_list: list):
         """
@@ -1325,17 +3366,18 @@ class CustomExport:
         - Download URL for the uploaded resource.
         """
         if USE_S3_TO_UPLOAD:
-            s3_upload_name = os.path.relpath(
-                resource_path, os.path.join(export_path, self.uuid)
-            )
             file_transfer_obj = S3FileTransfer()
             download_url = file_transfer_obj.upload(
                 resource_path,
-                str(s3_upload_name),
+                self.get_s3_upload_name(resource_path),
             )
             return download_url
         return resource_path
 
+    def get_s3_upload_name(self, resource_path):
+        """Gives key of resource on s3 , relative to export directory of this run"""
+        return str(os.path.relpath(resource_path, os.path.join(export_path, self.uuid)))
+
     def zip_to_s3(self, resources):
         """
         Zips and uploads a list of resources to Amazon S3.
@@ -1346,9 +3388,20 @@ class CustomExport:
         Returns:
         - List of resource dictionaries with added download URLs.
         """
-        for resource in resources:
-            temp_zip_path = resource["url"]
-            resource["url"] = self.upload_resources(resource_path=temp_zip_path)
+        temp_zip_paths = [resource["url"] for resource in resources]
+        if USE_S3_TO_UPLOAD:
+            download_urls = S3FileTransfer().upload_many(
+                [
+                    (temp_zip_path, self.get_s3_upload_name(temp_zip_path))
+                    for temp_zip_path in temp_zip_paths
+                ]
+            )
+        else:
+            download_urls = temp_zip_paths
+        for resource, temp_zip_path, download_url in zip(
+            resources, temp_zip_paths, download_urls
+        ):
+            resource["url"] = download_url
             os.remove(temp_zip_path)
         return resources
 
@@ -1363,15 +3416,18 @@ class CustomExport:
         Returns:
         - Path to the created ZIP file.
         """
-        zf = zipfile.ZipFile(
-            zip_path,
-            "w",
-            compression=zipfile.ZIP_DEFLATED,
-            allowZip64=True,
-        )
+        if ZIP_WORKERS > 1 and not ENABLE_SOZIP:
+            zf = ParallelZipWriter(zip_path)
+        else:
+            zf = zipfile.ZipFile(
+                zip_path,
+                "w",
+                compression=zipfile.ZIP_DEFLATED,
+                allowZip64=True,
+            )
 
         for file_path in pathlib.Path(working_dir).iterdir():
-            zf.write(file_path, arcname=file_path.name)
+            write_to_zip(zf, file_path, arcname=file_path.name)
         utc_now = datetime.now(timezone.utc)
         utc_offset = utc_now.strftime("%z")
         # Adding metadata readme.txt
@@ -1380,10 +3436,343 @@ class CustomExport:
         zf.writestr("Readme.txt", readme_content)
         if self.params.geometry:
             zf.writestr("clipping_boundary.geojson", self.params.geometry.json())
+        log_archive_metrics(zip_path, zf.infolist())
         zf.close()
         shutil.rmtree(working_dir)
         return zip_path
 
+    def materialize_query(
+        self, query, category_name, feature_type, export_formats, file_export_path
+    ):
+        """
+        Materializes result of query once when it is exported to many formats so that every format is written from it instead of running the query per format.
+
+        Parameters:
+        - query (str): SQL query to execute.
+        - category_name (str): Slugified name of the category.
+        - feature_type (str): Feature type.
+        - export_formats (List[str]): List of export formats.
+        - file_export_path (str): Export directory of the category feature type.
+
+        Returns:
+        - Tuple of query to read the result , DuckDB table and spill file holding the result.
+        """
+        fanout_table, spill_path = None, None
+        if len(export_formats) < 2:
+            return query, fanout_table, spill_path
+        materialize_start = time.time()
+        if USE_DUCK_DB_FOR_CUSTOM_EXPORTS is True:
+            fanout_table = f"fanout_{uuid.uuid4().hex}"
+            self.duck_db_instance.run_query(
+                f"""CREATE TABLE {fanout_table} AS {query.strip()}"""
+            )
+            query = f"""SELECT * FROM {fanout_table}"""
+        else:
+            spill_dir = os.path.join(file_export_path, "spill")
+            # layer is named same as result layer of postgres driver so output layer names don't change
+            spill_path = os.path.join(spill_dir, "sql_statement.fgb")
+            run_ogr2ogr_cmd(
+                generate_ogr2ogr_cmd_from_psql(
+                    export_file_path=spill_path,
+                    export_file_format_driver="FlatGeobuf",
+                    postgres_query=query.strip(),
+                    layer_creation_options="SPATIAL_INDEX=NO",
+                    query_dump_path=spill_dir,
+                )
+            )
+        materialize_time = time.time() - materialize_start
+        # write time of every format is added by write_export_format
+        self.fanout_stats[f"{category_name}_{feature_type}"] = {
+            "formats": len(export_formats),
+            "materialize_sec": round(materialize_time, 2),
+            "write_sec": {},
+        }
+        logging.info(
+            "Materialized %s:%s once for %s formats in %s",
+            category_name.lower(),
+            feature_type,
+            len(export_formats),
+            humanize.naturaldelta(timedelta(seconds=materialize_time)),
+        )
+        return query, fanout_table, spill_path
+
+    def drop_materialized(self, fanout_table, spill_path):
+        """Removes result materialized by materialize_query"""
+        if fanout_table:
+            self.duck_db_instance.run_query(f"""DROP TABLE {fanout_table}""")
+        if spill_path:
+            shutil.rmtree(os.path.dirname(spill_path))
+
+    def write_export_format(
+        self,
+        query,
+        spill_path,
+        category_name,
+        feature_type,
+        export_format,
+        file_export_path,
+    ):
+        """
+        Writes result of query to file of export format.
+
+        Parameters:
+        - query (str): SQL query to execute.
+        - spill_path (str): Spill file holding the result , Used instead of query when given.
+        - category_name (str): Slugified name of the category.
+        - feature_type (str): Feature type.
+        - export_format (str): Export format.
+        - file_export_path (str): Export directory of the category feature type.
+
+        Returns:
+        - Tuple of directory of the written file , export file name and ExportTypeInfo of the format.
+        """
+        write_start = time.time()
+        export_format = EXPORT_TYPE_MAPPING.get(export_format)
+        export_format_path = os.path.join(file_export_path, export_format.suffix)
+        os.makedirs(export_format_path, exist_ok=True)
+        logging.info("Processing %s:%s", category_name.lower(), export_format.suffix)
+
+        export_filename = f"""{self.params.dataset.dataset_prefix}_{category_name}_{feature_type}_{export_format.suffix}"""
+        export_file_path = os.path.join(
+            export_format_path, f"{export_filename}.{export_format.suffix}"
+        )
+
+        if os.path.exists(export_file_path):
+            os.remove(export_file_path)
+
+        layer_creation_options_str = (
+            " ".join([f"'{option}'" for option in export_format.layer_creation_options])
+            if export_format.layer_creation_options
+            else ""
+        )
+        if USE_DUCK_DB_FOR_CUSTOM_EXPORTS is True:
+            executable_query = f"""COPY ({query.strip()}) TO '{export_file_path}' WITH (FORMAT {export_format.format_option}{f", DRIVER '{export_format.driver_name}'{f', LAYER_CREATION_OPTIONS {layer_creation_options_str}' if layer_creation_options_str else ''}" if export_format.format_option == 'GDAL' else ''})"""
+            self.duck_db_instance.run_query(executable_query.strip())
+        elif spill_path:
+            run_ogr2ogr_cmd(
+                generate_ogr2ogr_cmd_from_file(
+                    export_file_path=export_file_path,
+                    export_file_format_driver=export_format.driver_name,
+                    source_file_path=spill_path,
+                    layer_creation_options=layer_creation_options_str,
+                )
+            )
+        else:
+            ogr2ogr_cmd = generate_ogr2ogr_cmd_from_psql(
+                export_file_path=export_file_path,
+                export_file_format_driver=export_format.driver_name,
+                postgres_query=query.strip(),
+                layer_creation_options=layer_creation_options_str,
+                query_dump_path=export_format_path,
+            )
+            run_ogr2ogr_cmd(ogr2ogr_cmd)
+        fanout_stats = self.fanout_stats.get(f"{category_name}_{feature_type}")
+        if fanout_stats is not None:
+            fanout_stats["write_sec"][export_format.suffix] = round(
+                time.time() - write_start, 2
+            )
+        return export_format_path, export_filename, export_format
+
+    def zip_export_format(
+        self, export_format_path, export_filename, export_format, file_export_path
+    ):
+        """
+        Zips written export format and describes it as resource.
+
+        Returns:
+        - Resource dictionary containing export information.
+        """
+        zip_file_path = os.path.join(file_export_path, f"{export_filename}.zip")
+        zip_path = self.file_to_zip(export_format_path, zip_file_path)
+
+        resource = {}
+        resource["name"] = f"{export_filename}.zip"
+        resource["url"] = zip_path
+        resource["format"] = export_format.suffix
+        resource["description"] = export_format.driver_name
+        resource["size"] = os.path.getsize(zip_path)
+        resource["last_modifed"] = datetime.now().isoformat()
+        return resource
+
+    def estimate_rows(self, query):
+        """Gives estimated number of rows of category query , Used to start largest work first and to size its memory"""
+        if USE_DUCK_DB_FOR_CUSTOM_EXPORTS is True:
+            # duckdb planner uses fixed selectivity for tag filters , so rows are counted on local tables instead
+            return self.duck_db_instance.run_query(
+                f"""SELECT count(*) FROM ({query}) AS category_query"""
+            )[0][0]
+        d_b = Database(get_db_connection_params())
+        con, cur = d_b.connect()
+        cur.execute(get_explain_query(query))
+        plan = cur.fetchone()[0]
+        d_b.close_conn()
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    def schedule_categories(self, categories):
+        """
+        Runs query , write , zip and upload of every category , feature type and format on single WorkScheduler with budgets of cpu , memory , postgres connections , subprocesses and uploads.
+
+        Parameters:
+        - categories (List[Dict[str, CategoryModel]]): Categories to export.
+
+        Returns:
+        - List of (category, uploaded_resources) tuples.
+        """
+        budgets = {
+            "cpu": CUSTOM_EXPORT_CPU_SLOTS,
+            "pg": CUSTOM_EXPORT_PG_CONNECTIONS,
+            "subprocess": CUSTOM_EXPORT_SUBPROCESSES,
+            "upload": S3_BATCH_UPLOAD_WORKERS,
+        }
+        duck_db_threads, memory_share = 1, 0
+        if USE_DUCK_DB_FOR_CUSTOM_EXPORTS is True:
+            duck_db_threads = int(DUCK_DB_THREAD_LIMIT or CUSTOM_EXPORT_CPU_SLOTS)
+            if DUCK_DB_MEMORY_LIMIT:
+                budgets["memory"] = parse_size(DUCK_DB_MEMORY_LIMIT)
+                memory_share = budgets["memory"] // max(CUSTOM_EXPORT_CPU_SLOTS, 1)
+        scheduler = WorkScheduler(budgets)
+        uploads = []
+
+        def materialize(state, *args):
+            state["query"], state["fanout_table"], state["spill_path"] = (
+                self.materialize_query(state["query"], *args)
+            )
+
+        def write(state, format_state, *args):
+            format_state["written"] = self.write_export_format(
+                state["query"], state["spill_path"], *args
+            )
+
+        def zip_format(format_state, file_export_path):
+            format_state["resource"] = self.zip_export_format(
+                *format_state["written"], file_export_path
+            )
+
+        def upload(format_state):
+            return self.zip_to_s3([format_state["resource"]])[0]
+
+        def drop(state):
+            self.drop_materialized(state["fanout_table"], state["spill_path"])
+
+        for index, category in enumerate(categories):
+            category_name, category_data = list(category.items())[0]
+            category_name = slugify(category_name.lower()).replace("-", "_")
+            export_formats = list(set(category_data.formats))
+            for feature_type in category_data.types:
+                query = self.get_category_query(category_data, feature_type)
+                rows = max(self.estimate_rows(query), 1)
+                # rough in memory size of a row , share of memory is reserved at least
+                memory = max(rows * 512, memory_share)
+                file_export_path = os.path.join(
+                    self.default_export_path, category_name, feature_type
+                )
+                state = {
+                    "query": query,
+                    "fanout_table": None,
+                    "spill_path": None,
+                }
+                unit = f"{index}:{category_name}:{feature_type}"
+                materialized = len(export_formats) > 1
+                if USE_DUCK_DB_FOR_CUSTOM_EXPORTS is True:
+                    query_demands = {"cpu": duck_db_threads, "memory": memory}
+                else:
+                    query_demands = {"cpu": 1, "pg": 1, "subprocess": 1}
+                query_item = scheduler.add(
+                    f"{unit}:query",
+                    partial(
+                        materialize,
+                        state,
+                        category_name,
+                        feature_type,
+                        export_formats,
+                        file_export_path,
+                    ),
+                    cost=rows if materialized else 0,
+                    **(query_demands if materialized else {}),
+                )
+                write_items = []
+                for export_format in export_formats:
+                    format_state = {}
+                    if not materialized:
+                        write_demands = query_demands
+                    elif USE_DUCK_DB_FOR_CUSTOM_EXPORTS is True:
+                        write_demands = {
+                            "cpu": (
+                                duck_db_threads
+                                if EXPORT_TYPE_MAPPING[export_format].format_option
+                                != "GDAL"
+                                else 1
+                            ),
+                            "memory": memory_share,
+                        }
+                    else:
+                        write_demands = {"cpu": 1, "subprocess": 1}
+                    write_items.append(
+                        scheduler.add(
+                            f"{unit}:{export_format}:write",
+                            partial(
+                                write,
+                                state,
+                                format_state,
+                                category_name,
+                                feature_type,
+                                export_format,
+                                file_export_path,
+                            ),
+                            deps=[query_item],
+                            cost=rows,
+                            **write_demands,
+                        )
+                    )
+                    zip_item = scheduler.add(
+                        f"{unit}:{export_format}:zip",
+                        partial(zip_format, format_state, file_export_path),
+                        deps=[write_items[-1]],
+                        cost=rows // 2,
+                        cpu=(
+                            ZIP_WORKERS if ZIP_WORKERS > 1 and not ENABLE_SOZIP else 1
+                        ),
+                    )
+                    uploads.append(
+                        (
+                            index,
+                            scheduler.add(
+                                f"{unit}:{export_format}:upload",
+                                partial(upload, format_state),
+                                deps=[zip_item],
+                                cost=rows // 4,
+                                upload=1,
+                            ),
+                        )
+                    )
+                scheduler.add(
+                    f"{unit}:drop", partial(drop, state), deps=write_items, cost=0
+                )
+        start = time.time()
+        logging.info(
+            "Scheduling %s work items of %s categories with budgets %s",
+            len(scheduler.items),
+            len(categories),
+            budgets,
+        )
+        results = scheduler.run()
+        logging.info(
+            "Done scheduled work of %s categories in %s",
+            len(categories),
+            humanize.naturaldelta(timedelta(seconds=(time.time() - start))),
+        )
+        return [
+            (
+                category,
+                [
+                    results[name]
+                    for category_index, name in uploads
+                    if category_index == index
+                ],
+            )
+            for index, category in enumerate(categories)
+        ]
+
     def query_to_file(self, query, category_name, feature_type, export_formats):
         """
         Executes a query and exports the result to file(s).
@@ -1402,97 +3791,68 @@ class CustomExport:
             self.default_export_path, category_name, feature_type
         )
         resources = []
+        query, fanout_table, spill_path = self.materialize_query(
+            query, category_name, feature_type, export_formats, file_export_path
+        )
 
         def process_export_format(export_format):
-            export_format = EXPORT_TYPE_MAPPING.get(export_format)
-            export_format_path = os.path.join(file_export_path, export_format.suffix)
-            os.makedirs(export_format_path, exist_ok=True)
             start = time.time()
-            logging.info(
-                "Processing %s:%s", category_name.lower(), export_format.suffix
-            )
-
-            export_filename = f"""{self.params.dataset.dataset_prefix}_{category_name}_{feature_type}_{export_format.suffix}"""
-            export_file_path = os.path.join(
-                export_format_path, f"{export_filename}.{export_format.suffix}"
-            )
-
-            if os.path.exists(export_file_path):
-                os.remove(export_file_path)
-
-            layer_creation_options_str = (
-                " ".join(
-                    [f"'{option}'" for option in export_format.layer_creation_options]
-                )
-                if export_format.layer_creation_options
-                else ""
+            resource = self.zip_export_format(
+                *self.write_export_format(
+                    query,
+                    spill_path,
+                    category_name,
+                    feature_type,
+                    export_format,
+                    file_export_path,
+                ),
+                file_export_path,
             )
-            if USE_DUCK_DB_FOR_CUSTOM_EXPORTS is True:
-                executable_query = f"""COPY ({query.strip()}) TO '{export_file_path}' WITH (FORMAT {export_format.format_option}{f", DRIVER '{export_format.driver_name}'{f', LAYER_CREATION_OPTIONS {layer_creation_options_str}' if layer_creation_options_str else ''}" if export_format.format_option == 'GDAL' else ''})"""
-                self.duck_db_instance.run_query(
-                    executable_query.strip(), load_spatial=True
-                )
-            else:
-                ogr2ogr_cmd = generate_ogr2ogr_cmd_from_psql(
-                    export_file_path=export_file_path,
-                    export_file_format_driver=export_format.driver_name,
-                    postgres_query=query.strip(),
-                    layer_creation_options=layer_creation_options_str,
-                    query_dump_path=export_format_path,
-                )
-                run_ogr2ogr_cmd(ogr2ogr_cmd)
-
-            zip_file_path = os.path.join(file_export_path, f"{export_filename}.zip")
-            zip_path = self.file_to_zip(export_format_path, zip_file_path)
-
-            resource = {}
-            resource["name"] = f"{export_filename}.zip"
-            resource["url"] = zip_path
-            resource["format"] = export_format.suffix
-            resource["description"] = export_format.driver_name
-            resource["size"] = os.path.getsize(zip_path)
-            resource["last_modifed"] = datetime.now().isoformat()
             logging.info(
                 "Done %s:%s in %s",
                 category_name.lower(),
-                export_format.suffix,
+                resource["format"],
                 humanize.naturaldelta(timedelta(seconds=(time.time() - start))),
             )
             return resource
 
-        if (
-            self.parallel_process_state is False
-            and len(export_formats) > 1
-            and PARALLEL_PROCESSING_CATEGORIES is True
-        ):
-            logging.info(
-                "Using Parallel Processing for %s Export formats with total %s workers",
-                category_name.lower(),
-                MAX_WORKERS,
-            )
-            with concurrent.futures.ThreadPoolExecutor(
-                max_workers=int(MAX_WORKERS)
-            ) as executor:
-                futures = [
-                    executor.submit(process_export_format, export_format)
-                    for export_format in export_formats
-                ]
-                resources = [
-                    future.result()
-                    for future in concurrent.futures.as_completed(futures)
-                ]
-                resources = [
-                    future.result()
-                    for future in tqdm(
-                        concurrent.futures.as_completed(futures),
-                        total=len(futures),
-                        desc=f"{category_name.lower()}: Processing Export Formats",
-                    )
-                ]
-        else:
-            for exf in export_formats:
-                resource = process_export_format(exf)
-                resources.append(resource)
+        try:
+            if (
+                self.parallel_process_state is False
+                and len(export_formats) > 1
+                and PARALLEL_PROCESSING_CATEGORIES is True
+            ):
+                logging.info(
+                    "Using Parallel Processing for %s Export formats with total %s workers",
+                    category_name.lower(),
+                    MAX_WORKERS,
+                )
+                with concurrent.futures.ThreadPoolExecutor(
+                    max_workers=int(MAX_WORKERS)
+                ) as executor:
+                    futures = [
+                        executor.submit(process_export_format, export_format)
+                        for export_format in export_formats
+                    ]
+                    resources = [
+                        future.result()
+                        for future in concurrent.futures.as_completed(futures)
+                    ]
+                    resources = [
+                        future.result()
+                        for future in tqdm(
+                            concurrent.futures.as_completed(futures),
+                            total=len(futures),
+                            desc=f"{category_name.lower()}: Processing Export Formats",
+                        )
+                    ]
+            else:
+                for exf in export_formats:
+                    resource = process_export_format(exf)
+                    resources.append(resource)
+        finally:
+            # executor waits for running formats so result is dropped only after all of them are done
+            self.drop_materialized(fanout_table, spill_path)
         return resources
 
     def process_category_result(self, category_result):
@@ -1516,6 +3876,32 @@ class CustomExport:
             category_result.uploaded_resources, category_result.category
         )
 
+    def get_category_query(self, category_data, feature_type):
+        """
+        Generates extraction query of category for feature type.
+
+        Parameters:
+        - category_data (CategoryModel): Category settings.
+        - feature_type (str): Feature type.
+
+        Returns:
+        - Extraction query.
+        """
+        return extract_features_custom_exports(
+            self.iso3 if self.iso3 else self.params.dataset.dataset_prefix,
+            category_data.select,
+            feature_type,
+            (
+                self.format_where_clause_duckdb(category_data.where)
+                if USE_DUCK_DB_FOR_CUSTOM_EXPORTS is True
+                else category_data.where
+            ),
+            geometry=self.params.geometry if self.params.geometry else None,
+            cid=self.cid,
+            precision=category_data.precision,
+            simplify_tolerance=category_data.simplify_tolerance,
+        )
+
     def process_category(self, category):
         """
         Processes a category by executing queries and handling exports.
@@ -1529,29 +3915,19 @@ class CustomExport:
         category_name, category_data = list(category.items())[0]
         category_start_time = time.time()
         logging.info("Started Processing %s", category_name)
-        all_uploaded_resources = []
+        all_resources = []
         for feature_type in category_data.types:
-            extract_query = extract_features_custom_exports(
-                self.iso3 if self.iso3 else self.params.dataset.dataset_prefix,
-                category_data.select,
-                feature_type,
-                (
-                    self.format_where_clause_duckdb(category_data.where)
-                    if USE_DUCK_DB_FOR_CUSTOM_EXPORTS is True
-                    else category_data.where
-                ),
-                geometry=self.params.geometry if self.params.geometry else None,
-                cid=self.cid,
-            )
-            resources = self.query_to_file(
-                extract_query,
-                category_name,
-                feature_type,
-                list(set(category_data.formats)),
+            extract_query = self.get_category_query(category_data, feature_type)
+            all_resources.extend(
+                self.query_to_file(
+                    extract_query,
+                    category_name,
+                    feature_type,
+                    list(set(category_data.formats)),
+                )
             )
-
-            uploaded_resources = self.zip_to_s3(resources)
-            all_uploaded_resources.extend(uploaded_resources)
+        # resources of all feature types are uploaded together as single batch
+        all_uploaded_resources = self.zip_to_s3(all_resources)
         logging.info(
             "Done Processing %s in %s ",
             category_name,
@@ -1629,12 +4005,67 @@ class CustomExport:
         """
         Cleans up temporary resources.
         """
+        if USE_DUCK_DB_FOR_CUSTOM_EXPORTS is True:
+            self.duck_db_instance.close()
+        for snapshot_lock in self.snapshot_locks:
+            DuckDBSnapshotCache.release(snapshot_lock)
+        self.snapshot_locks = []
         temp_dir = os.path.join(export_path, self.uuid)
         if os.path.exists(temp_dir):
             shutil.rmtree(temp_dir)
             return True
         return False
 
+    def build_snapshot(self, table, snapshot_path):
+        """Copies table of the country from postgres to new DuckDB database at snapshot_path"""
+        snapshot_db = DuckDB(snapshot_path)
+        try:
+            snapshot_db.transfer_tables(
+                DuckDBSnapshotCache.TABLE_PREFIX, [table], cid=self.cid
+            )
+        finally:
+            snapshot_db.close()
+
+    def attach_snapshot(self, base_table_name, table_names):
+        """
+        Attaches shared snapshots of the tables of the country instead of copying them from postgres , Tables are created as views of the snapshots and missing snapshots are built.
+
+        Parameters:
+        - base_table_name (str): Prefix of DuckDB tables.
+        - table_names (List[str]): Tables used by categories.
+
+        Returns:
+        - bool: False if replication import date is not available to key the snapshot , Tables are then to be transferred from postgres.
+        """
+        d_b = Database(get_db_connection_params())
+        con, cur = d_b.connect()
+        cur.execute(check_last_updated_rawdata())
+        result = cur.fetchone()
+        d_b.close_conn()
+        last_updated = result[0] if result else None
+        if not last_updated:
+            logging.warning(
+                "Replication import date is not available , Transferring tables of %s without snapshot",
+                self.cid,
+            )
+            return False
+        snapshot_cache = DuckDBSnapshotCache(
+            DUCK_DB_SNAPSHOT_CACHE_DIR, DUCK_DB_SNAPSHOT_CACHE_MAX_DISK_SIZE
+        )
+        for table in table_names:
+            snapshot_path, snapshot_lock = snapshot_cache.acquire(
+                self.cid, table, last_updated, partial(self.build_snapshot, table)
+            )
+            self.snapshot_locks.append(snapshot_lock)
+            logging.info("Using DuckDB snapshot %s", os.path.basename(snapshot_path))
+            self.duck_db_instance.run_query(
+                f"""ATTACH '{snapshot_path}' AS snapshot_{table} (READ_ONLY)"""
+            )
+            self.duck_db_instance.run_query(
+                f"""CREATE VIEW {base_table_name}_{table} AS SELECT * FROM snapshot_{table}.{DuckDBSnapshotCache.TABLE_PREFIX}_{table}"""
+            )
+        return True
+
     def process_custom_categories(self):
         """
         Processes HDX tags and executes category processing in parallel.
@@ -1667,23 +4098,20 @@ class CustomExport:
             base_table_name = (
                 self.iso3 if self.iso3 else self.params.dataset.dataset_prefix
             )
-            for table in table_names:
-                create_table = postgres2duckdb_query(
-                    base_table_name=base_table_name,
-                    table=table,
+            # single category is filtered while transferring , which copies less than snapshot of whole table
+            if not (
+                ENABLE_DUCK_DB_SNAPSHOT_CACHE is True
+                and self.cid
+                and where_0_category is None
+                and self.attach_snapshot(base_table_name, table_names)
+            ):
+                self.duck_db_instance.transfer_tables(
+                    base_table_name,
+                    table_names,
                     cid=self.cid,
                     geometry=self.params.geometry,
                     single_category_where=where_0_category,
                 )
-                logging.debug(create_table)
-                start = time.time()
-                logging.info("Transfer-> Postgres Data to DuckDB Started : %s", table)
-                self.duck_db_instance.run_query(create_table.strip(), attach_pgsql=True)
-                logging.info(
-                    "Transfer-> Postgres Data to DuckDB : %s Done in %s",
-                    table,
-                    humanize.naturaldelta(timedelta(seconds=(time.time() - start))),
-                )
 
         CategoryResult = namedtuple(
             "CategoryResult", ["category", "uploaded_resources"]
@@ -1691,7 +4119,16 @@ class CustomExport:
 
         tag_process_results = []
         dataset_results = []
-        if len(self.params.categories) > 1 and PARALLEL_PROCESSING_CATEGORIES is True:
+        if ENABLE_CUSTOM_EXPORT_SCHEDULER is True:
+            for category, uploaded_resources in self.schedule_categories(
+                self.params.categories
+            ):
+                tag_process_results.append(
+                    CategoryResult(
+                        category=category, uploaded_resources=uploaded_resources
+                    )
+                )
+        elif len(self.params.categories) > 1 and PARALLEL_PROCESSING_CATEGORIES is True:
             self.parallel_process_state = True
             logging.info("Starting to Use Parallel Processes")
             with concurrent.futures.ThreadPoolExecutor(
@@ -1739,8 +4176,15 @@ class CustomExport:
                     "DB_DUMP",
                 )
                 os.makedirs(db_dump_path, exist_ok=True)
-                export_db = f"""EXPORT DATABASE '{db_dump_path}' (FORMAT PARQUET, COMPRESSION ZSTD, ROW_GROUP_SIZE 100000);"""
-                self.duck_db_instance.run_query(export_db, load_spatial=True)
+                if self.snapshot_locks:
+                    # tables are views of the snapshot whose rows aren't dumped by EXPORT DATABASE
+                    for table in table_names:
+                        self.duck_db_instance.run_query(
+                            f"""COPY (SELECT * FROM {base_table_name}_{table}) TO '{os.path.join(db_dump_path, f"{base_table_name}_{table}.parquet")}' (FORMAT PARQUET, COMPRESSION ZSTD, ROW_GROUP_SIZE 100000)"""
+                        )
+                else:
+                    export_db = f"""EXPORT DATABASE '{db_dump_path}' (FORMAT PARQUET, COMPRESSION ZSTD, ROW_GROUP_SIZE 100000);"""
+                    self.duck_db_instance.run_query(export_db)
                 db_zip_download_url = self.upload_resources(
                     self.file_to_zip(
                         working_dir=db_dump_path,
@@ -1753,6 +4197,10 @@ class CustomExport:
             timedelta(seconds=(processing_time_close - processing_time_start))
         )
         result["started_at"] = started_at
+        if USE_DUCK_DB_FOR_CUSTOM_EXPORTS is True:
+            result["duckdb_query_stats"] = self.duck_db_instance.get_stats()
+        if self.fanout_stats:
+            result["fanout_stats"] = self.fanout_stats
 
         meta_last_run_dump_path = os.path.join(self.default_export_path, "meta.json")
         with open(meta_last_run_dump_path, "w", encoding="UTF-8") as json_file:
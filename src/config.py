@@ -71,6 +71,31 @@ EXPORT_MAX_AREA_SQKM = os.environ.get("EXPORT_MAX_AREA_SQKM") or int(
     config.get("API_CONFIG", "EXPORT_MAX_AREA_SQKM", fallback=100000)
 )
 
+# rejects snapshot requests whose estimated output is bigger than this , 0 disables it
+EXPORT_MAX_ESTIMATED_BYTES = int(
+    os.environ.get("EXPORT_MAX_ESTIMATED_BYTES")
+    or config.get("API_CONFIG", "EXPORT_MAX_ESTIMATED_BYTES", fallback=0)
+)
+
+PLAIN_GEOJSON_MAX_AREA_SQKM = int(
+    os.environ.get("PLAIN_GEOJSON_MAX_AREA_SQKM")
+    or config.get("API_CONFIG", "PLAIN_GEOJSON_MAX_AREA_SQKM", fallback=10)
+)
+
+COUNTRIES_CACHE_VERSION_CHECK_INTERVAL = int(
+    os.environ.get("COUNTRIES_CACHE_VERSION_CHECK_INTERVAL")
+    or config.get("API_CONFIG", "COUNTRIES_CACHE_VERSION_CHECK_INTERVAL", fallback=60)
+)
+
+COUNTRIES_CACHE_MAX_ENTRIES = int(
+    os.environ.get("COUNTRIES_CACHE_MAX_ENTRIES")
+    or config.get("API_CONFIG", "COUNTRIES_CACHE_MAX_ENTRIES", fallback=256)
+)
+S3_API_MAX_THREADS = int(
+    os.environ.get("S3_API_MAX_THREADS")
+    or config.get("API_CONFIG", "S3_API_MAX_THREADS", fallback=16)
+)
+
 
 INDEX_THRESHOLD = os.environ.get("INDEX_THRESHOLD") or int(
     config.get("API_CONFIG", "INDEX_THRESHOLD", fallback=5000)
@@ -123,6 +148,37 @@ if FILE_UPLOAD_METHOD.lower() == "s3":
     if not BUCKET_NAME:
         raise ValueError("Value of BUCKET_NAME couldn't found")
 
+# streaming upload , geojson exports are zipped and uploaded to s3 while rows are still being fetched without writing intermediate files
+ENABLE_STREAMING_UPLOAD = get_bool_env_var(
+    "ENABLE_STREAMING_UPLOAD",
+    config.getboolean("EXPORT_UPLOAD", "ENABLE_STREAMING_UPLOAD", fallback=False),
+)
+S3_MULTIPART_PART_SIZE = int(
+    os.environ.get("S3_MULTIPART_PART_SIZE")
+    or config.get("EXPORT_UPLOAD", "S3_MULTIPART_PART_SIZE", fallback=16 * 1024**2)
+)
+S3_UPLOAD_WORKERS = int(
+    os.environ.get("S3_UPLOAD_WORKERS")
+    or config.get("EXPORT_UPLOAD", "S3_UPLOAD_WORKERS", fallback=4)
+)
+S3_UPLOAD_PART_RETRIES = int(
+    os.environ.get("S3_UPLOAD_PART_RETRIES")
+    or config.get("EXPORT_UPLOAD", "S3_UPLOAD_PART_RETRIES", fallback=3)
+)
+# managed transfer settings of the s3 client shared by all uploads in a process
+S3_MULTIPART_THRESHOLD = int(
+    os.environ.get("S3_MULTIPART_THRESHOLD")
+    or config.get("EXPORT_UPLOAD", "S3_MULTIPART_THRESHOLD", fallback=16 * 1024**2)
+)
+S3_MAX_CONCURRENCY = int(
+    os.environ.get("S3_MAX_CONCURRENCY")
+    or config.get("EXPORT_UPLOAD", "S3_MAX_CONCURRENCY", fallback=10)
+)
+S3_BATCH_UPLOAD_WORKERS = int(
+    os.environ.get("S3_BATCH_UPLOAD_WORKERS")
+    or config.get("EXPORT_UPLOAD", "S3_BATCH_UPLOAD_WORKERS", fallback=4)
+)
+
 ##################
 
 ## SENTRY BLOCK ########
@@ -190,6 +246,15 @@ ENABLE_SOZIP = get_bool_env_var(
     config.getboolean("API_CONFIG", "ENABLE_SOZIP", fallback=False),
 )
 
+ZIP_COMPRESSION_LEVEL = int(
+    os.environ.get("ZIP_COMPRESSION_LEVEL")
+    or config.get("API_CONFIG", "ZIP_COMPRESSION_LEVEL", fallback=9)
+)
+
+ZIP_WORKERS = int(
+    os.environ.get("ZIP_WORKERS") or config.get("API_CONFIG", "ZIP_WORKERS", fallback=1)
+)
+
 ENABLE_TILES = get_bool_env_var(
     "ENABLE_TILES", config.getboolean("API_CONFIG", "ENABLE_TILES", fallback=False)
 )
@@ -200,6 +265,69 @@ USE_CONNECTION_POOLING = get_bool_env_var(
     config.getboolean("API_CONFIG", "USE_CONNECTION_POOLING", fallback=False),
 )
 
+# runs per table extraction queries of geojson exports concurrently on separate connections
+PARALLEL_TABLE_EXTRACTION = get_bool_env_var(
+    "PARALLEL_TABLE_EXTRACTION",
+    config.getboolean("API_CONFIG", "PARALLEL_TABLE_EXTRACTION", fallback=False),
+)
+
+# splits large request geometry into chunks which are extracted concurrently
+ENABLE_CHUNKED_EXTRACTION = get_bool_env_var(
+    "ENABLE_CHUNKED_EXTRACTION",
+    config.getboolean("API_CONFIG", "ENABLE_CHUNKED_EXTRACTION", fallback=False),
+)
+CHUNKED_EXTRACTION_MIN_AREA_SQKM = int(
+    os.environ.get("CHUNKED_EXTRACTION_MIN_AREA_SQKM")
+    or config.get("API_CONFIG", "CHUNKED_EXTRACTION_MIN_AREA_SQKM", fallback=10000)
+)
+CHUNKED_EXTRACTION_GRID_SIZE = float(
+    os.environ.get("CHUNKED_EXTRACTION_GRID_SIZE")
+    or config.get("API_CONFIG", "CHUNKED_EXTRACTION_GRID_SIZE", fallback=1.0)
+)
+CHUNKED_EXTRACTION_MAX_VERTICES = int(
+    os.environ.get("CHUNKED_EXTRACTION_MAX_VERTICES")
+    or config.get("API_CONFIG", "CHUNKED_EXTRACTION_MAX_VERTICES", fallback=256)
+)
+
+# writes geoparquet and flatgeobuf in process from the extraction cursor instead of ogr2ogr
+USE_NATIVE_WRITERS = get_bool_env_var(
+    "USE_NATIVE_WRITERS",
+    config.getboolean("API_CONFIG", "USE_NATIVE_WRITERS", fallback=False),
+)
+GEOPARQUET_ROW_GROUP_SIZE = int(
+    os.environ.get("GEOPARQUET_ROW_GROUP_SIZE")
+    or config.get("API_CONFIG", "GEOPARQUET_ROW_GROUP_SIZE", fallback=65536)
+)
+GEOPARQUET_COMPRESSION = os.environ.get("GEOPARQUET_COMPRESSION") or config.get(
+    "API_CONFIG", "GEOPARQUET_COMPRESSION", fallback="zstd"
+)
+
+# subdivides request geometry to parts of at most these vertices for intersects filter , 0 disables it
+CLIPPING_BOUNDARY_SUBDIVIDE_VERTICES = int(
+    os.environ.get("CLIPPING_BOUNDARY_SUBDIVIDE_VERTICES")
+    or config.get("API_CONFIG", "CLIPPING_BOUNDARY_SUBDIVIDE_VERTICES", fallback=0)
+)
+
+# export result cache , reuses already generated artifacts for identical requests against same db snapshot
+ENABLE_EXPORT_CACHE = get_bool_env_var(
+    "ENABLE_EXPORT_CACHE",
+    config.getboolean("API_CONFIG", "ENABLE_EXPORT_CACHE", fallback=False),
+)
+EXPORT_CACHE_TTL = int(
+    os.environ.get("EXPORT_CACHE_TTL")
+    or config.get("API_CONFIG", "EXPORT_CACHE_TTL", fallback=24 * 60 * 60)
+)
+EXPORT_CACHE_MAX_DISK_SIZE = int(
+    os.environ.get("EXPORT_CACHE_MAX_DISK_SIZE")
+    or config.get("API_CONFIG", "EXPORT_CACHE_MAX_DISK_SIZE", fallback=10 * 1024**3)
+)
+
+# delta exports , recurring exports additionally produce file of features changed since their previous run
+ENABLE_DELTA_EXPORTS = get_bool_env_var(
+    "ENABLE_DELTA_EXPORTS",
+    config.getboolean("API_CONFIG", "ENABLE_DELTA_EXPORTS", fallback=False),
+)
+
 # Queue
 
 DEFAULT_QUEUE_NAME = os.environ.get("DEFAULT_QUEUE_NAME") or config.get(
@@ -208,6 +336,19 @@ DEFAULT_QUEUE_NAME = os.environ.get("DEFAULT_QUEUE_NAME") or config.get(
 ONDEMAND_QUEUE_NAME = os.environ.get("ONDEMAND_QUEUE_NAME") or config.get(
     "API_CONFIG", "ONDEMAND_QUEUE_NAME", fallback="raw_ondemand"
 )
+EXPRESS_QUEUE_NAME = os.environ.get("EXPRESS_QUEUE_NAME") or config.get(
+    "API_CONFIG", "EXPRESS_QUEUE_NAME", fallback="raw_express"
+)
+
+# routes cheap snapshot requests to express queue based on their cost score
+ENABLE_QUEUE_ROUTING = get_bool_env_var(
+    "ENABLE_QUEUE_ROUTING",
+    config.getboolean("API_CONFIG", "ENABLE_QUEUE_ROUTING", fallback=False),
+)
+EXPRESS_QUEUE_MAX_COST = float(
+    os.environ.get("EXPRESS_QUEUE_MAX_COST")
+    or config.get("API_CONFIG", "EXPRESS_QUEUE_MAX_COST", fallback=100)
+)
 
 # Polygon statistics which will deliver the stats of approx buildings/ roads in the area
 
@@ -252,12 +393,59 @@ if USE_DUCK_DB_FOR_CUSTOM_EXPORTS:
     DUCK_DB_THREAD_LIMIT = os.environ.get("DUCK_DB_THREAD_LIMIT") or config.get(
         "API_CONFIG", "DUCK_DB_THREAD_LIMIT", fallback=None
     )
+    DUCK_DB_TRANSFER_PARTITIONS = int(
+        os.environ.get("DUCK_DB_TRANSFER_PARTITIONS")
+        or config.get("API_CONFIG", "DUCK_DB_TRANSFER_PARTITIONS", fallback=4)
+    )
+    DUCK_DB_TRANSFER_WORKERS = int(
+        os.environ.get("DUCK_DB_TRANSFER_WORKERS")
+        or config.get("API_CONFIG", "DUCK_DB_TRANSFER_WORKERS", fallback=4)
+    )
+    # per country snapshots reused by custom exports of all workers on the machine
+    ENABLE_DUCK_DB_SNAPSHOT_CACHE = get_bool_env_var(
+        "ENABLE_DUCK_DB_SNAPSHOT_CACHE",
+        config.getboolean(
+            "API_CONFIG", "ENABLE_DUCK_DB_SNAPSHOT_CACHE", fallback=False
+        ),
+    )
+    DUCK_DB_SNAPSHOT_CACHE_DIR = os.environ.get(
+        "DUCK_DB_SNAPSHOT_CACHE_DIR"
+    ) or config.get(
+        "API_CONFIG",
+        "DUCK_DB_SNAPSHOT_CACHE_DIR",
+        fallback=os.path.join(EXPORT_PATH, "duckdb_snapshots"),
+    )
+    DUCK_DB_SNAPSHOT_CACHE_MAX_DISK_SIZE = int(
+        os.environ.get("DUCK_DB_SNAPSHOT_CACHE_MAX_DISK_SIZE")
+        or config.get(
+            "API_CONFIG",
+            "DUCK_DB_SNAPSHOT_CACHE_MAX_DISK_SIZE",
+            fallback=50 * 1024**3,
+        )
+    )
 
 # hdx and custom exports
 ENABLE_CUSTOM_EXPORTS = get_bool_env_var(
     "ENABLE_CUSTOM_EXPORTS",
     config.getboolean("API_CONFIG", "ENABLE_CUSTOM_EXPORTS", fallback=False),
 )
+# single scheduler for category , format work of custom exports with budgets of shared resources
+ENABLE_CUSTOM_EXPORT_SCHEDULER = get_bool_env_var(
+    "ENABLE_CUSTOM_EXPORT_SCHEDULER",
+    config.getboolean("API_CONFIG", "ENABLE_CUSTOM_EXPORT_SCHEDULER", fallback=False),
+)
+CUSTOM_EXPORT_CPU_SLOTS = int(
+    os.environ.get("CUSTOM_EXPORT_CPU_SLOTS")
+    or config.get("API_CONFIG", "CUSTOM_EXPORT_CPU_SLOTS", fallback=os.cpu_count())
+)
+CUSTOM_EXPORT_PG_CONNECTIONS = int(
+    os.environ.get("CUSTOM_EXPORT_PG_CONNECTIONS")
+    or config.get("API_CONFIG", "CUSTOM_EXPORT_PG_CONNECTIONS", fallback=4)
+)
+CUSTOM_EXPORT_SUBPROCESSES = int(
+    os.environ.get("CUSTOM_EXPORT_SUBPROCESSES")
+    or config.get("API_CONFIG", "CUSTOM_EXPORT_SUBPROCESSES", fallback=os.cpu_count())
+)
 
 HDX_SOFT_TASK_LIMIT = os.environ.get("HDX_SOFT_TASK_LIMIT") or config.get(
     "HDX", "HDX_SOFT_TASK_LIMIT", fallback=5 * 60 * 60
@@ -18,11 +18,15 @@
 # <info@hotosm.org>
 """Page Contains Query logic required for application"""
 import re
+from datetime import timezone
 from json import dumps, loads
 
 from geomet import wkt
 
-from src.config import USE_DUCK_DB_FOR_CUSTOM_EXPORTS
+from src.config import (
+    CLIPPING_BOUNDARY_SUBDIVIDE_VERTICES,
+    USE_DUCK_DB_FOR_CUSTOM_EXPORTS,
+)
 from src.config import logger as logging
 from src.validation.models import SupportedFilters, SupportedGeometryFilters
 
@@ -82,6 +86,25 @@ def check_exisiting_country(geom):
     return query
 
 
+def create_geom_column(use_centroid=False, precision=None, simplify_tolerance=None):
+    """generates geom column of select , simplification is applied before coordinates are reduced to precision decimal digits"""
+    geom = "geom"
+    if use_centroid:
+        geom = "ST_Centroid(geom)"
+    elif simplify_tolerance:
+        geom = f"ST_SimplifyPreserveTopology(geom, {float(simplify_tolerance)})"
+    if precision is not None:
+        geom = f"ST_ReducePrecision({geom}, {10 ** -int(precision)})"
+    return "geom" if geom == "geom" else f"{geom} as geom"
+
+
+def create_geojson_row(alias, precision=None):
+    """generates ST_AsGeoJSON of row , output is limited to precision decimal digits if passed"""
+    if precision is not None:
+        return f"ST_AsGeoJSON({alias}.*, 'geom', {int(precision)})"
+    return f"ST_AsGeoJSON({alias}.*)"
+
+
 def get_query_as_geojson(query_list, ogr_export=None):
     table_base_query = []
     if ogr_export:
@@ -95,13 +118,36 @@ def get_query_as_geojson(query_list, ogr_export=None):
     return final_query
 
 
-def create_geom_filter(geom, geom_lookup_by="ST_intersects"):
-    """generates geometry intersection filter - Rawdata extraction"""
+def create_geom_filter(
+    geom, geom_lookup_by="ST_intersects", use_clipping_boundary=False
+):
+    """generates geometry intersection filter - Rawdata extraction
+
+    use_clipping_boundary refers to the geometry prepared once by create_clipping_boundary_cte instead of parsing it again in the filter
+    """
+    if use_clipping_boundary:
+        if CLIPPING_BOUNDARY_SUBDIVIDE_VERTICES and geom_lookup_by == "ST_intersects":
+            return f"""(geom && (select geom from clipping_boundary) and exists (select 1 from clipping_boundary_parts where ST_intersects(geom,part)))"""
+        return f"""{geom_lookup_by}(geom,(select geom from clipping_boundary))"""
     geometry_dump = dumps(loads(geom.model_dump_json()))
     # return f"""{geom_lookup_by}(geom,ST_Buffer((select ST_Union(ST_makeValid(ST_GEOMFROMGEOJSON('{geometry_dump}')))),0.005))"""
     return f"""{geom_lookup_by}(geom,(select ST_Union(ST_makeValid(ST_GEOMFROMGEOJSON('{geometry_dump}')))))"""
 
 
+def create_clipping_boundary_cte(geom):
+    """generates cte which parses , validates and unions request geometry once per query so that every per table subquery can reuse it - Rawdata extraction"""
+    geometry_dump = dumps(loads(geom.model_dump_json()))
+    cte = f"""WITH clipping_boundary AS MATERIALIZED (select ST_Union(ST_makeValid(ST_GEOMFROMGEOJSON('{geometry_dump}'))) as geom)"""
+    if CLIPPING_BOUNDARY_SUBDIVIDE_VERTICES:
+        cte += f""", clipping_boundary_parts AS MATERIALIZED (select ST_Subdivide(geom, {int(CLIPPING_BOUNDARY_SUBDIVIDE_VERTICES)}) as part from clipping_boundary)"""
+    return cte
+
+
+def wrap_ogr_query(query, cte):
+    """ogr2ogr runs only queries starting with select through a cursor , so query using cte is wrapped as subquery"""
+    return f"""select * from ({cte} {query}) as export_query"""
+
+
 def format_file_name_str(input_str):
     # Fixme I need to check every possible special character that can comeup on osm tags
     input_str = re.sub("\s+", "_", input_str)  # putting _ in every space  # noqa
@@ -124,6 +170,8 @@ def create_column_filter(
     output_type="geojson",
     use_centroid=False,
     include_osm_type=True,
+    precision=None,
+    simplify_tolerance=None,
 ):
     """generates column filter , which will be used to filter column in output will be used on select query - Rawdata extraction"""
 
@@ -154,32 +202,41 @@ def create_column_filter(
             filter_col.append("ST_Y(ST_Centroid(geom)) as latitude")
             filter_col.append("GeometryType(geom) as geom_type")
         else:
-            filter_col.append("ST_Centroid(geom) as geom" if use_centroid else "geom")
+            filter_col.append(
+                create_geom_column(use_centroid, precision, simplify_tolerance)
+            )
         select_condition = " , ".join(filter_col)
         if create_schema:
             return select_condition, schema
         return select_condition
     else:
-        return f"osm_id, tableoid::regclass AS osm_type, tags,changeset,timestamp,{'ST_Centroid(geom) as geom' if use_centroid else 'geom'}"  # this is default attribute that we will deliver to user if user defines his own attribute column then those will be appended with osm_id only
+        return f"osm_id, tableoid::regclass AS osm_type, tags,changeset,timestamp,{create_geom_column(use_centroid, precision, simplify_tolerance)}"  # this is default attribute that we will deliver to user if user defines his own attribute column then those will be appended with osm_id only
+
+
+def create_tag_containment(key, value):
+    """generates jsonb containment of single tag which can be served by gin index on tags"""
+    tag = dumps({key.strip(): value.strip()}, ensure_ascii=False).replace("'", "''")
+    return f"""tags @> '{tag}'"""
 
 
 def create_tag_sql_logic(key, value, filter_list):
+    """generates tag filter using jsonb containment and existence operators so that gin index on tags can be used"""
     if len(value) > 1:
-        v_l = []
-        for lil in value:
-            v_l.append(f""" '{lil.strip()}' """)
-        v_l_join = ", ".join(v_l)
-        value_tuple = f"""({v_l_join})"""
-
-        k = f""" '{key.strip()}' """
-        filter_list.append("""tags ->> """ + k + """IN """ + value_tuple + """""")
+        v_l = [create_tag_containment(key, lil) for lil in value]
+        filter_list.append(f"""({" OR ".join(v_l)})""")
     elif len(value) == 1:
-        filter_list.append(f"""tags ->> '{key.strip()}' = '{value[0].strip()}'""")
+        filter_list.append(create_tag_containment(key, value[0]))
     else:
-        filter_list.append(f"""tags ? '{key.strip()}'""")
+        filter_list.append(f"""tags ? '{key.strip().replace("'", "''")}'""")
     return filter_list
 
 
+def create_tag_existence_any(keys):
+    """generates single existence filter for list of tag keys"""
+    keys = ", ".join(f"""'{key.strip().replace("'", "''")}'""" for key in keys)
+    return f"""tags ?| ARRAY[{keys}]"""
+
+
 def generate_tag_filter_query(filter, join_by=" OR ", plain_query_filter=False):
     final_filter = []
     if plain_query_filter:
@@ -209,8 +266,12 @@ def generate_tag_filter_query(filter, join_by=" OR ", plain_query_filter=False):
             if key == "join_or":
                 temp_logic = []
                 if value:
+                    existence_keys = [k for k, v in value.items() if not v]
+                    if len(existence_keys) > 1:
+                        temp_logic.append(create_tag_existence_any(existence_keys))
                     for k, v in value.items():
-                        temp_logic = create_tag_sql_logic(k, v, temp_logic)
+                        if v or len(existence_keys) == 1:
+                            temp_logic = create_tag_sql_logic(k, v, temp_logic)
                     final_filter.append(f"""{" OR ".join(temp_logic)}""")
 
             if key == "join_and":
@@ -234,8 +295,9 @@ def extract_geometry_type_query(
     geom_filter = create_geom_filter(
         params.geometry,
         "ST_within" if params.use_st_within is True else "ST_intersects",
+        use_clipping_boundary=not country_export,
     )
-    select_condition = f"""osm_id, tableoid::regclass AS osm_type, tags,changeset,timestamp , {'ST_Centroid(geom) as geom' if params.centroid else 'geom'}"""  # this is default attribute that we will deliver to user if user defines his own attribute column then those will be appended with osm_id only
+    select_condition = f"""osm_id, tableoid::regclass AS osm_type, tags,changeset,timestamp , {create_geom_column(params.centroid, params.precision, params.simplify_tolerance)}"""  # this is default attribute that we will deliver to user if user defines his own attribute column then those will be appended with osm_id only
     schema = {
         "osm_id": "int64",
         "type": "str",
@@ -286,6 +348,8 @@ def extract_geometry_type_query(
     ):  # if no specific point , line or poly filter is not passed master columns filter will be used , if master columns is also empty then above default select statement will be used
         select_condition, schema = create_column_filter(
             use_centroid=params.centroid,
+            precision=params.precision,
+            simplify_tolerance=params.simplify_tolerance,
             output_type=params.output_type,
             columns=master_attribute_filter,
             create_schema=True,
@@ -300,12 +364,19 @@ def extract_geometry_type_query(
             if point_attribute_filter:
                 select_condition, schema = create_column_filter(
                     use_centroid=params.centroid,
+                    precision=params.precision,
+                    simplify_tolerance=params.simplify_tolerance,
                     output_type=params.output_type,
                     columns=point_attribute_filter,
                     create_schema=True,
                 )
             where_clause_for_nodes = generate_where_clause_indexes_case(
-                geom_filter, g_id, c_id, country_export, "nodes"
+                geom_filter,
+                g_id,
+                c_id,
+                country_export,
+                "nodes",
+                changed_since=params.changed_since,
             )
 
             query_point = f"""select
@@ -327,12 +398,19 @@ def extract_geometry_type_query(
             if line_attribute_filter:
                 select_condition, schema = create_column_filter(
                     use_centroid=params.centroid,
+                    precision=params.precision,
+                    simplify_tolerance=params.simplify_tolerance,
                     output_type=params.output_type,
                     columns=line_attribute_filter,
                     create_schema=True,
                 )
             where_clause_for_line = generate_where_clause_indexes_case(
-                geom_filter, g_id, c_id, country_export, "ways_line"
+                geom_filter,
+                g_id,
+                c_id,
+                country_export,
+                "ways_line",
+                changed_since=params.changed_since,
             )
 
             query_ways_line = f"""select
@@ -342,7 +420,12 @@ def extract_geometry_type_query(
                 where
                     {where_clause_for_line}"""
             where_clause_for_rel = generate_where_clause_indexes_case(
-                geom_filter, g_id, c_id, country_export, "relations"
+                geom_filter,
+                g_id,
+                c_id,
+                country_export,
+                "relations",
+                changed_since=params.changed_since,
             )
 
             query_relations_line = f"""select
@@ -367,13 +450,20 @@ def extract_geometry_type_query(
             if poly_attribute_filter:
                 select_condition, schema = create_column_filter(
                     use_centroid=params.centroid,
+                    precision=params.precision,
+                    simplify_tolerance=params.simplify_tolerance,
                     output_type=params.output_type,
                     columns=poly_attribute_filter,
                     create_schema=True,
                 )
 
             where_clause_for_poly = generate_where_clause_indexes_case(
-                geom_filter, g_id, c_id, country_export, "ways_poly"
+                geom_filter,
+                g_id,
+                c_id,
+                country_export,
+                "ways_poly",
+                changed_since=params.changed_since,
             )
 
             query_ways_poly = f"""select
@@ -383,7 +473,12 @@ def extract_geometry_type_query(
                 where
                     {where_clause_for_poly}"""
             where_clause_for_relations = generate_where_clause_indexes_case(
-                geom_filter, g_id, c_id, country_export, "relations"
+                geom_filter,
+                g_id,
+                c_id,
+                country_export,
+                "relations",
+                changed_since=params.changed_since,
             )
 
             query_relations_poly = f"""select
@@ -402,6 +497,16 @@ def extract_geometry_type_query(
             query_poly_list.append(query_relations_poly)
             query_poly = get_query_as_geojson(query_poly_list, ogr_export=ogr_export)
             poly_schema = schema
+    if not country_export:
+        cte = create_clipping_boundary_cte(params.geometry)
+        query_point, query_line, query_poly = [
+            (
+                (wrap_ogr_query(query, cte) if ogr_export else f"{cte} {query}")
+                if query
+                else query
+            )
+            for query in (query_point, query_line, query_poly)
+        ]
     return query_point, query_line, query_poly, point_schema, line_schema, poly_schema
 
 
@@ -456,8 +561,20 @@ def extract_attributes_tags(filters):
     )
 
 
+def create_changed_since_filter(changed_since):
+    """generates filter of features modified after changed_since , timestamp column holds utc time without time zone so it can use btree index of timestamp"""
+    if changed_since.tzinfo:
+        changed_since = changed_since.astimezone(timezone.utc).replace(tzinfo=None)
+    return f""""timestamp" > '{changed_since.isoformat()}'::timestamp"""
+
+
 def generate_where_clause_indexes_case(
-    geom_filter, g_id, c_id, country_export, table_name="ways_poly"
+    geom_filter,
+    g_id,
+    c_id,
+    country_export,
+    table_name="ways_poly",
+    changed_since=None,
 ):
     where_clause = geom_filter
     if g_id:
@@ -482,6 +599,8 @@ def generate_where_clause_indexes_case(
             #     where_clause = f"country IN ({c_id})"
             # else:
             where_clause = f"country <@ ARRAY[{c_id}]"
+    if changed_since:
+        where_clause += f" and ({create_changed_since_filter(changed_since)})"
     return where_clause
 
 
@@ -497,11 +616,20 @@ def raw_currentdata_extraction_query(
     ogr_export=False,
     select_all=False,
     country_export=False,
+    as_list=False,
+    chunk_geometry=None,
 ):
-    """Default function to support current snapshot extraction with all of the feature that export_tool_api has"""
+    """Default function to support current snapshot extraction with all of the feature that export_tool_api has , as_list returns per table queries instead of single union query
+
+    chunk_geometry (geojson str) restricts the extraction to features intersecting the chunk of the request geometry , geojson rows are then followed by osm_id, osm_type and whether the feature lies completely within the chunk so that features crossing the chunk borders can be de-duplicated
+    """
 
     geom_lookup_by = "ST_within" if params.use_st_within is True else "ST_intersects"
-    geom_filter = create_geom_filter(params.geometry, geom_lookup_by)
+    geom_filter = create_geom_filter(
+        params.geometry, geom_lookup_by, use_clipping_boundary=not country_export
+    )
+    if chunk_geometry:
+        geom_filter = f"""ST_intersects(geom,ST_GEOMFROMGEOJSON('{chunk_geometry}')) and {geom_filter}"""
 
     base_query = []
 
@@ -530,9 +658,9 @@ def raw_currentdata_extraction_query(
 
     # query_table = []
     if select_all:
-        select_condition = f"""osm_id, tableoid::regclass AS osm_type, version,tags,changeset,timestamp,{'ST_Centroid(geom) as geom' if params.centroid else 'geom'}"""  # FIXme have condition for displaying userinfo after user authentication
+        select_condition = f"""osm_id, tableoid::regclass AS osm_type, version,tags,changeset,timestamp,{create_geom_column(params.centroid, params.precision, params.simplify_tolerance)}"""  # FIXme have condition for displaying userinfo after user authentication
     else:
-        select_condition = f"""osm_id, tableoid::regclass AS osm_type, version,tags,changeset,timestamp,{'ST_Centroid(geom) as geom' if params.centroid else 'geom'}"""  # this is default attribute that we will deliver to user if user defines his own attribute column then those will be appended with osm_id only
+        select_condition = f"""osm_id, tableoid::regclass AS osm_type, version,tags,changeset,timestamp,{create_geom_column(params.centroid, params.precision, params.simplify_tolerance)}"""  # this is default attribute that we will deliver to user if user defines his own attribute column then those will be appended with osm_id only
 
     point_select_condition = select_condition  # initializing default
     line_select_condition = select_condition
@@ -582,6 +710,8 @@ def raw_currentdata_extraction_query(
             if len(master_attribute_filter) > 0:
                 select_condition = create_column_filter(
                     use_centroid=params.centroid,
+                    precision=params.precision,
+                    simplify_tolerance=params.simplify_tolerance,
                     output_type=params.output_type,
                     columns=master_attribute_filter,
                 )
@@ -594,6 +724,8 @@ def raw_currentdata_extraction_query(
                 if len(point_attribute_filter) > 0:
                     point_select_condition = create_column_filter(
                         use_centroid=params.centroid,
+                        precision=params.precision,
+                        simplify_tolerance=params.simplify_tolerance,
                         output_type=params.output_type,
                         columns=point_attribute_filter,
                     )
@@ -601,6 +733,8 @@ def raw_currentdata_extraction_query(
                 if len(line_attribute_filter) > 0:
                     line_select_condition = create_column_filter(
                         use_centroid=params.centroid,
+                        precision=params.precision,
+                        simplify_tolerance=params.simplify_tolerance,
                         output_type=params.output_type,
                         columns=line_attribute_filter,
                     )
@@ -608,6 +742,8 @@ def raw_currentdata_extraction_query(
                 if len(poly_attribute_filter) > 0:
                     poly_select_condition = create_column_filter(
                         use_centroid=params.centroid,
+                        precision=params.precision,
+                        simplify_tolerance=params.simplify_tolerance,
                         output_type=params.output_type,
                         columns=poly_attribute_filter,
                     )
@@ -637,7 +773,12 @@ def raw_currentdata_extraction_query(
         params.geometry_type = ["point", "line", "polygon"]
     if SupportedGeometryFilters.POINT.value in params.geometry_type:
         where_clause_for_nodes = generate_where_clause_indexes_case(
-            geom_filter, g_id, c_id, country_export, "nodes"
+            geom_filter,
+            g_id,
+            c_id,
+            country_export,
+            "nodes",
+            changed_since=params.changed_since,
         )
 
         query_point = f"""select
@@ -652,7 +793,12 @@ def raw_currentdata_extraction_query(
 
     if SupportedGeometryFilters.LINE.value in params.geometry_type:
         where_clause_for_line = generate_where_clause_indexes_case(
-            geom_filter, g_id, c_id, country_export, "ways_line"
+            geom_filter,
+            g_id,
+            c_id,
+            country_export,
+            "ways_line",
+            changed_since=params.changed_since,
         )
 
         query_ways_line = f"""select
@@ -671,7 +817,12 @@ def raw_currentdata_extraction_query(
 
         if use_geomtype_in_relation:
             where_clause_for_rel = generate_where_clause_indexes_case(
-                geom_filter, g_id, c_id, country_export, "relations"
+                geom_filter,
+                g_id,
+                c_id,
+                country_export,
+                "relations",
+                changed_since=params.changed_since,
             )
 
             query_relations_line = f"""select
@@ -687,7 +838,12 @@ def raw_currentdata_extraction_query(
 
     if SupportedGeometryFilters.POLYGON.value in params.geometry_type:
         where_clause_for_poly = generate_where_clause_indexes_case(
-            geom_filter, g_id, c_id, country_export, "ways_poly"
+            geom_filter,
+            g_id,
+            c_id,
+            country_export,
+            "ways_poly",
+            changed_since=params.changed_since,
         )
 
         query_ways_poly = f"""select
@@ -700,7 +856,12 @@ def raw_currentdata_extraction_query(
             query_ways_poly += f""" and ({poly_tag})"""
         base_query.append(query_ways_poly)
         where_clause_for_relations = generate_where_clause_indexes_case(
-            geom_filter, g_id, c_id, country_export, "relations"
+            geom_filter,
+            g_id,
+            c_id,
+            country_export,
+            "relations",
+            changed_since=params.changed_since,
         )
         query_relations_poly = f"""select
             {poly_select_condition}
@@ -720,16 +881,130 @@ def raw_currentdata_extraction_query(
     else:
         table_base_query = []
         for i in range(len(base_query)):
-            table_base_query.append(
-                f"""select ST_AsGeoJSON(t{i}.*) from ({base_query[i]}) t{i}"""
-            )
+            if chunk_geometry:
+                table_base_query.append(
+                    f"""select {create_geojson_row(f't{i}', params.precision)}, t{i}.osm_id, t{i}.osm_type::text, ST_within(t{i}.geom,ST_GEOMFROMGEOJSON('{chunk_geometry}')) from ({base_query[i]}) t{i}"""
+                )
+            else:
+                table_base_query.append(
+                    f"""select {create_geojson_row(f't{i}', params.precision)} from ({base_query[i]}) t{i}"""
+                )
+    cte = None if country_export else create_clipping_boundary_cte(params.geometry)
+    if as_list:
+        if cte:
+            return [f"{cte} {query}" for query in table_base_query]
+        return table_base_query
     final_query = " UNION ALL ".join(table_base_query)
+    if cte:
+        final_query = (
+            wrap_ogr_query(final_query, cte) if ogr_export else f"{cte} {final_query}"
+        )
     if params.output_type == "csv":
         logging.debug(final_query)
 
     return final_query
 
 
+def get_chunked_geometry_query(geom, grid_size, max_vertices):
+    """Generates query to split request geometry into chunks using square grid of grid_size degree , chunks are further subdivided to have at most max_vertices"""
+    geometry_dump = dumps(loads(geom.model_dump_json()))
+    query = f"""with clip as (select ST_Union(ST_makeValid(ST_GEOMFROMGEOJSON('{geometry_dump}'))) as geom)
+                select
+                    ST_AsGeoJSON(ST_Subdivide(ST_Intersection(g.geom, c.geom), {int(max_vertices)}))
+                from
+                    clip c,
+                    ST_SquareGrid({float(grid_size)}, c.geom) g
+                where
+                    ST_intersects(g.geom, c.geom)"""
+    return query
+
+
+# approximate output bytes per byte of planned row width and rows written per second for each output type , used by export estimator
+EXPORT_ESTIMATE_FACTORS = {
+    "geojson": (2.5, 50000),
+    "kml": (3.0, 15000),
+    "shp": (1.2, 20000),
+    "fgb": (1.1, 40000),
+    "gpkg": (1.3, 30000),
+    "sql": (1.5, 40000),
+    "csv": (1.5, 40000),
+    "parquet": (0.4, 60000),
+    "mbtiles": (0.5, 10000),
+    "pmtiles": (0.5, 15000),
+}
+
+
+def get_explain_query(query):
+    """Generates query to get planner estimate of query without running it"""
+    return f"""EXPLAIN (FORMAT JSON) {query}"""
+
+
+def get_table_name_from_query(query):
+    """Gets osm table name which per table extraction query selects from"""
+    match = re.search(r"from\s+(nodes|ways_line|ways_poly|relations)\b", query)
+    return match.group(1) if match else None
+
+
+def get_country_selectivity_query(table, c_id):
+    """Generates query to get row count of table and frequency of countries from statistics of country array column"""
+    c_id = ",".join(str(int(num)) for num in c_id)
+    return f"""select
+                c.reltuples::bigint,
+                (
+                    select sum(f.freq)
+                    from unnest(s.most_common_elems::text::int[], s.most_common_elem_freqs) as f(elem, freq)
+                    where f.elem = ANY(ARRAY[{c_id}])
+                )
+            from
+                pg_class c
+                left join pg_stats s on s.tablename = c.relname and s.attname = 'country'
+            where
+                c.relname = '{table}'"""
+
+
+def estimate_export_cost(plans, output_type, country_rows=None):
+    """Estimates rows , output bytes and runtime of export from planner estimate of per table extraction queries
+
+    Args:
+        plans (list): table name and EXPLAIN (FORMAT JSON) plan of its extraction query
+        output_type (str): output type of export
+        country_rows (dict, optional): table name and rows of requested countries from column statistics , Used as upper bound of country exports
+
+    Returns:
+        dict: estimate per table and total
+    """
+    bytes_factor, rows_per_second = EXPORT_ESTIMATE_FACTORS.get(
+        output_type, EXPORT_ESTIMATE_FACTORS["geojson"]
+    )
+    tables = []
+    for table, plan in plans:
+        plan = plan[0]["Plan"]
+        rows = int(plan["Plan Rows"])
+        if country_rows and country_rows.get(table) is not None:
+            rows = min(rows, int(country_rows[table]))
+        tables.append(
+            {
+                "table": table,
+                "rows": rows,
+                "bytes": int(rows * plan["Plan Width"] * bytes_factor),
+                "cost": plan["Total Cost"],
+            }
+        )
+    rows = sum(table["rows"] for table in tables)
+    return {
+        "output_type": output_type,
+        "rows": rows,
+        "bytes": sum(table["bytes"] for table in tables),
+        "runtime_seconds": round(rows / rows_per_second, 2),
+        "tables": tables,
+    }
+
+
+def get_user_query(osm_id):
+    """generates user lookup query , osm_id is bound as parameter placeholder"""
+    return f"""SELECT * FROM users WHERE osm_id = {osm_id}"""
+
+
 def check_last_updated_rawdata():
     query = """select importdate as last_updated from planet_osm_replication_status"""
     return query
@@ -770,13 +1045,21 @@ def raw_extract_plain_geojson(params, inspect_only=False):
     return final_query
 
 
-def get_countries_query(q):
+def get_countries_query(q, tolerance=None):
+    """generates countries query , q is placeholder of bound ILIKE pattern and tolerance is placeholder of simplification tolerance in degrees"""
     query = "Select ST_AsGeoJSON(cf.*) FROM countries cf"
+    if tolerance:
+        query = f"Select ST_AsGeoJSON(cf.*) FROM (select cid, name, iso3, ST_SimplifyPreserveTopology(geometry, {tolerance}) as geometry from countries) cf"
     if q:
-        query += f" WHERE name ILIKE '%{q}%'"
+        query += f" WHERE name ILIKE {q}"
     return query
 
 
+def get_countries_version_query():
+    """generates query for version of countries table , table oid changes when countries.sql recreates it and comment is bumped on every load of countries.sql"""
+    return "SELECT oid, obj_description(oid, 'pg_class') FROM pg_class WHERE oid = 'public.countries'::regclass"
+
+
 def get_osm_feature_query(osm_id):
     select_condition = (
         "osm_id, tableoid::regclass AS osm_type, tags,changeset,timestamp,geom"
@@ -799,6 +1082,25 @@ def get_osm_feature_query(osm_id):
     return query
 
 
+# tables which can have element of typed osm id
+OSM_ID_TYPE_TABLES = {
+    "n": ["nodes"],
+    "w": ["ways_line", "ways_poly"],
+    "r": ["relations"],
+}
+
+
+def get_osm_features_query(tables):
+    """generates primary key lookup of many osm ids , each table takes bound array of its ids as parameter"""
+    select_condition = (
+        "osm_id, tableoid::regclass AS osm_type, tags,changeset,timestamp,geom"
+    )
+    return " UNION ALL ".join(
+        f"""SELECT ST_AsGeoJSON(t{i}.*) FROM (select {select_condition} from {table} where osm_id = ANY(%s::bigint[])) t{i}"""
+        for i, table in enumerate(tables)
+    )
+
+
 def generate_polygon_stats_graphql_query(geojson_feature):
     """
     Gernerates the graphql query for the statistics
@@ -879,6 +1181,8 @@ def postgres2duckdb_query(
     geometry=None,
     single_category_where=None,
     enable_users_detail=False,
+    osm_id_range=None,
+    insert=False,
 ):
     """
     Generate a DuckDB query to create a table from a PostgreSQL query.
@@ -890,6 +1194,8 @@ def postgres2duckdb_query(
     - geometry (Polygon, optional): Custom polygon geometry. Defaults to None.
     - single_category_where (str, optional): Where clause for single category to fetch it from postgres
     - enable_users_detail (bool, optional): Enable user details. Defaults to False.
+    - osm_id_range (tuple, optional): Only transfers rows with osm_id in [start, end) range. Defaults to None.
+    - insert (bool, optional): Appends rows to already created table instead of creating it. Defaults to False.
 
     Returns:
     str: DuckDB query for creating a table.
@@ -907,24 +1213,39 @@ def postgres2duckdb_query(
         else f"""ST_Intersects(geom,(select ST_SetSRID(ST_Extent(ST_makeValid(ST_GeomFromText('{wkt.dumps(loads(geometry.json()),decimals=6)}',4326))),4326)))"""
     )
 
+    if osm_id_range:
+        row_filter_condition += f""" and osm_id >= {int(osm_id_range[0])} and osm_id < {int(osm_id_range[1])}"""
+
     postgres_query = f"""select {select_query} from (select * , tableoid::regclass as osm_type from {table} where {row_filter_condition}) as sub_query"""
     if single_category_where:
         postgres_query += (
             f" where {convert_tags_pattern_to_postgres(single_category_where)}"
         )
 
+    if insert:
+        return f"""INSERT INTO {base_table_name}_{table} SELECT {create_select_duck_db} FROM postgres_query("postgres_db", "{postgres_query}") """
+
     duck_db_create = f"""CREATE TABLE {base_table_name}_{table} AS SELECT {create_select_duck_db} FROM postgres_query("postgres_db", "{postgres_query}") """
 
     return duck_db_create
 
 
+def get_osm_id_bounds_query(table):
+    """Gives lowest and highest osm_id of table , answered from primary key index"""
+    return f"""select min(osm_id), max(osm_id) from {table}"""
+
+
 def extract_custom_features_from_postgres(
     select_q, from_q, where_q, geom=None, cid=None
 ):
     """
     Generates Postgresql query for custom feature extraction
     """
-    geom_filter = f"""(country <@ ARRAY [{cid}])""" if cid else create_geom_filter(geom)
+    geom_filter = (
+        f"""(country <@ ARRAY [{cid}])"""
+        if cid
+        else create_geom_filter(geom, use_clipping_boundary=True)
+    )
 
     postgres_query = f"""select {select_q} from (select * , tableoid::regclass as osm_type from {from_q} where {geom_filter}) as sub_query"""
     if where_q:
@@ -933,7 +1254,14 @@ def extract_custom_features_from_postgres(
 
 
 def extract_features_custom_exports(
-    base_table_name, select, feature_type, where, geometry=None, cid=None
+    base_table_name,
+    select,
+    feature_type,
+    where,
+    geometry=None,
+    cid=None,
+    precision=None,
+    simplify_tolerance=None,
 ):
     """
     Generate a Extraction query to extract features based on given parameters.
@@ -943,6 +1271,8 @@ def extract_features_custom_exports(
     - select (List[str]): List of selected fields.
     - feature_type (str): Type of feature (points, lines, polygons).
     - where (str): SQL-like condition to filter features.
+    - precision (int, optional): Decimal digits kept in coordinates. Defaults to None.
+    - simplify_tolerance (float, optional): Simplification tolerance in degrees. Defaults to None.
 
     Returns:
     str: Extraction query to extract features.
@@ -966,10 +1296,21 @@ def extract_features_custom_exports(
     }
     if USE_DUCK_DB_FOR_CUSTOM_EXPORTS is True:
         select = [f"""tags['{item}'][1] as "{item}" """ for item in select]
-        select += ["osm_id", "osm_type", "geom"]
+        select += [
+            "osm_id",
+            "osm_type",
+            create_geom_column(
+                precision=precision, simplify_tolerance=simplify_tolerance
+            ),
+        ]
         select_query = ", ".join(select)
     else:
-        select_query = create_column_filter(select, include_osm_type=False)
+        select_query = create_column_filter(
+            select,
+            include_osm_type=False,
+            precision=precision,
+            simplify_tolerance=simplify_tolerance,
+        )
 
     from_query = map_tables[feature_type]["table"]
 
@@ -989,7 +1330,12 @@ def extract_features_custom_exports(
                 cid=cid,
             )
         base_query.append(query)
-    return " UNION ALL ".join(base_query)
+    final_query = " UNION ALL ".join(base_query)
+    if USE_DUCK_DB_FOR_CUSTOM_EXPORTS is not True and geometry and not cid:
+        final_query = wrap_ogr_query(
+            final_query, create_clipping_boundary_cte(geometry)
+        )
+    return final_query
 
 
 def get_country_geom_from_iso(iso3):
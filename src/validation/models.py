@@ -19,6 +19,8 @@
 """Page contains validation models for application"""
 # Standard library imports
 import json
+import re
+from datetime import datetime
 from enum import Enum
 from typing import Dict, List, Optional, Union
 
@@ -70,6 +72,18 @@ class RawDataOutputType(Enum):
         PMTILES = "pmtiles"  ## EXPERIMENTAL
 
 
+# zip deflate level of export files by suffix , 0 stores formats which are already compressed internally , others use ZIP_COMPRESSION_LEVEL
+# zstd is not used since zip readers of python and most unzip tools can't read it
+ARCHIVE_COMPRESS_LEVELS = {
+    RawDataOutputType.GEOPARQUET.value: 0,
+    "mbtiles": 0,
+    "pmtiles": 0,
+    "zip": 0,
+    RawDataOutputType.FLATGEOBUF.value: 1,
+    RawDataOutputType.GEOPACKAGE.value: 1,
+}
+
+
 class SupportedFilters(Enum):
     TAGS = "tags"
     ATTRIBUTES = "attributes"
@@ -92,6 +106,13 @@ class SupportedGeometryFilters(Enum):
         return value in cls._value2member_map_
 
 
+class CountriesSimplification(Enum):
+    NONE = "none"
+    LOW = "low"
+    MEDIUM = "medium"
+    HIGH = "high"
+
+
 class JoinFilterType(Enum):
     OR = "OR"
     AND = "AND"
@@ -160,6 +181,25 @@ class RawDataCurrentParamsBase(BaseModel, GeometryValidatorMixin):
         default=True,
         description="Exports features which are exactly inside the passed polygons (ST_WITHIN) By default features which are intersected with passed polygon is exported",
     )
+    precision: Optional[int] = Field(
+        default=None,
+        ge=0,
+        le=9,
+        example=6,
+        description="Number of decimal digits kept in coordinates of exported geometries , Full precision is exported by default",
+    )
+    simplify_tolerance: Optional[float] = Field(
+        default=None,
+        gt=0,
+        le=1,
+        example=0.0001,
+        description="Simplifies exported geometries with the tolerance in degrees preserving their topology , Geometries are not simplified by default",
+    )
+    changed_since: Optional[datetime] = Field(
+        default=None,
+        example="2024-01-01T00:00:00Z",
+        description="Exports only features created or modified after this time , Time without time zone is treated as UTC",
+    )
     if ENABLE_POLYGON_STATISTICS_ENDPOINTS:
         include_stats: Optional[bool] = Field(
             default=False,
@@ -292,6 +332,65 @@ class StatusResponse(BaseModel):
         json_schema_extra = {"example": {"lastUpdated": "2022-06-27 19:59:24+05:45"}}
 
 
+class OsmFeaturesParams(BaseModel):
+    ids: List[str] = Field(
+        min_length=1,
+        max_length=10000,
+        example=["n2554697745", "w172491283", "r7681787"],
+        description="Typed osm ids , n for node , w for way and r for relation followed by id",
+    )
+
+    @validator("ids")
+    def validate_ids(cls, value):
+        """Validates typed osm ids and removes duplicates"""
+        for osm_id in value:
+            if not re.fullmatch(r"[nwr]\d+", osm_id):
+                raise ValueError(
+                    f"Invalid osm id {osm_id} , Should be n , w or r followed by id e.g. n123"
+                )
+            if int(osm_id[1:]) > 2**63 - 1:
+                raise ValueError(f"Invalid osm id {osm_id} , id is out of bigint range")
+        return list(dict.fromkeys(value))
+
+
+class SnapshotEstimateTable(BaseModel):
+    table: Optional[str] = None
+    rows: int
+    bytes: int
+    cost: float
+
+
+class SnapshotEstimateResponse(BaseModel):
+    output_type: str
+    rows: int
+    bytes: int
+    runtime_seconds: float
+    area_sqkm: float
+    country_export: bool
+    tables: List[SnapshotEstimateTable]
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "output_type": "geojson",
+                "rows": 12500,
+                "bytes": 4375000,
+                "runtime_seconds": 0.25,
+                "area_sqkm": 6.25,
+                "country_export": False,
+                "tables": [
+                    {"table": "nodes", "rows": 2500, "bytes": 175000, "cost": 90.5},
+                    {
+                        "table": "ways_poly",
+                        "rows": 10000,
+                        "bytes": 4200000,
+                        "cost": 410.2,
+                    },
+                ],
+            }
+        }
+
+
 class StatsRequestParams(BaseModel, GeometryValidatorMixin):
     iso3: Optional[str] = Field(
         default=None,
@@ -390,6 +489,8 @@ class CategoryModel(BaseModel):
     - select (List[str]): List of selected fields.
     - where (str): SQL-like condition to filter features.
     - formats (List[str]): List of Export Formats (suffixes).
+    - precision (int): Decimal digits kept in coordinates.
+    - simplify_tolerance (float): Simplification tolerance in degrees.
     """
 
     hdx: Optional[HDXModel] = Field(
@@ -415,6 +516,20 @@ class CategoryModel(BaseModel):
         description="List of Export Formats (suffixes).",
         example=["gpkg", "geojson"],
     )
+    precision: Optional[int] = Field(
+        default=None,
+        ge=0,
+        le=9,
+        example=6,
+        description="Number of decimal digits kept in coordinates of exported geometries , Full precision is exported by default",
+    )
+    simplify_tolerance: Optional[float] = Field(
+        default=None,
+        gt=0,
+        le=1,
+        example=0.0001,
+        description="Simplifies exported geometries with the tolerance in degrees preserving their topology , Geometries are not simplified by default",
+    )
 
     @validator("types")
     def validate_types(cls, value):
@@ -54,3 +54,24 @@ class Raw(HttpUser):
         self.client.post(
             "/raw-data/current-snapshot/", data=json.dumps(payload), headers=headers
         )
+
+
+class S3(HttpUser):
+    """Measures throughput of /s3/ endpoints under concurrent load , Run it alone with `locust -f tests/load/locustfile.py S3` and raise RATE_LIMIT_PER_MIN of the API so requests are not rate limited"""
+
+    @task(1)
+    def list_files(self):
+        """Listing pages of HDX folder , slowest of the s3 calls"""
+        self.client.get("/v1/s3/files/?folder=/HDX", name="/v1/s3/files/")
+
+    @task(3)
+    def head_file(self):
+        self.client.head("/v1/s3/get/HDX/meta.json", name="/v1/s3/get/ [HEAD]")
+
+    @task(3)
+    def get_presigned_url(self):
+        self.client.get(
+            "/v1/s3/get/HDX/meta.json?read_meta=false",
+            allow_redirects=False,
+            name="/v1/s3/get/ [presigned]",
+        )
@@ -17,8 +17,60 @@
 # 1100 13th Street NW Suite 800 Washington, D.C. 20005
 # <info@hotosm.org>
 
-from src.query_builder.builder import raw_currentdata_extraction_query
-from src.validation.models import RawDataCurrentParams
+import gzip
+import io
+import json
+import os
+import threading
+import time
+import zipfile
+from collections import defaultdict, namedtuple
+from functools import partial
+from types import SimpleNamespace
+
+import pytest
+from boto3.s3.transfer import TransferConfig
+from pydantic import ValidationError
+
+import src.app
+from API import api_worker
+from src.app import (
+    CountriesCache,
+    CustomExport,
+    DuckDBSnapshotCache,
+    ExportCache,
+    ParallelZipWriter,
+    PreparedStatements,
+    RawData,
+    S3FileTransfer,
+    S3MultipartWriter,
+    WorkScheduler,
+    ewkb_to_wkb,
+    get_compress_level,
+    get_export_cost_score,
+    log_archive_metrics,
+    parse_size,
+    split_osm_id_range,
+    write_flatgeobuf,
+    write_geoparquet,
+    write_to_zip,
+)
+from src.query_builder.builder import (
+    create_clipping_boundary_cte,
+    estimate_export_cost,
+    generate_tag_filter_query,
+    get_osm_features_query,
+    get_table_name_from_query,
+    postgres2duckdb_query,
+    raw_currentdata_extraction_query,
+)
+from src.validation.models import (
+    CategoryModel,
+    OsmFeaturesParams,
+    RawDataCurrentParams,
+)
+
+Column = namedtuple("Column", ["name", "type_code"])
 
 
 def test_rawdata_current_snapshot_geometry_query():
@@ -43,27 +95,27 @@ def test_rawdata_current_snapshot_geometry_query():
         },
     }
     validated_params = RawDataCurrentParams(**test_param)
-    expected_query = """select ST_AsGeoJSON(t0.*) from (select
+    expected_query = """WITH clipping_boundary AS MATERIALIZED (select ST_Union(ST_makeValid(ST_GEOMFROMGEOJSON('{"type": "Polygon", "coordinates": [[[84.92431640625, 27.766190642387496], [85.31982421875, 27.766190642387496], [85.31982421875, 28.02592458049937], [84.92431640625, 28.02592458049937], [84.92431640625, 27.766190642387496]]]}'))) as geom) select ST_AsGeoJSON(t0.*) from (select
                     osm_id , tableoid::regclass AS osm_type , tags ->> 'name' as name , geom
                     from
                         nodes
                     where
-                        ST_intersects(geom,(select ST_Union(ST_makeValid(ST_GEOMFROMGEOJSON('{"type": "Polygon", "coordinates": [[[84.92431640625, 27.766190642387496], [85.31982421875, 27.766190642387496], [85.31982421875, 28.02592458049937], [84.92431640625, 28.02592458049937], [84.92431640625, 27.766190642387496]]]}'))))) and (tags ->>  'amenity' IN ( 'shop' ,  'toilet' ))) t0 UNION ALL select ST_AsGeoJSON(t1.*) from (select
+                        ST_intersects(geom,(select geom from clipping_boundary)) and ((tags @> '{"amenity": "shop"}' OR tags @> '{"amenity": "toilet"}'))) t0 UNION ALL select ST_AsGeoJSON(t1.*) from (select
             osm_id, tableoid::regclass AS osm_type, version,tags,changeset,timestamp,geom
             from
                 ways_line
             where
-                ST_intersects(geom,(select ST_Union(ST_makeValid(ST_GEOMFROMGEOJSON('{"type": "Polygon", "coordinates": [[[84.92431640625, 27.766190642387496], [85.31982421875, 27.766190642387496], [85.31982421875, 28.02592458049937], [84.92431640625, 28.02592458049937], [84.92431640625, 27.766190642387496]]]}')))))) t1 UNION ALL select ST_AsGeoJSON(t2.*) from (select
+                ST_intersects(geom,(select geom from clipping_boundary))) t1 UNION ALL select ST_AsGeoJSON(t2.*) from (select
             osm_id, tableoid::regclass AS osm_type, version,tags,changeset,timestamp,geom
             from
                 ways_poly
             where
-                ST_intersects(geom,(select ST_Union(ST_makeValid(ST_GEOMFROMGEOJSON('{"type": "Polygon", "coordinates": [[[84.92431640625, 27.766190642387496], [85.31982421875, 27.766190642387496], [85.31982421875, 28.02592458049937], [84.92431640625, 28.02592458049937], [84.92431640625, 27.766190642387496]]]}')))))) t2 UNION ALL select ST_AsGeoJSON(t3.*) from (select
+                ST_intersects(geom,(select geom from clipping_boundary))) t2 UNION ALL select ST_AsGeoJSON(t3.*) from (select
             osm_id, tableoid::regclass AS osm_type, version,tags,changeset,timestamp,geom
             from
                 relations
             where
-                ST_intersects(geom,(select ST_Union(ST_makeValid(ST_GEOMFROMGEOJSON('{"type": "Polygon", "coordinates": [[[84.92431640625, 27.766190642387496], [85.31982421875, 27.766190642387496], [85.31982421875, 28.02592458049937], [84.92431640625, 28.02592458049937], [84.92431640625, 27.766190642387496]]]}')))))) t3"""
+                ST_intersects(geom,(select geom from clipping_boundary))) t3"""
 
     query_result = raw_currentdata_extraction_query(
         validated_params,
@@ -89,27 +141,27 @@ def test_rawdata_current_snapshot_normal_query():
         "outputType": "geojson",
     }
     validated_params = RawDataCurrentParams(**test_param)
-    expected_query = """select ST_AsGeoJSON(t0.*) from (select
+    expected_query = """WITH clipping_boundary AS MATERIALIZED (select ST_Union(ST_makeValid(ST_GEOMFROMGEOJSON('{"type": "Polygon", "coordinates": [[[84.92431640625, 27.766190642387496], [85.31982421875, 27.766190642387496], [85.31982421875, 28.02592458049937], [84.92431640625, 28.02592458049937], [84.92431640625, 27.766190642387496]]]}'))) as geom) select ST_AsGeoJSON(t0.*) from (select
                     osm_id, tableoid::regclass AS osm_type, version,tags,changeset,timestamp,geom
                     from
                         nodes
                     where
-                        ST_intersects(geom,(select ST_Union(ST_makeValid(ST_GEOMFROMGEOJSON('{"type": "Polygon", "coordinates": [[[84.92431640625, 27.766190642387496], [85.31982421875, 27.766190642387496], [85.31982421875, 28.02592458049937], [84.92431640625, 28.02592458049937], [84.92431640625, 27.766190642387496]]]}')))))) t0 UNION ALL select ST_AsGeoJSON(t1.*) from (select
+                        ST_intersects(geom,(select geom from clipping_boundary))) t0 UNION ALL select ST_AsGeoJSON(t1.*) from (select
             osm_id, tableoid::regclass AS osm_type, version,tags,changeset,timestamp,geom
             from
                 ways_line
             where
-                ST_intersects(geom,(select ST_Union(ST_makeValid(ST_GEOMFROMGEOJSON('{"type": "Polygon", "coordinates": [[[84.92431640625, 27.766190642387496], [85.31982421875, 27.766190642387496], [85.31982421875, 28.02592458049937], [84.92431640625, 28.02592458049937], [84.92431640625, 27.766190642387496]]]}')))))) t1 UNION ALL select ST_AsGeoJSON(t2.*) from (select
+                ST_intersects(geom,(select geom from clipping_boundary))) t1 UNION ALL select ST_AsGeoJSON(t2.*) from (select
             osm_id, tableoid::regclass AS osm_type, version,tags,changeset,timestamp,geom
             from
                 ways_poly
             where
-                ST_intersects(geom,(select ST_Union(ST_makeValid(ST_GEOMFROMGEOJSON('{"type": "Polygon", "coordinates": [[[84.92431640625, 27.766190642387496], [85.31982421875, 27.766190642387496], [85.31982421875, 28.02592458049937], [84.92431640625, 28.02592458049937], [84.92431640625, 27.766190642387496]]]}')))))) t2 UNION ALL select ST_AsGeoJSON(t3.*) from (select
+                ST_intersects(geom,(select geom from clipping_boundary))) t2 UNION ALL select ST_AsGeoJSON(t3.*) from (select
             osm_id, tableoid::regclass AS osm_type, version,tags,changeset,timestamp,geom
             from
                 relations
             where
-                ST_intersects(geom,(select ST_Union(ST_makeValid(ST_GEOMFROMGEOJSON('{"type": "Polygon", "coordinates": [[[84.92431640625, 27.766190642387496], [85.31982421875, 27.766190642387496], [85.31982421875, 28.02592458049937], [84.92431640625, 28.02592458049937], [84.92431640625, 27.766190642387496]]]}')))))) t3"""
+                ST_intersects(geom,(select geom from clipping_boundary))) t3"""
     query_result = raw_currentdata_extraction_query(
         validated_params,
     )
@@ -133,27 +185,27 @@ def test_rawdata_current_snapshot_normal_query_ST_within():
         "outputType": "geojson",
     }
     validated_params = RawDataCurrentParams(**test_param)
-    expected_query = """select ST_AsGeoJSON(t0.*) from (select
+    expected_query = """WITH clipping_boundary AS MATERIALIZED (select ST_Union(ST_makeValid(ST_GEOMFROMGEOJSON('{"type": "Polygon", "coordinates": [[[84.92431640625, 27.766190642387496], [85.31982421875, 27.766190642387496], [85.31982421875, 28.02592458049937], [84.92431640625, 28.02592458049937], [84.92431640625, 27.766190642387496]]]}'))) as geom) select ST_AsGeoJSON(t0.*) from (select
                     osm_id, tableoid::regclass AS osm_type, version,tags,changeset,timestamp,geom
                     from
                         nodes
                     where
-                        ST_within(geom,(select ST_Union(ST_makeValid(ST_GEOMFROMGEOJSON('{"type": "Polygon", "coordinates": [[[84.92431640625, 27.766190642387496], [85.31982421875, 27.766190642387496], [85.31982421875, 28.02592458049937], [84.92431640625, 28.02592458049937], [84.92431640625, 27.766190642387496]]]}')))))) t0 UNION ALL select ST_AsGeoJSON(t1.*) from (select
+                        ST_within(geom,(select geom from clipping_boundary))) t0 UNION ALL select ST_AsGeoJSON(t1.*) from (select
             osm_id, tableoid::regclass AS osm_type, version,tags,changeset,timestamp,geom
             from
                 ways_line
             where
-                ST_within(geom,(select ST_Union(ST_makeValid(ST_GEOMFROMGEOJSON('{"type": "Polygon", "coordinates": [[[84.92431640625, 27.766190642387496], [85.31982421875, 27.766190642387496], [85.31982421875, 28.02592458049937], [84.92431640625, 28.02592458049937], [84.92431640625, 27.766190642387496]]]}')))))) t1 UNION ALL select ST_AsGeoJSON(t2.*) from (select
+                ST_within(geom,(select geom from clipping_boundary))) t1 UNION ALL select ST_AsGeoJSON(t2.*) from (select
             osm_id, tableoid::regclass AS osm_type, version,tags,changeset,timestamp,geom
             from
                 ways_poly
             where
-                ST_within(geom,(select ST_Union(ST_makeValid(ST_GEOMFROMGEOJSON('{"type": "Polygon", "coordinates": [[[84.92431640625, 27.766190642387496], [85.31982421875, 27.766190642387496], [85.31982421875, 28.02592458049937], [84.92431640625, 28.02592458049937], [84.92431640625, 27.766190642387496]]]}')))))) t2 UNION ALL select ST_AsGeoJSON(t3.*) from (select
+                ST_within(geom,(select geom from clipping_boundary))) t2 UNION ALL select ST_AsGeoJSON(t3.*) from (select
             osm_id, tableoid::regclass AS osm_type, version,tags,changeset,timestamp,geom
             from
                 relations
             where
-                ST_within(geom,(select ST_Union(ST_makeValid(ST_GEOMFROMGEOJSON('{"type": "Polygon", "coordinates": [[[84.92431640625, 27.766190642387496], [85.31982421875, 27.766190642387496], [85.31982421875, 28.02592458049937], [84.92431640625, 28.02592458049937], [84.92431640625, 27.766190642387496]]]}')))))) t3"""
+                ST_within(geom,(select geom from clipping_boundary))) t3"""
     query_result = raw_currentdata_extraction_query(
         validated_params,
     )
@@ -183,27 +235,27 @@ def test_attribute_filter_rawdata():
         },
     }
     validated_params = RawDataCurrentParams(**test_param)
-    expected_query = """select ST_AsGeoJSON(t0.*) from (select
+    expected_query = """WITH clipping_boundary AS MATERIALIZED (select ST_Union(ST_makeValid(ST_GEOMFROMGEOJSON('{"type": "Polygon", "coordinates": [[[83.502574, 27.569073], [83.502574, 28.332758], [85.556417, 28.332758], [85.556417, 27.569073], [83.502574, 27.569073]]]}'))) as geom) select ST_AsGeoJSON(t0.*) from (select
             osm_id , tableoid::regclass AS osm_type , tags ->> 'name' as name , geom
             from
                 ways_line
             where
-                ST_intersects(geom,(select ST_Union(ST_makeValid(ST_GEOMFROMGEOJSON('{"type": "Polygon", "coordinates": [[[83.502574, 27.569073], [83.502574, 28.332758], [85.556417, 28.332758], [85.556417, 27.569073], [83.502574, 27.569073]]]}'))))) and (tags ->> 'building' = 'yes')) t0 UNION ALL select ST_AsGeoJSON(t1.*) from (select
+                ST_intersects(geom,(select geom from clipping_boundary)) and (tags @> '{"building": "yes"}')) t0 UNION ALL select ST_AsGeoJSON(t1.*) from (select
                 osm_id , tableoid::regclass AS osm_type , tags ->> 'name' as name , geom
                 from
                     relations
                 where
-                    ST_intersects(geom,(select ST_Union(ST_makeValid(ST_GEOMFROMGEOJSON('{"type": "Polygon", "coordinates": [[[83.502574, 27.569073], [83.502574, 28.332758], [85.556417, 28.332758], [85.556417, 27.569073], [83.502574, 27.569073]]]}'))))) and (tags ->> 'building' = 'yes') and (geometrytype(geom)='MULTILINESTRING')) t1 UNION ALL select ST_AsGeoJSON(t2.*) from (select
+                    ST_intersects(geom,(select geom from clipping_boundary)) and (tags @> '{"building": "yes"}') and (geometrytype(geom)='MULTILINESTRING')) t1 UNION ALL select ST_AsGeoJSON(t2.*) from (select
             osm_id, tableoid::regclass AS osm_type, version,tags,changeset,timestamp,geom
             from
                 ways_poly
             where
-                (grid = 1187 OR grid = 1188) and (ST_intersects(geom,(select ST_Union(ST_makeValid(ST_GEOMFROMGEOJSON('{"type": "Polygon", "coordinates": [[[83.502574, 27.569073], [83.502574, 28.332758], [85.556417, 28.332758], [85.556417, 27.569073], [83.502574, 27.569073]]]}')))))) and (tags ->> 'building' = 'yes')) t2 UNION ALL select ST_AsGeoJSON(t3.*) from (select
+                (grid = 1187 OR grid = 1188) and (ST_intersects(geom,(select geom from clipping_boundary))) and (tags @> '{"building": "yes"}')) t2 UNION ALL select ST_AsGeoJSON(t3.*) from (select
             osm_id, tableoid::regclass AS osm_type, version,tags,changeset,timestamp,geom
             from
                 relations
             where
-                ST_intersects(geom,(select ST_Union(ST_makeValid(ST_GEOMFROMGEOJSON('{"type": "Polygon", "coordinates": [[[83.502574, 27.569073], [83.502574, 28.332758], [85.556417, 28.332758], [85.556417, 27.569073], [83.502574, 27.569073]]]}'))))) and (tags ->> 'building' = 'yes') and (geometrytype(geom)='POLYGON' or geometrytype(geom)='MULTIPOLYGON')) t3"""
+                ST_intersects(geom,(select geom from clipping_boundary)) and (tags @> '{"building": "yes"}') and (geometrytype(geom)='POLYGON' or geometrytype(geom)='MULTIPOLYGON')) t3"""
     query_result = raw_currentdata_extraction_query(
         validated_params,
         g_id=[[1187], [1188]],
@@ -255,18 +307,991 @@ def test_and_filters():
         },
     }
     validated_params = RawDataCurrentParams(**test_param)
-    expected_query = """select ST_AsGeoJSON(t0.*) from (select
+    expected_query = """WITH clipping_boundary AS MATERIALIZED (select ST_Union(ST_makeValid(ST_GEOMFROMGEOJSON('{"type": "Polygon", "coordinates": [[[36.70588085657477, 37.1979648807274], [36.70588085657477, 37.1651408422983], [36.759267544807194, 37.1651408422983], [36.759267544807194, 37.1979648807274], [36.70588085657477, 37.1979648807274]]]}'))) as geom) select ST_AsGeoJSON(t0.*) from (select
             osm_id , tableoid::regclass AS osm_type , tags ->> 'building' as building , tags ->> 'destroyed:building' as destroyed_building , tags ->> 'damage:date' as damage_date , tags ->> 'name' as name , tags ->> 'source' as source , geom
             from
                 ways_poly
             where
-                ST_intersects(geom,(select ST_Union(ST_makeValid(ST_GEOMFROMGEOJSON('{"type": "Polygon", "coordinates": [[[36.70588085657477, 37.1979648807274], [36.70588085657477, 37.1651408422983], [36.759267544807194, 37.1651408422983], [36.759267544807194, 37.1979648807274], [36.70588085657477, 37.1979648807274]]]}'))))) and (tags ->> 'destroyed:building' = 'yes' AND tags ->> 'damage:date' = '2023-02-06')) t0 UNION ALL select ST_AsGeoJSON(t1.*) from (select
+                ST_intersects(geom,(select geom from clipping_boundary)) and (tags @> '{"destroyed:building": "yes"}' AND tags @> '{"damage:date": "2023-02-06"}')) t0 UNION ALL select ST_AsGeoJSON(t1.*) from (select
             osm_id , tableoid::regclass AS osm_type , tags ->> 'building' as building , tags ->> 'destroyed:building' as destroyed_building , tags ->> 'damage:date' as damage_date , tags ->> 'name' as name , tags ->> 'source' as source , geom
             from
                 relations
             where
-                ST_intersects(geom,(select ST_Union(ST_makeValid(ST_GEOMFROMGEOJSON('{"type": "Polygon", "coordinates": [[[36.70588085657477, 37.1979648807274], [36.70588085657477, 37.1651408422983], [36.759267544807194, 37.1651408422983], [36.759267544807194, 37.1979648807274], [36.70588085657477, 37.1979648807274]]]}'))))) and (tags ->> 'destroyed:building' = 'yes' AND tags ->> 'damage:date' = '2023-02-06') and (geometrytype(geom)='POLYGON' or geometrytype(geom)='MULTIPOLYGON')) t1"""
+                ST_intersects(geom,(select geom from clipping_boundary)) and (tags @> '{"destroyed:building": "yes"}' AND tags @> '{"damage:date": "2023-02-06"}') and (geometrytype(geom)='POLYGON' or geometrytype(geom)='MULTIPOLYGON')) t1"""
     query_result = raw_currentdata_extraction_query(
         validated_params,
     )
     assert query_result.encode("utf-8") == expected_query.encode("utf-8")
+
+
+def test_export_cache_key_is_canonical():
+    geometry = {
+        "type": "Polygon",
+        "coordinates": [
+            [
+                [83.96919250488281, 28.194446860487773],
+                [83.99751663208006, 28.194446860487773],
+                [83.99751663208006, 28.214869548073377],
+                [83.96919250488281, 28.214869548073377],
+                [83.96919250488281, 28.194446860487773],
+            ]
+        ],
+    }
+    first = RawDataCurrentParams(
+        geometry=geometry,
+        geometryType=["point", "polygon"],
+        filters={"tags": {"all_geometry": {"join_or": {"amenity": ["cafe", "pub"]}}}},
+    )
+    second = RawDataCurrentParams(
+        geometry=geometry,
+        geometryType=["polygon", "point"],
+        uuid=False,
+        filters={"tags": {"all_geometry": {"join_or": {"amenity": ["pub", "cafe"]}}}},
+    )
+    last_updated = "2024-03-28 10:00:00+00:00"
+    assert ExportCache.get_cache_key(first, last_updated) == ExportCache.get_cache_key(
+        second, last_updated
+    )
+    assert ExportCache.get_cache_key(first, last_updated) != ExportCache.get_cache_key(
+        first, "2024-03-29 10:00:00+00:00"
+    )
+
+
+def test_export_cache_skips_artifacts_of_other_requests(tmp_path, monkeypatch):
+    class FakeRedis:
+        def __init__(self):
+            self.values, self.hashes, self.sorted_sets = {}, {}, {}
+
+        def pipeline(self):
+            return self
+
+        def execute(self):
+            pass
+
+        def get(self, key):
+            return self.values.get(key)
+
+        def set(self, key, value, ex=None):
+            self.values[key] = value
+
+        def exists(self, key):
+            return key in self.values
+
+        def delete(self, key):
+            self.values.pop(key, None)
+
+        def hget(self, name, key):
+            return self.hashes.get(name, {}).get(key)
+
+        def hset(self, name, key, value):
+            self.hashes.setdefault(name, {})[key] = (
+                value.encode("utf-8") if isinstance(value, str) else value
+            )
+
+        def hdel(self, name, key):
+            self.hashes.get(name, {}).pop(key, None)
+
+        def hgetall(self, name):
+            return {
+                key.encode("utf-8"): value
+                for key, value in self.hashes.get(name, {}).items()
+            }
+
+        def zadd(self, name, mapping):
+            self.sorted_sets.setdefault(name, {}).update(mapping)
+
+        def zrem(self, name, key):
+            self.sorted_sets.get(name, {}).pop(key, None)
+
+        def zrange(self, name, start, end):
+            return []
+
+    class FakeRawData:
+        def __init__(self, params=None):
+            pass
+
+        def check_status(self):
+            return "2024-01-01 00:00:00"
+
+        def extract_current_data(self, file_parts):
+            return 10, "{}", str(tmp_path)
+
+    def bind_and_upload(params, exportname, *args):
+        uploads.append(exportname)
+        download_url = str(tmp_path / f"{exportname.replace('/', '_')}.zip")
+        with open(download_url, "w") as artifact:
+            artifact.write(json.dumps(params.geometry.model_dump()))
+        return download_url, 100, 50
+
+    fake_redis = FakeRedis()
+    monkeypatch.setattr(src.app.redis.StrictRedis, "from_url", lambda url: fake_redis)
+    monkeypatch.setattr(src.app, "USE_S3_TO_UPLOAD", False)
+    monkeypatch.setattr(api_worker, "ENABLE_EXPORT_CACHE", True)
+    monkeypatch.setattr(api_worker, "RawData", FakeRawData)
+    monkeypatch.setattr(api_worker, "bind_and_upload", bind_and_upload)
+
+    def request(lon, uuid):
+        return {
+            "fileName": "shared",
+            "uuid": uuid,
+            "geometry": {
+                "type": "Polygon",
+                "coordinates": [
+                    [
+                        [lon, 27.7],
+                        [lon + 0.01, 27.7],
+                        [lon + 0.01, 27.71],
+                        [lon, 27.71],
+                        [lon, 27.7],
+                    ]
+                ],
+            },
+        }
+
+    # exports without uuid share path of file name and are never served from cache
+    uploads = []
+    for lon in (85.3, 85.4, 85.3):
+        assert "cache_hit" not in api_worker.process_raw_data(request(lon, False))
+    assert len(uploads) == 3
+    # exports with uuid are cached and reused for identical request only
+    uploads = []
+    first = api_worker.process_raw_data(request(85.3, True))
+    assert api_worker.process_raw_data(request(85.3, True))["cache_hit"] is True
+    assert "cache_hit" not in api_worker.process_raw_data(request(85.4, True))
+    assert len(uploads) == 2
+    # entry whose artifact path is now owned by other request is dropped
+    export_cache = ExportCache()
+    export_cache.set("other", {"download_url": first["download_url"]}, 50)
+    first_key = ExportCache.get_cache_key(
+        RawDataCurrentParams(**request(85.3, True)), "2024-01-01 00:00:00"
+    )
+    assert export_cache.get(first_key) is None
+    assert export_cache.get("other") is not None
+    assert os.path.exists(first["download_url"])
+
+
+def test_rawdata_current_snapshot_per_table_queries():
+    test_param = {
+        "geometry": {
+            "type": "Polygon",
+            "coordinates": [
+                [
+                    [84.92431640625, 27.766190642387496],
+                    [85.31982421875, 27.766190642387496],
+                    [85.31982421875, 28.02592458049937],
+                    [84.92431640625, 28.02592458049937],
+                    [84.92431640625, 27.766190642387496],
+                ]
+            ],
+        },
+        "outputType": "geojson",
+    }
+    union_query = raw_currentdata_extraction_query(RawDataCurrentParams(**test_param))
+    table_queries = raw_currentdata_extraction_query(
+        RawDataCurrentParams(**test_param), as_list=True
+    )
+    cte = create_clipping_boundary_cte(RawDataCurrentParams(**test_param).geometry)
+    assert len(table_queries) == 4
+    assert all(query.startswith(f"{cte} ") for query in table_queries)
+    assert (
+        f"{cte} " + " UNION ALL ".join(query[len(cte) + 1 :] for query in table_queries)
+        == union_query
+    )
+
+
+def test_rawdata_current_snapshot_chunked_queries():
+    test_param = {
+        "geometry": {
+            "type": "Polygon",
+            "coordinates": [
+                [
+                    [84.92431640625, 27.766190642387496],
+                    [85.31982421875, 27.766190642387496],
+                    [85.31982421875, 28.02592458049937],
+                    [84.92431640625, 28.02592458049937],
+                    [84.92431640625, 27.766190642387496],
+                ]
+            ],
+        },
+        "outputType": "geojson",
+    }
+    chunk = '{"type":"Polygon","coordinates":[[[85,27.8],[85.1,27.8],[85.1,27.9],[85,27.8]]]}'
+    table_queries = raw_currentdata_extraction_query(
+        RawDataCurrentParams(**test_param), as_list=True, chunk_geometry=chunk
+    )
+    assert len(table_queries) == 4
+    for i, query in enumerate(table_queries):
+        assert f"ST_intersects(geom,ST_GEOMFROMGEOJSON('{chunk}')) and" in query
+        assert (
+            f"select ST_AsGeoJSON(t{i}.*), t{i}.osm_id, t{i}.osm_type::text, ST_within("
+            in query
+        )
+
+
+def test_ewkb_to_wkb_drops_srid():
+    point_ewkb = "0101000020E6100000000000000000F03F0000000000000040"
+    point_wkb = "0101000000000000000000f03f0000000000000040"
+    assert ewkb_to_wkb(point_ewkb).hex() == point_wkb
+    assert ewkb_to_wkb(point_wkb).hex() == point_wkb
+
+
+class FakeNamedCursor:
+    """Server side cursor returning rows in fetchmany batches"""
+
+    itersize = 2
+
+    def __init__(self, description, rows):
+        self.description = [Column(name, type_code) for name, type_code in description]
+        self.rows = list(rows)
+
+    def fetchmany(self, size):
+        batch, self.rows = self.rows[:size], self.rows[size:]
+        return batch
+
+
+NATIVE_WRITER_COLUMNS = [("osm_id", 20), ("tags", 3802), ("height", 701), ("geom", 0)]
+NATIVE_WRITER_ROWS = [
+    (
+        1,
+        {"building": "yes"},
+        10.5,
+        "0101000020E6100000000000000000F03F0000000000000040",
+    ),
+    (
+        2,
+        {"amenity": "school"},
+        None,
+        "0101000020E610000000000000000008400000000000001040",
+    ),
+    (3, {}, 3.0, None),
+]
+
+
+def test_write_geoparquet_roundtrip(tmp_path, monkeypatch):
+    pa = pytest.importorskip("pyarrow")
+    pq = pytest.importorskip("pyarrow.parquet")
+    monkeypatch.setattr(src.app, "pa", pa, raising=False)
+    monkeypatch.setattr(src.app, "pq", pq, raising=False)
+    path = str(tmp_path / "export.parquet")
+    cursor = FakeNamedCursor(NATIVE_WRITER_COLUMNS, NATIVE_WRITER_ROWS)
+    assert write_geoparquet(cursor, path, 2, "snappy") == 3
+    parquet_file = pq.ParquetFile(path)
+    assert parquet_file.metadata.num_row_groups == 2
+    assert b"geo" in parquet_file.schema_arrow.metadata
+    rows = parquet_file.read().to_pylist()
+    assert [row["osm_id"] for row in rows] == [1, 2, 3]
+    assert rows[0]["tags"] == '{"building": "yes"}'
+    assert [row["height"] for row in rows] == [10.5, None, 3.0]
+    assert rows[0]["geometry"] == ewkb_to_wkb(NATIVE_WRITER_ROWS[0][3])
+    assert rows[2]["geometry"] is None
+
+
+def test_write_flatgeobuf_roundtrip(tmp_path, monkeypatch):
+    ogr = pytest.importorskip("osgeo.ogr")
+    osr = pytest.importorskip("osgeo.osr")
+    monkeypatch.setattr(src.app, "ogr", ogr, raising=False)
+    monkeypatch.setattr(src.app, "osr", osr, raising=False)
+    path = str(tmp_path / "export.fgb")
+    cursor = FakeNamedCursor(NATIVE_WRITER_COLUMNS, NATIVE_WRITER_ROWS)
+    assert write_flatgeobuf(cursor, path, "export") == 3
+    data_source = ogr.Open(path)
+    layer = data_source.GetLayer(0)
+    assert layer.GetFeatureCount() == 3
+    features = {feature.GetField("osm_id"): feature for feature in layer}
+    assert features[1].GetField("tags") == '{"building": "yes"}'
+    assert features[2].IsFieldNull("height")
+    assert features[2].GetGeometryRef().ExportToWkt() == "POINT (3 4)"
+    assert features[3].GetGeometryRef() is None
+
+
+def test_stream_geojson_batches_and_compression():
+    class BatchCursor:
+        def execute(self, query, query_params=None):
+            self.batches = [[(feature,) for feature in batch] for batch in batches]
+
+        def fetchmany(self, size):
+            return self.batches.pop(0) if self.batches else []
+
+        def close(self):
+            released.append("cursor")
+
+    class FakeConnection:
+        def cursor(self, name=None):
+            return BatchCursor()
+
+        def close(self):
+            released.append("connection")
+
+    def stream(**kwargs):
+        raw_data = RawData.__new__(RawData)
+        raw_data.con = FakeConnection()
+        return b"".join(raw_data.stream_geojson("select 1", **kwargs))
+
+    features = [f'{{"type": "Feature", "id": {index}}}' for index in range(5)]
+    batches = [features[:2], features[2:4], features[4:]]
+    released = []
+    collection = stream()
+    assert collection == (
+        '{"type": "FeatureCollection", "features": [' + ",".join(features) + "]}"
+    ).encode("utf-8")
+    assert len(json.loads(collection)["features"]) == 5
+    sequence = stream(geojsonseq=True)
+    assert sequence == "".join(f"{feature}\n" for feature in features).encode("utf-8")
+    assert gzip.decompress(stream(compress=True)) == collection
+    assert gzip.decompress(stream(geojsonseq=True, compress=True)) == sequence
+    assert released == ["cursor", "connection"] * 4
+
+
+def test_estimate_export_cost():
+    test_param = {
+        "geometry": {
+            "type": "Polygon",
+            "coordinates": [
+                [
+                    [84.92431640625, 27.766190642387496],
+                    [85.31982421875, 27.766190642387496],
+                    [85.31982421875, 28.02592458049937],
+                    [84.92431640625, 28.02592458049937],
+                    [84.92431640625, 27.766190642387496],
+                ]
+            ],
+        },
+        "outputType": "geojson",
+    }
+    table_queries = raw_currentdata_extraction_query(
+        RawDataCurrentParams(**test_param), ogr_export=True, as_list=True
+    )
+    tables = [get_table_name_from_query(query) for query in table_queries]
+    assert tables == ["nodes", "ways_line", "ways_poly", "relations"]
+
+    plans = [
+        (table, [{"Plan": {"Plan Rows": 1000, "Plan Width": 100, "Total Cost": 10}}])
+        for table in tables
+    ]
+    estimate = estimate_export_cost(plans, "geojson", country_rows={"nodes": 10})
+    assert estimate["rows"] == 3010
+    assert estimate["bytes"] == 3010 * 100 * 2.5
+    assert estimate["tables"][0] == {
+        "table": "nodes",
+        "rows": 10,
+        "bytes": 2500,
+        "cost": 10,
+    }
+
+
+def test_export_cost_score():
+    geometry = {
+        "type": "Polygon",
+        "coordinates": [
+            [
+                [84.92431640625, 27.766190642387496],
+                [85.31982421875, 27.766190642387496],
+                [85.31982421875, 28.02592458049937],
+                [84.92431640625, 28.02592458049937],
+                [84.92431640625, 27.766190642387496],
+            ]
+        ],
+    }
+    geojson_params = RawDataCurrentParams(geometry=geometry, outputType="geojson")
+    shp_params = RawDataCurrentParams(geometry=geometry, outputType="shp")
+    filtered_params = RawDataCurrentParams(
+        geometry=geometry,
+        outputType="geojson",
+        geometryType=["polygon"],
+        filters={"tags": {"all_geometry": {"join_or": {"building": []}}}},
+    )
+    assert get_export_cost_score(geojson_params, 100) == 100
+    assert get_export_cost_score(shp_params, 100) == 300
+    assert get_export_cost_score(geojson_params, 100, country_export=True) == 1000
+    assert get_export_cost_score(filtered_params, 120) == 10
+
+
+def test_tag_filter_uses_gin_operators():
+    assert (
+        generate_tag_filter_query(
+            {"join_or": {"amenity": ["hospital"], "building": [], "shop": []}}
+        )
+        == """tags ?| ARRAY['building', 'shop'] OR tags @> '{"amenity": "hospital"}'"""
+    )
+    assert (
+        generate_tag_filter_query({"join_or": {"name": ["St Mary's"]}})
+        == """tags @> '{"name": "St Mary''s"}'"""
+    )
+
+
+def test_prepared_statements_are_prepared_once_per_connection():
+    class Connection:
+        def __init__(self, pid):
+            self.pid = pid
+
+        def get_backend_pid(self):
+            return self.pid
+
+    class Cursor:
+        def __init__(self, connection):
+            self.connection = connection
+            self.executed = []
+
+        def execute(self, query, params=None):
+            self.executed.append((query, params))
+
+    registry = PreparedStatements()
+    first = Cursor(Connection(1))
+    second = Cursor(Connection(2))
+    registry.execute(first, "osm_feature", (1,))
+    registry.execute(first, "osm_feature", (2,))
+    registry.execute(second, "last_updated")
+
+    assert first.executed[0][0].startswith("PREPARE osm_feature (bigint) AS")
+    assert first.executed[1:] == [
+        ("EXECUTE osm_feature (%s)", (1,)),
+        ("EXECUTE osm_feature (%s)", (2,)),
+    ]
+    assert second.executed[1] == ("EXECUTE last_updated", None)
+    stats = registry.get_stats()
+    assert (stats["hits"], stats["misses"], stats["hit_ratio"]) == (1, 2, 0.3333)
+
+
+def test_osm_features_query_per_table_lookup():
+    params = OsmFeaturesParams(ids=["n1", "w2", "w2", "r3"])
+    assert params.ids == ["n1", "w2", "r3"]
+    query = get_osm_features_query(["nodes", "ways_line", "ways_poly"])
+    assert query.count("osm_id = ANY(%s::bigint[])") == 3
+    assert query.count(" UNION ALL ") == 2
+    assert "from ways_poly where" in query and "relations" not in query
+    for invalid_id in ("x1", f"n{2**63}"):
+        with pytest.raises(ValidationError):
+            OsmFeaturesParams(ids=[invalid_id])
+    assert OsmFeaturesParams(ids=[f"n{2**63 - 1}"]).ids == [f"n{2**63 - 1}"]
+
+
+def test_countries_cache_hits_skip_database(monkeypatch):
+    calls = []
+
+    class CountriesRawData:
+        def get_countries_version(self):
+            calls.append("version")
+            return "1:loaded"
+
+        def get_countries_geojson(self, q, tolerance=0):
+            calls.append((q, tolerance))
+            return b'{"type": "FeatureCollection", "features": []}'
+
+    monkeypatch.setattr(src.app, "RawData", CountriesRawData)
+    cache = CountriesCache()
+    body, etag = cache.get("nep", "low")
+    assert cache.get("nep", "low") == (body, etag)
+    assert calls == ["version", ("nep", 0.001)]
+    cache.get("nep", "none")
+    assert calls[-1] == ("nep", 0)
+
+    cache.version_checked_at = 0
+    CountriesRawData.get_countries_version = lambda self: "2:reloaded"
+    assert cache.get("nep", "low")[1] != etag
+    assert calls[-1] == ("nep", 0.001)
+
+    # cold miss building its entry doesn't block hits of cached entries
+    building, release, order = threading.Event(), threading.Event(), []
+
+    def get_countries_geojson(self, q, tolerance=0):
+        building.set()
+        release.wait(5)
+        order.append("built")
+        return b'{"type": "FeatureCollection", "features": []}'
+
+    CountriesRawData.get_countries_geojson = get_countries_geojson
+    miss = threading.Thread(target=cache.get, args=("ind", "low"))
+    miss.start()
+    assert building.wait(5)
+    assert cache.get("nep", "low")[0] == body
+    order.append("hit")
+    release.set()
+    miss.join()
+    assert order == ["hit", "built"]
+    assert ("ind", "low") in cache.entries
+
+
+def test_rawdata_current_snapshot_precision_and_simplify():
+    test_param = {
+        "geometry": {
+            "type": "Polygon",
+            "coordinates": [
+                [
+                    [84.92431640625, 27.766190642387496],
+                    [85.31982421875, 27.766190642387496],
+                    [85.31982421875, 28.02592458049937],
+                    [84.92431640625, 28.02592458049937],
+                    [84.92431640625, 27.766190642387496],
+                ]
+            ],
+        },
+        "geometryType": ["polygon"],
+        "precision": 6,
+        "simplifyTolerance": 0.0001,
+    }
+    validated_params = RawDataCurrentParams(**test_param)
+    query_result = raw_currentdata_extraction_query(validated_params)
+    assert (
+        "ST_ReducePrecision(ST_SimplifyPreserveTopology(geom, 0.0001), 1e-06) as geom"
+        in query_result
+    )
+    assert "ST_AsGeoJSON(t0.*, 'geom', 6)" in query_result
+    ogr_query = raw_currentdata_extraction_query(
+        RawDataCurrentParams(**test_param), ogr_export=True
+    )
+    assert "ST_AsGeoJSON" not in ogr_query
+    assert "ST_ReducePrecision" in ogr_query
+
+
+def test_rawdata_current_snapshot_changed_since():
+    test_param = {
+        "geometry": {
+            "type": "Polygon",
+            "coordinates": [
+                [
+                    [84.92431640625, 27.766190642387496],
+                    [85.31982421875, 27.766190642387496],
+                    [85.31982421875, 28.02592458049937],
+                    [84.92431640625, 28.02592458049937],
+                    [84.92431640625, 27.766190642387496],
+                ]
+            ],
+        },
+        "geometryType": ["point", "polygon"],
+        "changedSince": "2024-01-01T05:45:00+05:45",
+    }
+    validated_params = RawDataCurrentParams(**test_param)
+    query_result = raw_currentdata_extraction_query(validated_params)
+    assert query_result.count(""""timestamp" > '2024-01-01T00:00:00'::timestamp""") == 3
+
+
+def test_delta_export_date_stored_only_after_full_export(monkeypatch):
+    class FakeRedis:
+        def __init__(self):
+            self.store = {}
+
+        def get(self, key):
+            return self.store.get(key)
+
+        def set(self, key, value):
+            self.store[key] = str(value).encode("utf-8")
+
+    class FakeRawData:
+        def __init__(self, params=None):
+            pass
+
+        def check_status(self):
+            return last_updated
+
+        def extract_current_data(self, file_parts):
+            return 10, "{}", "/tmp/export"
+
+    def bind_and_upload(params, exportname, *args):
+        if failing:
+            raise ConnectionError("upload failed")
+        return f"https://example.com/{exportname}.zip", 100, 50
+
+    fake_redis = FakeRedis()
+    monkeypatch.setattr(api_worker, "redis_client", fake_redis)
+    monkeypatch.setattr(api_worker, "RawData", FakeRawData)
+    monkeypatch.setattr(api_worker, "bind_and_upload", bind_and_upload)
+    monkeypatch.setattr(api_worker, "ENABLE_DELTA_EXPORTS", True)
+    params = {
+        "fileName": "recurring",
+        "uuid": False,
+        "geometry": {
+            "type": "Polygon",
+            "coordinates": [
+                [
+                    [85.3, 27.7],
+                    [85.31, 27.7],
+                    [85.31, 27.71],
+                    [85.3, 27.71],
+                    [85.3, 27.7],
+                ]
+            ],
+        },
+    }
+    state_key = api_worker.get_delta_state_key("recurring_geojson")
+    last_updated, failing = "2024-01-01 00:00:00", False
+    response = api_worker.process_raw_data(params)
+    assert "delta_download_url" not in response
+    assert fake_redis.store[state_key] == b"2024-01-01 00:00:00"
+
+    last_updated, failing = "2024-01-02 00:00:00", True
+    with pytest.raises(ConnectionError):
+        api_worker.process_raw_data(params)
+    assert fake_redis.store[state_key] == b"2024-01-01 00:00:00"
+
+
+def test_parallel_zip_writer_roundtrip(tmp_path):
+    data = os.urandom(50000) + b"highway=residential" * 20000
+    source = tmp_path / "export.geojson"
+    source.write_bytes(data)
+    for force_zip64 in (False, True):
+        zip_path = tmp_path / "export.zip"
+        writer = ParallelZipWriter(
+            zip_path, level=6, workers=3, force_zip64=force_zip64
+        )
+        writer.CHUNK_SIZE = 64 * 1024  # many chunks per entry
+        writer.write(source, arcname=source.name)
+        writer.writestr("Readme.txt", "Exported Timestamp")
+        writer.close()
+        with zipfile.ZipFile(zip_path) as zf:
+            assert zf.testzip() is None
+            assert zf.read("export.geojson") == data
+            assert zf.read("Readme.txt") == b"Exported Timestamp"
+
+
+def test_archive_compression_policy(tmp_path):
+    assert get_compress_level("export.parquet") == 0
+    assert get_compress_level("export.fgb") == 1
+    for name in ("export.parquet", "export.geojson"):
+        (tmp_path / name).write_bytes(b"building=yes" * 10000)
+    zip_path = tmp_path / "export.zip"
+    with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for name in ("export.parquet", "export.geojson"):
+            write_to_zip(zf, tmp_path / name, arcname=name)
+        metrics = {
+            entry["name"]: entry
+            for entry in log_archive_metrics(zip_path, zf.infolist())
+        }
+    assert metrics["export.parquet"]["stored"] is True
+    assert metrics["export.parquet"]["ratio"] == 1
+    assert metrics["export.geojson"]["ratio"] < 0.1
+
+
+def test_s3_multipart_writer_streams_zip_parts(monkeypatch):
+    class MultipartClient:
+        def __init__(self):
+            self.parts, self.failed, self.completed = {}, set(), None
+
+        def create_multipart_upload(self, **kwargs):
+            return {"UploadId": "upload"}
+
+        def upload_part(self, PartNumber, Body, **kwargs):
+            if PartNumber not in self.failed:  # first attempt of every part fails
+                self.failed.add(PartNumber)
+                raise ConnectionError("connection reset")
+            self.parts[PartNumber] = Body
+            return {"ETag": f"etag-{PartNumber}"}
+
+        def complete_multipart_upload(self, MultipartUpload, **kwargs):
+            self.completed = MultipartUpload["Parts"]
+
+    monkeypatch.setattr(src.app.time, "sleep", lambda seconds: None)
+    client = MultipartClient()
+    writer = S3MultipartWriter(client, "export.zip", workers=2)
+    writer.part_size = 64 * 1024  # below s3 minimum to get many parts
+    data = os.urandom(300 * 1024)
+    with ParallelZipWriter(writer, level=1, workers=2) as zf:
+        zf.write_iter("export.geojson", [data[:1000], data[1000:]])
+    writer.close()
+    assert [part["PartNumber"] for part in client.completed] == sorted(client.parts)
+    archive = b"".join(client.parts[number] for number in sorted(client.parts))
+    assert len(archive) == writer.size
+    with zipfile.ZipFile(io.BytesIO(archive)) as zf:
+        assert zf.read("export.geojson") == data
+
+
+def test_stream_and_upload_aborts_failed_export(monkeypatch):
+    class FailingCursor:
+        itersize = 1
+
+        def execute(self, query, query_params=None):
+            self.batches = [[('{"type": "Feature"}',)]]
+
+        def fetchmany(self, size):
+            if not self.batches:
+                raise ConnectionError("server closed the connection")
+            return self.batches.pop()
+
+        def close(self):
+            released.append("cursor")
+
+    class FakeConnection:
+        def cursor(self, name=None):
+            return FailingCursor()
+
+        def close(self):
+            released.append("connection")
+
+    class FakeRawData:
+        def __init__(self, params):
+            self.con = FakeConnection()
+
+        def stream_current_data(self):
+            return 10, "{}", RawData.stream_geojson(self, "select 1")
+
+    class MultipartClient:
+        def __init__(self):
+            self.completed, self.aborted = None, False
+
+        def create_multipart_upload(self, **kwargs):
+            if failing_open:
+                raise ConnectionError("upload failed")
+            return {"UploadId": "upload"}
+
+        def upload_part(self, PartNumber, **kwargs):
+            return {"ETag": f"etag-{PartNumber}"}
+
+        def complete_multipart_upload(self, **kwargs):
+            self.completed = kwargs
+
+        def abort_multipart_upload(self, **kwargs):
+            self.aborted = True
+
+    class FakeFileTransfer:
+        def open_multipart_upload(self, file_name):
+            return S3MultipartWriter(client, file_name, workers=1)
+
+    monkeypatch.setattr(api_worker, "RawData", FakeRawData)
+    monkeypatch.setattr(api_worker, "S3FileTransfer", FakeFileTransfer)
+    params = RawDataCurrentParams(
+        fileName="export",
+        geometry={
+            "type": "Polygon",
+            "coordinates": [
+                [
+                    [85.3, 27.7],
+                    [85.31, 27.7],
+                    [85.31, 27.71],
+                    [85.3, 27.71],
+                    [85.3, 27.7],
+                ]
+            ],
+        },
+    )
+    for failing_open in (False, True):
+        client, released = MultipartClient(), []
+        with pytest.raises(ConnectionError):
+            api_worker.stream_and_upload(params, "export", {})
+        assert client.completed is None
+        assert client.aborted is not failing_open
+        assert released == ["cursor", "connection"]
+
+
+def test_s3_file_transfer_shares_client_and_region(monkeypatch):
+    class UploadClient:
+        def __init__(self):
+            self.uploaded, self.location_calls = [], 0
+
+        def upload_file(self, file_path, bucket, key, Config=None):
+            assert Config.max_concurrency == 3
+            self.uploaded.append(key)
+
+        def get_bucket_location(self, Bucket):
+            self.location_calls += 1
+            return {"LocationConstraint": "eu-west-1"}
+
+    client = UploadClient()
+    monkeypatch.setattr(S3FileTransfer, "_client", client)
+    monkeypatch.setattr(S3FileTransfer, "_client_pid", os.getpid())
+    monkeypatch.setattr(S3FileTransfer, "_bucket_locations", {})
+    transfer = S3FileTransfer(transfer_config=TransferConfig(max_concurrency=3))
+    assert S3FileTransfer().s_3 is transfer.s_3 is client
+    files = [(f"/tmp/{i}.zip", f"HDX/{i}.zip") for i in range(8)]
+    urls = transfer.upload_many(files, workers=4)
+    assert sorted(client.uploaded) == sorted(name for _, name in files)
+    assert [url.rsplit("/", 2)[-2:] for url in urls] == [
+        name.split("/") for _, name in files
+    ]
+    assert all(url.startswith("https://s3.eu-west-1.") for url in urls)
+    assert client.location_calls == 1
+
+
+def test_partitioned_duckdb_transfer_query():
+    ranges = split_osm_id_range(10, 109, 4)
+    assert ranges == [(10, 35), (35, 60), (60, 85), (85, 110)]
+    assert split_osm_id_range(5, 6, 4) == [(5, 6), (6, 7)]
+    assert split_osm_id_range(None, None, 4) == []
+    query = postgres2duckdb_query(
+        "npl", "nodes", cid=3, osm_id_range=ranges[1], insert=True
+    )
+    assert query.startswith("INSERT INTO npl_nodes SELECT")
+    assert "(country <@ ARRAY [3]) and osm_id >= 35 and osm_id < 60" in query
+
+
+def test_duckdb_snapshot_cache_reuse_refresh_and_eviction(tmp_path):
+    builds = []
+
+    def build(path):
+        builds.append(os.path.basename(path))
+        with open(path, "wb") as snapshot:
+            snapshot.write(b"0" * 100)
+
+    cache = DuckDBSnapshotCache(str(tmp_path), max_disk_size=350)
+    path, lock = cache.acquire(12, "ways_poly", "2024-05-01 10:00:00", build)
+    cache.release(lock)
+    assert cache.acquire(12, "ways_poly", "2024-05-01 10:00:00", build)[0] == path
+    assert builds == ["12_ways_poly_20240501100000.duckdb.tmp"]
+    # tables are built only when an export needs them
+    cache.release(cache.acquire(12, "nodes", "2024-05-01 10:00:00", build)[1])
+    assert len(builds) == 2
+    # snapshot in use is kept even though newer import date made it stale
+    in_use = cache.acquire(12, "ways_poly", "2024-05-01 10:00:00", build)[1]
+    new_path, new_lock = cache.acquire(12, "ways_poly", "2024-05-02 10:00:00", build)
+    assert os.path.exists(path)
+    cache.release(in_use)
+    cache.evict()
+    assert not os.path.exists(path) and os.path.exists(new_path)
+    # latest snapshot of other table of the country isn't stale
+    assert os.path.exists(tmp_path / "12_nodes_20240501100000.duckdb")
+    # least recently used snapshots not in use are evicted over disk budget
+    for cid in (1, 2, 3):
+        cache.release(cache.acquire(cid, "nodes", "2024-05-02 10:00:00", build)[1])
+    cache.release(new_lock)
+    assert sorted(
+        name for name in os.listdir(tmp_path) if name.endswith(".duckdb")
+    ) == [
+        "12_ways_poly_20240502100000.duckdb",
+        "2_nodes_20240502100000.duckdb",
+        "3_nodes_20240502100000.duckdb",
+    ]
+    # snapshot can't be keyed without import date and stray files don't break eviction
+    with pytest.raises(ValueError):
+        cache.acquire(12, "nodes", None, build)
+    (tmp_path / "12_.duckdb").write_bytes(b"0")
+    cache.evict()
+    assert os.path.exists(tmp_path / "12_.duckdb")
+
+
+def test_custom_export_without_import_date_skips_snapshot(monkeypatch):
+    class EmptyReplicationDatabase:
+        def __init__(self, db_params):
+            pass
+
+        def connect(self):
+            return None, self
+
+        def execute(self, query):
+            pass
+
+        def fetchone(self):
+            return None
+
+        def close_conn(self):
+            pass
+
+    monkeypatch.setattr(src.app, "Database", EmptyReplicationDatabase)
+    monkeypatch.setattr(src.app, "get_db_connection_params", lambda: {})
+    custom_export = CustomExport.__new__(CustomExport)
+    custom_export.cid = 12
+    assert custom_export.attach_snapshot("npl", ["nodes"]) is False
+
+
+def test_work_scheduler_budgets_dependencies_and_priority():
+    assert parse_size("5GB") == 5 * 1000**3
+    assert parse_size("512MiB") == 512 * 1024**2
+    lock = threading.Lock()
+    started, in_use = [], {"cpu": 0, "peak": 0}
+
+    def work(name, cpu):
+        with lock:
+            started.append(name)
+            in_use["cpu"] += cpu
+            in_use["peak"] = max(in_use["peak"], in_use["cpu"])
+        time.sleep(0.02)
+        with lock:
+            in_use["cpu"] -= cpu
+        return name
+
+    scheduler = WorkScheduler({"cpu": 2, "subprocess": 1})
+    for size, cost in (("small", 1), ("large", 10)):
+        query = scheduler.add(
+            f"{size}:query", partial(work, f"{size}:query", 2), cost=cost, cpu=2
+        )
+        for export_format in ("shp", "gpkg"):
+            scheduler.add(
+                f"{size}:{export_format}",
+                partial(work, f"{size}:{export_format}", 1),
+                deps=[query],
+                cost=cost,
+                cpu=1,
+                subprocess=1,
+            )
+    results = scheduler.run()
+    assert results["large:gpkg"] == "large:gpkg"
+    assert started[0] == "large:query"
+    assert started.index("large:shp") > started.index("large:query")
+    assert in_use["peak"] <= 2
+
+
+def test_custom_export_ranks_categories_by_own_rows(tmp_path, monkeypatch):
+    schedulers = []
+
+    def run(scheduler):
+        schedulers.append(scheduler)
+        return defaultdict(dict)
+
+    monkeypatch.setattr(src.app, "USE_DUCK_DB_FOR_CUSTOM_EXPORTS", True)
+    monkeypatch.setattr(src.app, "DUCK_DB_MEMORY_LIMIT", "64GB", raising=False)
+    monkeypatch.setattr(src.app, "DUCK_DB_THREAD_LIMIT", 2, raising=False)
+    monkeypatch.setattr(src.app, "CUSTOM_EXPORT_CPU_SLOTS", 4)
+    monkeypatch.setattr(src.app.WorkScheduler, "run", run)
+    monkeypatch.setattr(
+        CustomExport, "get_category_query", lambda self, data, feature_type: data.where
+    )
+    rows = {"amenity = 'school'": 20, "building = 'yes'": 50000000}
+    monkeypatch.setattr(CustomExport, "estimate_rows", lambda self, query: rows[query])
+    custom_export = CustomExport.__new__(CustomExport)
+    custom_export.default_export_path = str(tmp_path)
+    categories = [
+        {
+            name: CategoryModel(
+                types=["polygons"], select=["name"], where=where, formats=["geojson"]
+            )
+        }
+        for name, where in (
+            ("Schools", "amenity = 'school'"),
+            ("Buildings", "building = 'yes'"),
+        )
+    ]
+    custom_export.schedule_categories(categories)
+    scheduler = schedulers[0]
+    ranks = scheduler.get_ranks()
+    assert ranks["1:buildings:polygons:query"] > ranks["0:schools:polygons:query"]
+    assert (
+        ranks["1:buildings:polygons:geojson:write"]
+        > ranks["0:schools:polygons:geojson:write"]
+    )
+    # memory of small category is its share of the budget , not size of whole table
+    assert scheduler.items["0:schools:polygons:geojson:write"]["demands"][
+        "memory"
+    ] < parse_size("64GB")
+
+
+def test_materialized_result_dropped_when_format_fails(tmp_path, monkeypatch):
+    class FakeDuckDB:
+        def __init__(self):
+            self.queries = []
+
+        def run_query(self, query):
+            self.queries.append(query.split(None, 1)[0])
+            if "'GPKG'" in query:
+                raise RuntimeError("gdal write failed")
+            return [(0,)]
+
+    monkeypatch.setattr(src.app, "USE_DUCK_DB_FOR_CUSTOM_EXPORTS", True)
+    monkeypatch.setattr(
+        CustomExport,
+        "zip_export_format",
+        lambda self, path, name, export_format, file_export_path: {
+            "format": export_format.suffix
+        },
+    )
+    custom_export = CustomExport.__new__(CustomExport)
+    custom_export.default_export_path = str(tmp_path)
+    custom_export.parallel_process_state = True
+    custom_export.fanout_stats = {}
+    custom_export.duck_db_instance = FakeDuckDB()
+    custom_export.params = SimpleNamespace(
+        dataset=SimpleNamespace(dataset_prefix="hotosm_npl")
+    )
+    with pytest.raises(RuntimeError):
+        custom_export.query_to_file(
+            "SELECT 1", "Buildings", "polygons", ["geojson", "gpkg"]
+        )
+    assert custom_export.duck_db_instance.queries == ["CREATE", "COPY", "COPY", "DROP"]
+    stats = custom_export.fanout_stats["buildings_polygons"]
+    assert stats["formats"] == 2 and list(stats["write_sec"]) == ["geojson"]